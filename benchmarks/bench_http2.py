@@ -0,0 +1,88 @@
+"""Benchmark concurrent requests over HTTP/1.1 and HTTP/2 against the local mock Scholar server.
+
+All requests go through a single proxy generator, like a premium proxy, so
+with HTTP/1.1 every concurrent request needs its own connection while with
+HTTP/2 they share one multiplexed connection. ``--connect-latency`` stands in
+for the TCP and TLS handshakes with a remote proxy endpoint. Requires h2.
+
+    python benchmarks/bench_http2.py --requests 200 --concurrency 20 --latency 0.05 --connect-latency 0.2
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scholarly import scholarly, aio, ProxyGenerator
+from scholarly._mock_server import MockScholarServer
+
+
+def urls(server: MockScholarServer, requests: int, prefix: str):
+    authors = server.corpus.authors
+    return ["https://scholar.google.com/citations?hl=en&user={0}&_n={1}{2}".format(
+        authors[i % len(authors)]["scholar_id"], prefix, i) for i in range(requests)]
+
+
+def proxy_generator(server: MockScholarServer, http2: bool) -> ProxyGenerator:
+    pg = ProxyGenerator()
+    pg.MockServer(server.url)
+    if http2:
+        pg.set_http2()
+    return pg
+
+
+def bench_aio(server: MockScholarServer, http2: bool, requests: int, concurrency: int):
+    """Return the requests per second and handshakes of concurrent aio fetches"""
+    pg = proxy_generator(server, http2)
+    aio.use_proxy(pg, pg)
+    aio.stats(reset=True)
+    nav = aio._AsyncScholarly__nav
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            return await nav._get_page(url)
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(url) for url in urls(server, requests, "aio")))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    return requests / elapsed, aio.stats()["MOCK_SERVER"]["AUTHOR_PROFILE"]["tcp_handshakes"]
+
+
+def bench_threads(server: MockScholarServer, http2: bool, requests: int, concurrency: int):
+    """Return the requests per second and handshakes of fetches from threads sharing a session"""
+    pg = proxy_generator(server, http2)
+    scholarly.use_proxy(pg, pg)
+    scholarly.stats(reset=True)
+    nav = scholarly._Scholarly__nav
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(nav._get_page, urls(server, requests, "threads")))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, scholarly.stats()["MOCK_SERVER"]["AUTHOR_PROFILE"]["tcp_handshakes"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="number of pages fetched")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight at the same time")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency in seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.2,
+                        help="latency in seconds of the first request of every connection")
+    args = parser.parse_args()
+    scholarly.set_soup_cache(0)
+    scholarly.set_cache(None)
+
+    for name, bench in (("aio", bench_aio), ("threads", bench_threads)):
+        for http2 in (False, True):
+            with MockScholarServer(latency=args.latency, connect_latency=args.connect_latency,
+                                   http2=http2) as server:
+                rate, handshakes = bench(server, http2, args.requests, args.concurrency)
+            print("{0:<8} {1:<9} {2:8.1f} requests/s  {3:4d} connections".format(
+                name, "HTTP/2" if http2 else "HTTP/1.1", rate, handshakes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark scholarly against the local mock Scholar server.
+
+Measures the raw request throughput of the navigator, the overhead of the
+retries caused by captchas, 403s, 404s and redirects, and the end-to-end
+latency of ``search_pubs``, ``fill`` and ``citedby``.
+
+    python benchmarks/bench_mock_server.py --requests 500 --latency 0.02
+"""
+import argparse
+import statistics
+import time
+
+from scholarly import scholarly, ProxyGenerator
+from scholarly._mock_server import MockScholarServer
+
+
+def use_server(server: MockScholarServer):
+    pg = ProxyGenerator()
+    pg.MockServer(server.url)
+    scholarly.use_proxy(pg, pg)
+    # Every access should reach the server
+    scholarly.set_soup_cache(0)
+    scholarly.set_cache(None)
+
+
+def throughput(server: MockScholarServer, requests: int) -> float:
+    """Return the number of author profiles fetched per second"""
+    nav = scholarly._Scholarly__nav
+    authors = server.corpus.authors
+    start = time.perf_counter()
+    for i in range(requests):
+        nav._get_page("https://scholar.google.com/citations?hl=en&user={0}&_n={1}".format(
+            authors[i % len(authors)]["scholar_id"], i))
+    return requests / (time.perf_counter() - start)
+
+
+def timed(fn, repeat: int) -> str:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return "median {0:8.1f} ms  min {1:8.1f} ms".format(1000*statistics.median(durations), 1000*min(durations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests for the throughput benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the end-to-end benchmarks")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument("--fault-rate", type=float, default=0.1,
+                        help="probability of a 403, 404 or redirect in the retry benchmark")
+    args = parser.parse_args()
+
+    with MockScholarServer(latency=args.latency) as server:
+        use_server(server)
+        clean = throughput(server, args.requests)
+        print("throughput, no faults     {0:8.1f} requests/s".format(clean))
+
+        author = server.corpus.authors[0]
+        pub = author["pubs"][0]
+        print("search_pubs, 20 results  ", timed(lambda: [p for _, p in zip(range(20), scholarly.search_pubs("q"))],
+                                                 args.repeat))
+        print("fill author              ", timed(lambda: scholarly.fill(scholarly.search_author_id(author["scholar_id"])),
+                                                 args.repeat))
+        print("fill publication         ", timed(lambda: scholarly.fill(
+            {"container_type": "Publication", "source": "AUTHOR_PUBLICATION_ENTRY", "bib": {},
+             "author_pub_id": pub["author_pub_id"], "filled": False}), args.repeat))
+        snippet = next(scholarly.search_pubs("q"))
+        print("citedby, {0:3d} citations   ".format(snippet["num_citations"]),
+              timed(lambda: list(scholarly.citedby(snippet)), args.repeat))
+
+    rate = args.fault_rate / 3
+    with MockScholarServer(latency=args.latency, faults={403: rate, 404: rate, 302: rate}) as server:
+        use_server(server)
+        faulty = throughput(server, args.requests)
+        stats = server.stats()
+        print("throughput, {0:.0%} faults   {1:8.1f} requests/s".format(args.fault_rate, faulty))
+        print("retry overhead            {0:8.1f} %  ({1} server requests for {2} pages)".format(
+            100*(clean/faulty - 1), stats["requests"], args.requests))
+
+
+if __name__ == "__main__":
+    main()
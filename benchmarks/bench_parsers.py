@@ -0,0 +1,114 @@
+"""Benchmark the parser backends on recorded Scholar pages.
+
+Every page of a recording made with ``scholarly.record`` is parsed with each
+backend and its fields are extracted by the parsers of scholarly: the author,
+indices and publications of author profiles, the authors of author searches
+and the publications of search results. The fields extracted must be the same
+with every backend. Without ``--cassette``, the pages are recorded from the
+local mock Scholar server first. Requires lxml and selectolax.
+
+    python benchmarks/bench_parsers.py --cassette crawl.jsonl.gz --repeat 5
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+
+from scholarly import scholarly, ProxyGenerator
+from scholarly._mock_server import MockScholarServer
+from scholarly._navigator import _publib
+from scholarly._parsers import PARSERS, make_soup
+from scholarly.author_parser import AuthorParser
+from scholarly.data_types import AuthorSource, PageClass, PublicationSource
+from scholarly.publication_parser import PublicationParser
+
+
+def record(path: str, authors: int):
+    """Record author profiles, an author search and a search from the mock server"""
+    with MockScholarServer(authors=authors, publications=60 * authors) as server:
+        pg = ProxyGenerator()
+        pg.MockServer(server.url)
+        scholarly.use_proxy(pg, pg)
+        scholarly.set_cache(None)
+        scholarly.record(path)
+        try:
+            for author in server.corpus.authors:
+                scholarly.search_author_id(author["scholar_id"], filled=True)
+            next(scholarly.search_author(server.corpus.authors[0]["name"]))
+            search = scholarly.search_pubs("physics")
+            for _ in range(20):
+                next(search)
+        finally:
+            scholarly.record(None)
+
+
+def load(path: str):
+    """Return the url and html of the pages of a recording"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        interactions = [json.loads(line) for line in f]
+    return [(i["url"], i["body"].replace(u'\xa0', u' ')) for i in interactions if i["status"] == 200]
+
+
+def extract(url: str, soup) -> list:
+    """Extract the fields of a page the way scholarly does"""
+    nav = scholarly._Scholarly__nav
+    authors, pubs = AuthorParser(nav), PublicationParser(nav)
+    page_class = PageClass.from_url(url)
+    if page_class is PageClass.AUTHOR_PROFILE:
+        author = {"scholar_id": "", "source": AuthorSource.AUTHOR_PROFILE_PAGE, "filled": []}
+        if soup.find('div', id='gsc_prf_in'):
+            authors._fill_basics(soup, author)
+            authors._fill_indices(soup, author)
+            authors._fill_counts(soup, author)
+        return [author] + [pubs.get_publication(row, PublicationSource.AUTHOR_PUBLICATION_ENTRY)
+                           for row in soup.find_all('tr', class_='gsc_a_tr')]
+    if page_class is PageClass.AUTHOR_SEARCH:
+        return [authors.get_author(row) for row in soup.find_all('div', 'gsc_1usr')]
+    if page_class is PageClass.SEARCH:
+        publib = _publib(soup)
+        return [pubs.get_publication(row, PublicationSource.PUBLICATION_SEARCH_SNIPPET, publib=publib)
+                for row in soup.find_all('div', class_='gs_r gs_or gs_scl')]
+    return []
+
+
+def bench(pages, parser: str, repeat: int):
+    """Return the pages per second parsed, and parsed and extracted, with ``parser``"""
+    parse = total = 0.0
+    for _ in range(repeat):
+        for url, html in pages:
+            start = time.perf_counter()
+            soup = make_soup(html, parser)
+            parse += time.perf_counter() - start
+            extract(url, soup)
+            total += time.perf_counter() - start
+    n = len(pages) * repeat
+    return n / parse, n / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", help="recording made with scholarly.record, optional")
+    parser.add_argument("--authors", type=int, default=5, help="author profiles recorded from the mock server")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the pages")
+    args = parser.parse_args()
+
+    path = args.cassette
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "pages.jsonl.gz")
+        record(path, args.authors)
+    pages = load(path)
+    print("{0} pages, {1:.1f} MB of html".format(len(pages), sum(len(html) for _, html in pages) / 1e6))
+
+    reference = [extract(url, make_soup(html)) for url, html in pages]
+    for backend in PARSERS:
+        mismatches = sum(extract(url, make_soup(html, backend)) != fields
+                         for (url, html), fields in zip(pages, reference))
+        parse, total = bench(pages, backend, args.repeat)
+        print("{0:<12} parse {1:8.1f} pages/s  parse+extract {2:8.1f} pages/s  {3} mismatches".format(
+            backend, parse, total, mismatches))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
 from ._scholarly import _Scholarly
-from .data_types import Author, Publication
+from ._aio import _AsyncScholarly
+from .data_types import Author, Publication, PageClass
 from ._proxy_generator import ProxyGenerator, DOSException, MaxTriesExceededException
+from ._proxy_health import ProxyHealthTracker
+from ._tor_pool import TorPool
+from ._webdriver_pool import WebDriverPool
+from ._scheduler import BudgetExceededException, ProxyScheduler
 scholarly = _Scholarly()
+aio = _AsyncScholarly()
+# Independent instances, e.g., one per set of proxies
+Scholarly = _Scholarly
+AsyncScholarly = _AsyncScholarly
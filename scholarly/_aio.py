@@ -0,0 +1,593 @@
+"""Asynchronous (asyncio) API for scholarly"""
+import asyncio
+import codecs
+import contextvars
+import datetime
+import functools
+import re
+import requests
+from contextlib import contextmanager
+from typing import Optional, Union
+from ._navigator import _CAPTCHA, _DONE, _NEW_IDENTITY, _RETRY, Navigator, _Request, _publib
+from ._profiler import Profiler
+from ._scheduler import ProxyScheduler
+from ._cache import normalize_url
+from ._proxy_generator import ProxyGenerator, MaxTriesExceededException
+from ._scholarly import _Scholarly, _AUTHSEARCH, _CITEDBYSEARCH, _PUBSEARCH
+from .author_parser import AuthorParser
+from .publication_parser import PublicationParser, _SearchScholarIterator
+from .data_types import Author, Publication, PublicationSource
+
+
+class _SyncBridge(object):
+    """Exposes an AsyncNavigator to the synchronous parsers.
+
+    The parsers run in an executor thread. Every page they request is fetched
+    on the navigator's event loop while the calling thread waits for it.
+    """
+
+    def __init__(self, nav, loop):
+        self._nav = nav
+        self._loop = loop
+        self.logger = nav.logger
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _get_page(self, pagerequest: str, premium: bool = False) -> str:
+        return self._run(self._nav._get_page(pagerequest, premium))
+
+    def _get_soup(self, url: str):
+        return self._run(self._nav._get_soup(url))
+
+    def _get_search_soup(self, url: str):
+        return self._run(self._nav._get_search_soup(url))
+
+    def _get_soups(self, urls):
+        async def gather():
+            return await asyncio.gather(*(self._nav._get_soup(url) for url in urls))
+        return self._run(gather())
+
+    def _concurrent_pages(self) -> int:
+        return self._nav._concurrent_pages()
+
+    def _phase(self, name: str):
+        return self._nav._phase(name)
+
+
+class AsyncNavigator(Navigator):
+    """A class used to navigate pages on google scholar from an event loop.
+
+    Pages are fetched with ``httpx.AsyncClient`` sessions created by the
+    proxy generators, so a single event loop can drive many concurrent
+    requests across proxies.
+    """
+
+    def __init__(self):
+        super(AsyncNavigator, self).__init__()
+        self._loop = None
+        self._async_sessions = {}
+        # Sessions of the previous proxies, closed by ``aclose``
+        self._stale_sessions = []
+
+    def use_proxy(self, pg1: ProxyGenerator, pg2: ProxyGenerator = None):
+        super(AsyncNavigator, self).use_proxy(pg1, pg2)
+        self._retire_async_sessions()
+
+    def replay(self, path: str = None, timing: str = "fast"):
+        super(AsyncNavigator, self).replay(path, timing)
+        self._retire_async_sessions()
+
+    def _retire_async_sessions(self):
+        self._stale_sessions.extend(self._async_sessions.values())
+        self._async_sessions = {}
+
+    async def aclose(self):
+        """Close the asynchronous sessions, and their connections, of the
+        proxy generators. Sessions are created again by the next request.
+        """
+        sessions = self._stale_sessions + list(self._async_sessions.values())
+        self._stale_sessions, self._async_sessions = [], {}
+        for session in sessions:
+            await session.aclose()
+
+    def _get_async_session(self, premium: bool = True):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # An AsyncClient is bound to the event loop it was first used on,
+            # and cannot be closed from another one.
+            self._loop = loop
+            self._async_sessions, self._stale_sessions = {}, []
+        if premium not in self._async_sessions:
+            pm = self.pm1 if premium else self.pm2
+            self._async_sessions[premium] = pm._new_session(asynchronous=True)
+        return self._async_sessions[premium]
+
+    async def _new_async_session(self, premium: bool = True, old_session=None, **kwargs):
+        pm = self.pm1 if premium else self.pm2
+        if old_session is not None and old_session is not self._async_sessions.get(premium):
+            # Another request switched away from this session already
+            return self._get_async_session(premium)
+        old_session = self._async_sessions.get(premium)
+        self._async_sessions[premium] = pm._new_session(asynchronous=True, **kwargs)
+        if old_session is not None:
+            await old_session.aclose()
+        return self._async_sessions[premium]
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call without stalling the loop, in the context of the
+        calling task, e.g., its profiler phases, as ``asyncio.to_thread`` does
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(None, functools.partial(ctx.run, func, *args, **kwargs))
+
+    async def _run_parser(self, parser_class, method: str, *args, **kwargs):
+        """Run a method of a synchronous parser in the default executor.
+
+        The parser fetches its pages through this navigator's event loop.
+        """
+        parser = parser_class(_SyncBridge(self, asyncio.get_running_loop()))
+        return await self._run_blocking(getattr(parser, method), *args, **kwargs)
+
+    async def _get_page(self, pagerequest: str, premium: bool = False) -> str:
+        """Return the data from a webpage
+
+        :param pagerequest: the page url
+        :type pagerequest: str
+        :param premium: whether or not to use the premium proxy right away
+        :type premium: bool
+        :returns: the text from a webpage
+        :rtype: {str}
+        :raises: MaxTriesExceededException, DOSException
+        """
+        self.logger.info("Getting %s", pagerequest)
+        with self._phase("fetch"):
+            return await self._inflight.do_async(normalize_url(pagerequest), self._get_page_once, pagerequest, premium)
+
+    async def _get_page_once(self, pagerequest: str, premium: bool = False) -> str:
+        if self._cache is not None:
+            text = self._cache.get(pagerequest)
+            if text is not None:
+                self.logger.debug("Found %s in the cache", pagerequest)
+                return text
+        text = await self._fetch_page(pagerequest, premium)
+        if self._cache is not None:
+            self._cache.set(pagerequest, text)
+        return text
+
+    async def _fetch_page(self, pagerequest: str, premium: bool = False) -> str:
+        """Fetch a webpage from the secondary or primary proxy, and also from
+        the other one if it is slow, see ``Navigator._fetch_hedged``
+        """
+        pm, premium = self._route(pagerequest, premium)
+        delay = self._hedge_delay(pm, pagerequest)
+        if delay is None:
+            return await self._get_page_from(pm, pagerequest, premium)
+        first = asyncio.ensure_future(self._get_page_from(pm, pagerequest, premium))
+        tasks = [first]
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            other = self._other_session(None, pm)
+            if other is not None:
+                self.logger.info("No response after %.2f seconds, sending %s on another session too",
+                                 delay, pagerequest)
+                self._metrics.incr(pm.proxy_mode, pagerequest, "hedges")
+                # The hedge is the last resort, so that it never falls back to the primary proxy
+                tasks.append(asyncio.ensure_future(self._get_page_from(other, pagerequest, True)))
+        try:
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return first.result()
+                tasks = list(pending)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_page_from(self, pm: ProxyGenerator, pagerequest: str, premium: bool) -> str:
+        """Return the data from a webpage using the asynchronous session of ``pm``
+
+        When the session gets a captcha, the request moves to the other proxy
+        while the captcha is solved, see ``Navigator._get_page_from``.
+
+        :param premium: whether ``pm`` is the last resort, i.e., no other proxy
+                        is tried when it fails
+        :type premium: bool
+        """
+        metrics = self._metrics
+        req = _Request(pm, pagerequest, self._base_timeout(pm))
+        # The asynchronous sessions are those of the primary and the secondary proxy
+        primary = pm is self.pm1
+        session, proxy = self._get_async_session(primary), pm._current_proxy()
+        while req.tries < self._max_retries:
+            if self._scheduler is not None:
+                self._scheduler.charge(pm)
+            try:
+                self._start_attempt(req, await pm._rate_limiter.acquire_async())
+                resp = await session.get(req.pagerequest, timeout=self._attempt_timeout(req),
+                                         extensions={"trace": self._tracer(pm, req.pagerequest, asynchronous=True)})
+                action = self._on_response(req, resp, premium)
+                if action is _DONE:
+                    return resp.text
+                elif action is _CAPTCHA:
+                    solved = self._captcha_queue.park(pm, req.pagerequest)
+                    other = self._redispatch(None, req, solved)
+                    if other is not None:
+                        try:
+                            return await self._get_page_from(other, req.pagerequest, True)
+                        except MaxTriesExceededException:
+                            self.logger.info("The other session failed too, waiting for the captcha to be solved")
+                    # Shielded, so that a cancelled request leaves the captcha to the others waiting for it
+                    await asyncio.shield(asyncio.wrap_future(solved))
+                    session = await self._new_async_session(primary, cookies=pm._session.cookies)
+                    continue  # Retry request within same session
+                elif action is _NEW_IDENTITY:
+                    await asyncio.sleep(self._pop_wait(req))
+                    session = await self._new_async_session(primary, old_session=session)
+                    metrics.incr(pm.proxy_mode, req.pagerequest, "proxy_switches")
+                    continue  # Retry request within same session
+                elif action is _RETRY:
+                    continue
+            except Exception as e:
+                if self._on_error(req, e) is _RETRY:
+                    await asyncio.sleep(self._pop_wait(req))
+                    continue
+
+            self._switching_proxy(req)
+            try:
+                _, req.timeout = await self._run_blocking(pm.get_next_proxy, num_tries=req.tries,
+                                                          old_timeout=req.timeout, old_proxy=proxy)
+                session = await self._new_async_session(primary)
+                proxy = pm._current_proxy()
+            except Exception:
+                self.logger.info("No other secondary connections possible. "
+                                 "Using the primary proxy for all requests.")
+                break
+
+        # If secondary proxy does not work, try again primary proxy.
+        if not premium:
+            return await self._get_page_from(self.pm1, req.pagerequest, True)
+        raise self._failure(req)
+
+    async def _get_soup(self, url: str):
+        """Return the BeautifulSoup for a page on scholar.google.com"""
+        res = self._cached_soup(url)
+        if res is None:
+            html = await self._get_page('https://scholar.google.com{0}'.format(url))
+            with self._phase("parse"):
+                res = self._make_soup(url, html)
+        return res
+
+    async def _get_search_soup(self, url: str):
+        """Return the BeautifulSoup for a page of search results and the
+        template of its "add to library" links, if any
+        """
+        soup = await self._get_soup(url)
+        return soup, _publib(soup)
+
+    async def search_authors(self, url: str):
+        """Asynchronous generator that returns Author objects from the author search page"""
+        soup = await self._get_soup(url)
+
+        author_parser = AuthorParser(self)
+        while True:
+            rows = soup.find_all('div', 'gsc_1usr')
+            self.logger.info("Found %d authors", len(rows))
+            for row in rows:
+                yield author_parser.get_author(row)
+            cls1 = 'gs_btnPR gs_in_ib gs_btn_half '
+            cls2 = 'gs_btn_lsb gs_btn_srt gsc_pgn_pnx'
+            next_button = soup.find(class_=cls1+cls2)  # Can be improved
+            if next_button and 'disabled' not in next_button.attrs:
+                self.logger.info("Loading next page of authors")
+                url = next_button['onclick'][17:-1]
+                url = codecs.getdecoder("unicode_escape")(url)[0]
+                soup = await self._get_soup(url)
+            else:
+                self.logger.info("No more author pages")
+                break
+
+    def search_publications(self, url: str) -> '_AsyncSearchScholarIterator':
+        """Returns an asynchronous Publication iterator given a url
+
+        :param url: the url where publications can be found.
+        :type url: str
+        :returns: An asynchronous iterator of Publications
+        :rtype: {_AsyncSearchScholarIterator}
+        """
+        return _AsyncSearchScholarIterator(self, url)
+
+    async def search_author_id(self, id: str, filled: bool = False, sortby: str = "citedby",
+                               publication_limit: int = 0) -> Author:
+        """Search by author ID and return a Author object
+
+        See :meth:`Navigator.search_author_id` for the parameters.
+        """
+        author = AuthorParser(self).get_author(id)
+        sections = [] if filled else ['basics']
+        return await self._run_parser(AuthorParser, 'fill', author, sections=sections,
+                                      sortby=sortby, publication_limit=publication_limit)
+
+
+class _AsyncSearchScholarIterator(_SearchScholarIterator):
+    """Asynchronous iterator that returns Publication objects from the search page
+
+    The first page is loaded on the first ``__anext__`` call, so
+    ``total_results`` is ``None`` until then.
+    """
+
+    def __init__(self, nav, url: str):
+        self._url = url
+        self._pubtype = PublicationSource.PUBLICATION_SEARCH_SNIPPET if "/scholar?" in url else PublicationSource.JOURNAL_CITATION_LIST
+        self._nav = nav
+        self._soup = None
+        self.total_results = None
+        self.pub_parser = PublicationParser(self._nav)
+
+    async def _load_url(self, url: str):
+        self._set_soup(*await self._nav._get_search_soup(url))
+
+    def __next__(self):
+        raise TypeError("Use 'async for' to iterate over asynchronous search results")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        with self._nav._phase("search"):
+            return await self._anext()
+
+    async def _anext(self):
+        if self._soup is None:
+            await self._load_url(self._url)
+            self.total_results = self._get_total_results()
+
+        if self._pos < len(self._rows):
+            row = self._rows[self._pos]
+            self._pos += 1
+            return self.pub_parser.get_publication(row, self._pubtype, publib=self._publib)
+        elif self._soup.find(class_='gs_ico gs_ico_nav_next'):
+            url = self._soup.find(
+                class_='gs_ico gs_ico_nav_next').parent['href']
+            self._url = url
+            await self._load_url(url)
+            return await self._anext()
+        else:
+            raise StopAsyncIteration
+
+
+class _AsyncScholarly:
+    """Class that manages the asyncio API for scholarly
+
+    :Example::
+
+    .. testcode::
+
+        import asyncio
+        from scholarly import aio
+
+        async def main():
+            async for pub in aio.search_pubs('naive physics'):
+                print(pub['bib']['title'])
+
+        asyncio.run(main())
+    """
+
+    def __init__(self):
+        self.__nav = AsyncNavigator()
+        self.logger = self.__nav.logger
+
+    async def aclose(self) -> None:
+        """Close the connections of this instance, e.g., once a tenant is done.
+
+        An instance can also be used as an asynchronous context manager.
+
+        :Example::
+
+        .. testcode::
+
+            async def main():
+                async with AsyncScholarly() as tenant:
+                    tenant.use_proxy(pg)
+                    author = await tenant.search_author_id('Smr99uEAAAAJ')
+        """
+        await self.__nav.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def set_retries(self, num_retries: int) -> None:
+        """Sets the number of retries in case of errors
+
+        :param num_retries: the number of retries
+        :type num_retries: int
+        """
+        return self.__nav._set_retries(num_retries)
+
+    def use_proxy(self, proxy_generator: ProxyGenerator,
+                  secondary_proxy_generator: ProxyGenerator = None) -> None:
+        """Select which proxy method to use.
+
+        See :meth:`scholarly._Scholarly.use_proxy`.
+        """
+        self.__nav.use_proxy(proxy_generator, secondary_proxy_generator)
+
+    def use_scheduler(self, scheduler: ProxyScheduler = None) -> None:
+        """Choose the proxy of every request by cost and performance.
+
+        See :meth:`scholarly._Scholarly.use_scheduler`.
+        """
+        self.__nav.use_scheduler(scheduler)
+
+    def set_hedging(self, percentile: Optional[float] = 90, min_samples: int = 20) -> None:
+        """Send slow requests again on the other proxy and keep the first response.
+
+        See :meth:`scholarly._Scholarly.set_hedging`.
+        """
+        self.__nav.set_hedging(percentile, min_samples)
+
+    def record(self, path: str = None) -> None:
+        """Record the responses from Google Scholar into a gzipped file.
+
+        See :meth:`scholarly._Scholarly.record`.
+        """
+        self.__nav.record(path)
+
+    def replay(self, path: str = None, timing: str = "fast") -> None:
+        """Answer the requests from a recording instead of the network.
+
+        See :meth:`scholarly._Scholarly.replay`.
+        """
+        self.__nav.replay(path, timing)
+
+    def set_logger(self, enable: bool):
+        """Enable or disable the logger for google scholar."""
+        self.__nav.set_logger(enable)
+
+    def set_timeout(self, timeout: int):
+        """Set timeout period in seconds for scholarly"""
+        self.__nav.set_timeout(timeout)
+
+    def set_parser(self, parser: str = "html.parser") -> None:
+        """Select the backend parsing the pages from Google Scholar.
+
+        See :meth:`scholarly._Scholarly.set_parser`.
+        """
+        self.__nav.set_parser(parser)
+
+    def set_adaptive_timeouts(self, k: Optional[float] = 4.0, min_samples: int = 5) -> None:
+        """Derive the timeouts of every proxy and page class from their latency.
+
+        See :meth:`scholarly._Scholarly.set_adaptive_timeouts`.
+        """
+        self.__nav.set_adaptive_timeouts(k, min_samples)
+
+    @contextmanager
+    def profile(self):
+        """Profile the operations run from the event loop in the ``with`` block.
+
+        See :meth:`scholarly._Scholarly.profile`.
+        """
+        profiler = Profiler()
+        self.__nav._profiler = profiler
+        try:
+            yield profiler
+        finally:
+            self.__nav._profiler = None
+
+    def stats(self, reset: bool = False) -> dict:
+        """Return the metrics of the requests sent from the event loop.
+
+        See :meth:`scholarly._Scholarly.stats`.
+        """
+        res = self.__nav._metrics.snapshot()
+        if reset:
+            self.__nav._metrics.reset()
+        return res
+
+    def search_pubs(self,
+                    query: str, patents: bool = True,
+                    citations: bool = True, year_low: int = None,
+                    year_high: int = None, sort_by: str = "relevance",
+                    include_last_year: str = "abstracts",
+                    start_index: int = 0) -> _AsyncSearchScholarIterator:
+        """Searches by query and returns an asynchronous iterator of Publication objects
+
+        See :meth:`scholarly._Scholarly.search_pubs` for the parameters.
+        """
+        url = _Scholarly._construct_url(_PUBSEARCH.format(requests.utils.quote(query)), patents=patents,
+                                        citations=citations, year_low=year_low, year_high=year_high,
+                                        sort_by=sort_by, include_last_year=include_last_year,
+                                        start_index=start_index)
+        return self.__nav.search_publications(url)
+
+    def search_citedby(self, publication_id: Union[int, str], **kwargs) -> _AsyncSearchScholarIterator:
+        """Searches by Google Scholar publication id and returns an asynchronous
+        iterator of Publication objects.
+
+        See :meth:`scholarly._Scholarly.search_citedby` for the parameters.
+        """
+        url = _Scholarly._construct_url(_CITEDBYSEARCH.format(str(publication_id)), **kwargs)
+        return self.__nav.search_publications(url)
+
+    def search_author(self, name: str):
+        """Search by author name and return an asynchronous generator of Author objects"""
+        url = _AUTHSEARCH.format(requests.utils.quote(name))
+        return self.__nav.search_authors(url)
+
+    async def search_author_id(self, id: str, filled: bool = False, sortby: str = "citedby",
+                               publication_limit: int = 0) -> Author:
+        """Search by author id and return a single Author object
+
+        See :meth:`scholarly._Scholarly.search_author_id` for the parameters.
+        """
+        return await self.__nav.search_author_id(id, filled, sortby, publication_limit)
+
+    async def fill(self, object: dict, sections=[], sortby: str = "citedby",
+                   publication_limit: int = 0) -> Union[Author, Publication]:
+        """Fills the object according to its type.
+
+        See :meth:`scholarly._Scholarly.fill` for the parameters.
+        """
+        if object['container_type'] == "Author":
+            object = await self.__nav._run_parser(AuthorParser, 'fill', object, sections,
+                                                  sortby, publication_limit)
+            if object is False:
+                raise ValueError("Incorrect input")
+        elif object['container_type'] == "Publication":
+            object = await self.__nav._run_parser(PublicationParser, 'fill', object)
+        return object
+
+    async def citedby(self, object: Publication):
+        """Searches Google Scholar for other articles that cite this Publication
+        and returns an asynchronous Publication generator.
+
+        See :meth:`scholarly._Scholarly.citedby`.
+        """
+        if object['container_type'] != "Publication":
+            self.logger.warning("Object not supported for bibtex exportation")
+            return
+
+        if object["num_citations"] <= 1000:
+            if not object['filled']:
+                object = await self.fill(object)
+            async for pub in self.__nav.search_publications(object['citedby_url']):
+                yield pub
+            return
+
+        self.logger.debug("Since the paper titled %s has %d citations (>1000), "
+                          "fetching it on an annual basis.", object["bib"]["title"], object["num_citations"])
+
+        year_end = int(datetime.date.today().year)
+
+        if object["source"] == PublicationSource.AUTHOR_PUBLICATION_ENTRY:
+            await self.fill(object)
+            years = _Scholarly._bin_citations_by_year(object.get("cites_per_year", {}), year_end)
+        else:
+            try:
+                year_low = int(object["bib"]["pub_year"])
+            except KeyError:
+                self.logger.warning("Unknown publication year for paper %s, may result in incorrect number "
+                                    "of citedby papers.", object["bib"]["title"])
+                if not object['filled']:
+                    object = await self.fill(object)
+                async for pub in self.__nav.search_publications(object['citedby_url']):
+                    yield pub
+                return
+
+            # Go one year at a time in decreasing order
+            years = zip(range(year_end, year_low-1, -1), range(year_end, year_low-1, -1))
+
+        # Extract cites_id. Note: There could be multiple ones, separated by commas.
+        pub_id = re.search(r"cites=[\d+,]*", object["citedby_url"]).group()[6:]
+        for y_hi, y_lo in years:
+            sub_citations = self.search_citedby(publication_id=pub_id, year_low=y_lo, year_high=y_hi)
+            async for pub in sub_citations:
+                yield pub
@@ -0,0 +1,163 @@
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import sqlite3
+import threading
+import time
+import zlib
+
+from .data_types import PageClass
+
+_DAY = 24*60*60
+
+# Default time-to-live in seconds per page class.
+# None means forever and 0 means that the pages are not cached at all.
+DEFAULT_TTL = {
+    PageClass.AUTHOR_PROFILE: _DAY,
+    PageClass.AUTHOR_SEARCH: _DAY,
+    PageClass.PUBLICATION: 7*_DAY,
+    PageClass.SEARCH: _DAY,
+    PageClass.BIBTEX: None,  # Bibtex exports never change
+    PageClass.MANDATES: 7*_DAY,
+    PageClass.TOP_VENUES: 30*_DAY,
+    PageClass.OTHER: _DAY,
+}
+
+
+def normalize_url(url: str) -> str:
+    """Return a canonical form of ``url`` to be used as a cache key.
+
+    The scheme and host are lower-cased and the query parameters are sorted,
+    so that the same page is found irrespective of how its url was built.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+
+class ResponseCache(object):
+    """A persistent cache of fetched pages, stored in a SQLite database.
+
+    Pages are keyed by their normalized url and expire according to the
+    time-to-live of their page class.
+
+    :param path: location of the SQLite database
+    :type path: str
+    :param ttl: time-to-live in seconds per page class, overriding ``DEFAULT_TTL``
+    :type ttl: Dict[PageClass, Optional[float]]
+    """
+
+    def __init__(self, path: str, ttl: Dict[PageClass, Optional[float]] = None):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL)
+        self.ttl.update({PageClass(page_class): seconds for page_class, seconds in (ttl or {}).items()})
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                               "key TEXT PRIMARY KEY, page_class TEXT, fetched REAL, body BLOB)")
+
+    def _is_fresh(self, page_class: PageClass, fetched: float) -> bool:
+        ttl = self.ttl[page_class]
+        return ttl is None or time.time() - fetched < ttl
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached page for ``url``, or None if it is missing or expired"""
+        page_class = PageClass.from_url(url)
+        row = None
+        with self._lock:
+            if self.ttl[page_class] != 0:
+                row = self._conn.execute("SELECT fetched, body FROM responses WHERE key = ?",
+                                         (normalize_url(url),)).fetchone()
+            if row is None or not self._is_fresh(page_class, row[0]):
+                self.misses[page_class] += 1
+                return None
+            self.hits[page_class] += 1
+        return zlib.decompress(row[1]).decode('utf-8')
+
+    def set(self, url: str, text: str):
+        """Store the page fetched from ``url``"""
+        page_class = PageClass.from_url(url)
+        if self.ttl[page_class] == 0:
+            return
+        body = zlib.compress(text.encode('utf-8'))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                               (normalize_url(url), page_class.value, time.time(), body))
+
+    def purge(self):
+        """Delete the expired pages from the database"""
+        now = time.time()
+        with self._lock, self._conn:
+            for page_class, ttl in self.ttl.items():
+                if ttl is not None:
+                    self._conn.execute("DELETE FROM responses WHERE page_class = ? AND fetched < ?",
+                                       (page_class.value, now - ttl))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of hits and misses per page class"""
+        return {"hits": {page_class.value: n for page_class, n in self.hits.items()},
+                "misses": {page_class.value: n for page_class, n in self.misses.items()}}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SoupCache(object):
+    """An in-memory LRU of parsed pages, bounded by the size of their html.
+
+    Pages expire ``ttl`` seconds after they were parsed, so that a long
+    running process polling the same pages still sees them change. Parsed
+    documents are shared between callers, who must not modify them.
+
+    :param max_bytes: maximum total length of the html of the cached pages
+    :type max_bytes: int
+    :param ttl: seconds after which a parsed page is not used anymore
+    :type ttl: float
+    """
+
+    def __init__(self, max_bytes: int = 8*1024*1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        """Return the parsed page for ``url`` if it is cached and fresh, or None"""
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._entries and self._clock() - self._entries[key][2] >= self.ttl:
+                self.size -= self._entries.pop(key)[1]
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def set(self, url: str, soup, size: int):
+        """Store the parsed page for ``url``, whose html is ``size`` long"""
+        if size > self.max_bytes:
+            return
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (soup, size, self._clock())
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
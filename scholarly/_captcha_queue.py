@@ -0,0 +1,74 @@
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+
+
+class CaptchaQueue(object):
+    """Sessions waiting for a captcha to be solved.
+
+    A request that hits a captcha parks its proxy generator here instead of
+    solving the captcha itself. A dedicated thread solves the captchas one at
+    a time, in the order they were parked, while the other requests go on
+    with other sessions. Requests hitting a captcha on a session that is
+    already parked wait for the same solution, and all of them resume with
+    the cookies of the solved captcha.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('scholarly')
+        self._parked = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._parked)
+
+    def park(self, pm, url: str) -> Future:
+        """Queue the captcha that ``pm`` got for ``url``, unless ``pm`` is parked already
+
+        :returns: a future resolving to the session of ``pm`` once the captcha
+                  is solved, or to the exception that prevented solving it.
+        :rtype: {Future}
+        """
+        with self._lock:
+            future = self._parked.get(pm)
+            if future is None:
+                future = self._parked[pm] = Future()
+                self._queue.put((pm, url, future))
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._solve, name="scholarly-captcha", daemon=True)
+                    self._thread.start()
+        return future
+
+    def parked(self, pm) -> bool:
+        """Whether ``pm`` is waiting for a captcha to be solved"""
+        with self._lock:
+            return pm in self._parked
+
+    def _solve(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pm, url, future = item
+            self.logger.info("Solving the captcha of %s (%d sessions waiting)", url, self._queue.qsize() + 1)
+            try:
+                result = pm._handle_captcha2(url)
+            except Exception as e:
+                with self._lock:
+                    del self._parked[pm]
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    del self._parked[pm]
+                future.set_result(result)
+
+    def close(self):
+        """Stop the solver thread once the parked captchas are solved"""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread = None
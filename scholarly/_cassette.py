@@ -0,0 +1,118 @@
+from typing import Tuple
+from collections import defaultdict
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+
+import httpx
+
+from ._cache import normalize_url
+
+# Headers that describe the encoding of the original transfer rather than the
+# recorded (decoded) body, and must not be replayed.
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteRecorder(object):
+    """Records the responses seen by the navigator into a gzipped JSON-lines file.
+
+    Every line holds the url, status code, headers, body and latency of one
+    response, in the order in which they were received.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, url: str, resp: httpx.Response, elapsed: float):
+        """Record ``resp``, received ``elapsed`` seconds after requesting ``url``"""
+        interaction = {
+            "url": url,
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() not in _TRANSFER_HEADERS},
+            "body": resp.text,
+            "elapsed": elapsed,
+            "time": time.time(),
+        }
+        with self._lock:
+            self._file.write(json.dumps(interaction) + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Cassette(object):
+    """The responses recorded by a CassetteRecorder, ready to be replayed.
+
+    Responses for the same url are replayed in their recorded order, e.g., a
+    captcha followed by the page. Once they are used up, the last one is
+    repeated.
+
+    :param path: the recorded file
+    :type path: str
+    :param timing: "fast" to replay as fast as possible, or "original" to
+                   wait for the recorded latency of every response
+    :type timing: str
+    """
+
+    def __init__(self, path: str, timing: str = "fast"):
+        if timing not in ("fast", "original"):
+            raise ValueError("timing must be either 'fast' or 'original'")
+        self.path = path
+        self.timing = timing
+        self.logger = logging.getLogger('scholarly')
+        self._interactions = defaultdict(list)
+        self._played = defaultdict(int)
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                interaction = json.loads(line)
+                self._interactions[normalize_url(interaction["url"])].append(interaction)
+
+    def __len__(self):
+        return sum(len(interactions) for interactions in self._interactions.values())
+
+    def _next(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+        key = normalize_url(str(request.url))
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                self.logger.info("No recorded response for %s", request.url)
+                return httpx.Response(404, request=request), 0.0
+            interaction = interactions[min(self._played[key], len(interactions) - 1)]
+            self._played[key] += 1
+        resp = httpx.Response(interaction["status"], headers=interaction["headers"],
+                              text=interaction["body"], request=request)
+        delay = interaction["elapsed"] if self.timing == "original" else 0.0
+        return resp, delay
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """An httpx transport answering requests from a Cassette"""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        resp, delay = self.cassette._next(request)
+        if delay:
+            time.sleep(delay)
+        return resp
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """An asynchronous httpx transport answering requests from a Cassette"""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        resp, delay = self.cassette._next(request)
+        if delay:
+            await asyncio.sleep(delay)
+        return resp
@@ -0,0 +1,68 @@
+from typing import Iterable, List
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class CookieStore(object):
+    """Cookies per proxy, persisted in a SQLite database so that the cookies
+    of a solved captcha carry over to new sessions and between runs.
+
+    Cookies expire at their own expiry date. Session cookies, which have
+    none, expire ``ttl`` seconds after they were saved. Proxies are stored as
+    a hash of their url, which may contain an API key or a password.
+
+    :param path: location of the SQLite database
+    :type path: str
+    :param ttl: seconds after which session cookies are not used anymore
+    :type ttl: float
+    """
+
+    def __init__(self, path: str, ttl: float = 24*60*60):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cookies ("
+                               "proxy TEXT, name TEXT, domain TEXT, path TEXT, value TEXT, expires REAL, "
+                               "PRIMARY KEY (proxy, name, domain, path))")
+
+    @staticmethod
+    def _key(proxy: str) -> str:
+        return hashlib.sha256(proxy.encode("utf-8")).hexdigest()
+
+    def save(self, proxy: str, cookies: Iterable[dict]):
+        """Remember the ``cookies`` of ``proxy``, given as webdriver cookies,
+        i.e., dictionaries with a name, a value, a domain, a path and an
+        optional expiry timestamp
+        """
+        now = time.time()
+        proxy = self._key(proxy)
+        rows = [(proxy, c["name"], c.get("domain", ""), c.get("path", "/"), c["value"],
+                 c.get("expiry") or now + self.ttl) for c in cookies]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO cookies VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def load(self, proxy: str) -> List[dict]:
+        """Return the cookies of ``proxy`` that did not expire"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value, domain, path FROM cookies WHERE proxy = ? AND expires > ?",
+                                      (self._key(proxy), time.time())).fetchall()
+        return [{"name": name, "value": value, "domain": domain, "path": path}
+                for name, value, domain, path in rows]
+
+    def forget(self, proxy: str):
+        """Delete the cookies of ``proxy``, e.g., when they did not prevent a captcha"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cookies WHERE proxy = ?", (self._key(proxy),))
+
+    def purge(self):
+        """Delete the expired cookies from the database"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cookies WHERE expires <= ?", (time.time(),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
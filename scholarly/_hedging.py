@@ -0,0 +1,34 @@
+from typing import Optional
+
+from ._metrics import Histogram
+
+
+class HedgePolicy(object):
+    """When a request has waited long enough to be sent again on another session.
+
+    A request is hedged once it has waited longer than the ``percentile``-th
+    percentile of the latency observed for the same proxy mode and page
+    class. Pages whose latency is not known from ``min_samples`` responses
+    yet are not hedged.
+
+    :param percentile: percentile (0-100) of the latency after which a request is hedged
+    :type percentile: float
+    :param min_samples: responses needed before hedging the requests of a page class
+    :type min_samples: int
+    :param min_delay: seconds to wait at least before hedging
+    :type min_delay: float
+    """
+
+    def __init__(self, percentile: float = 90, min_samples: int = 20, min_delay: float = 0.0):
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100]")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+
+    def delay(self, latency: Histogram) -> Optional[float]:
+        """Return the seconds to wait before hedging, or None not to hedge"""
+        if latency.count < max(self.min_samples, 1):
+            return None
+        return max(latency.percentile(self.percentile), self.min_delay)
+
@@ -0,0 +1,170 @@
+from collections import Counter
+from typing import Callable, Dict, List
+import bisect
+import threading
+import time
+
+from .data_types import PageClass, ProxyMode
+
+# Upper bounds in seconds of the latency buckets, growing by 50% from 5 ms to
+# about 80 s, so that percentiles are estimated within a few percent.
+LATENCY_BUCKETS = [0.005 * 1.5**i for i in range(25)]
+
+# Counters kept per proxy mode and page class
+COUNTERS = (
+    "requests",        # responses received
+    "bytes",           # size of the bodies received
+    "retries",         # requests sent again for the same page
+    "captchas",        # captcha pages received
+    "dos",             # DOS captchas received
+    "timeouts",        # requests that timed out
+    "errors",          # requests that failed otherwise
+    "proxy_switches",  # times a new proxy or session was requested
+    "hedges",          # requests sent again on another session for being slow
+    "redispatches",    # requests moved to another session while their captcha is solved
+    "failures",        # pages that could not be fetched at all
+    "sleep_seconds",   # time spent waiting, by the rate limiter or after blocks
+    "tcp_handshakes",  # new connections opened
+    "tls_handshakes",  # TLS sessions negotiated, with the proxy or the server
+)
+
+# Counters of the httpcore trace events, without the prefix of the connection type
+_HANDSHAKES = {
+    "connect_tcp.complete": "tcp_handshakes",
+    "start_tls.complete": "tls_handshakes",
+}
+
+
+class Histogram(object):
+    """A histogram of durations in seconds with fixed, exponential buckets"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the ``q``-th percentile (0-100) by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i-1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _Series(object):
+    """The metrics of the requests with one proxy mode and page class"""
+
+    def __init__(self):
+        self.counters = Counter({name: 0 for name in COUNTERS})
+        self.status = Counter()
+        self.latency = Histogram()
+
+    def to_dict(self) -> dict:
+        res = dict(self.counters)
+        res["status"] = dict(self.status)
+        res["latency"] = self.latency.to_dict()
+        return res
+
+
+class Metrics(object):
+    """Counters and latency histograms of the requests sent by a navigator,
+    broken down by proxy mode and page class.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(proxy_mode: ProxyMode, url: str):
+        mode = proxy_mode.value if proxy_mode is not None else "DIRECT"
+        return mode, PageClass.from_url(url).value
+
+    def _get(self, key) -> _Series:
+        if key not in self._series:
+            self._series[key] = _Series()
+        return self._series[key]
+
+    def incr(self, proxy_mode: ProxyMode, url: str, name: str, value: float = 1):
+        """Add ``value`` to the counter ``name`` of the requests for ``url``"""
+        if value:
+            with self._lock:
+                self._get(self._key(proxy_mode, url)).counters[name] += value
+
+    def observe(self, proxy_mode: ProxyMode, url: str, status_code: int, size: int, latency: float):
+        """Record a response to a request for ``url``"""
+        with self._lock:
+            series = self._get(self._key(proxy_mode, url))
+            series.counters["requests"] += 1
+            series.counters["bytes"] += size
+            series.status[status_code] += 1
+            series.latency.observe(latency)
+
+    def tracer(self, proxy_mode: ProxyMode, url: str, asynchronous: bool = False,
+               on_connect: Callable[[float], None] = None):
+        """Return a callback for the ``trace`` extension of httpx requests,
+        counting the handshakes of the requests for ``url``
+
+        :param on_connect: called with the seconds taken by every TCP connection opened, optional
+        :type on_connect: Callable[[float], None]
+        """
+        started = []
+
+        def trace(event: str, info: dict):
+            event = event.partition(".")[2]
+            name = _HANDSHAKES.get(event)
+            if name is not None:
+                self.incr(proxy_mode, url, name)
+            if on_connect is not None:
+                if event == "connect_tcp.started":
+                    started.append(time.monotonic())
+                elif event == "connect_tcp.complete" and started:
+                    on_connect(time.monotonic() - started.pop())
+
+        async def async_trace(event: str, info: dict):
+            trace(event, info)
+
+        return async_trace if asynchronous else trace
+
+    def latency(self, proxy_mode: ProxyMode, url: str) -> Histogram:
+        """Return the latency histogram of the requests for pages like ``url``"""
+        with self._lock:
+            return self._get(self._key(proxy_mode, url)).latency
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        """Return the metrics as ``{proxy mode: {page class: metrics}}``"""
+        res = {}
+        with self._lock:
+            for (mode, page_class), series in sorted(self._series.items()):
+                res.setdefault(mode, {})[page_class] = series.to_dict()
+        return res
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
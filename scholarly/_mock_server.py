@@ -0,0 +1,704 @@
+"""A local stand-in for Google Scholar, to benchmark scholarly without the network.
+
+The server generates a deterministic corpus of authors and publications and
+serves it with the markup that the parsers expect: author searches, author
+profiles with paginated publication lists, publication details, public access
+mandates, publication searches, "cited by" lists and bibtex exports. Captchas,
+403s, 404s and redirects are injected on a configurable schedule.
+
+Point a ProxyGenerator at it with ``ProxyGenerator.MockServer(server.url)``.
+With ``http2=True``, the server speaks HTTP/2 over cleartext (with prior
+knowledge) instead of HTTP/1.1, which requires the h2 package.
+"""
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
+import asyncio
+import hashlib
+import logging
+import random
+import socket
+import threading
+import time
+
+import httpx
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+_PAGESIZE = 20  # Default number of publications on a profile page
+_RESULTS_PER_PAGE = 10
+_YEARS = list(range(2010, 2024))
+_WORDS = ["adaptive", "bayesian", "cortex", "depth", "dynamics", "efficient", "estimation",
+          "graph", "haptic", "inference", "learning", "motion", "naive", "networks", "neural",
+          "optimal", "perception", "physics", "robust", "scene", "shading", "shape", "sparse",
+          "stochastic", "texture", "theory", "vision", "visual"]
+_FIRST_NAMES = ["Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace",
+                "John", "Katherine", "Leslie", "Margaret", "Niklaus", "Radia", "Tim", "Yoshua"]
+_LAST_NAMES = ["Allen", "Dijkstra", "Hamilton", "Hopper", "Johnson", "Knuth", "Lamport",
+               "Liskov", "Lovelace", "Perlman", "Shannon", "Turing", "Wirth"]
+_VENUES = ["Journal of Vision", "Neural Computation", "Cognitive Science",
+           "Proceedings of the IEEE", "Perception", "Vision Research"]
+
+# Faults that can be scheduled instead of the requested page
+FAULTS = ("captcha", 403, 404, 302)
+
+_CAPTCHA_PAGE = ('<html><body><div id="gs_captcha_ccl"><h1>Please show you&#39;re not a robot</h1>'
+                 '<form id="captcha-form" action="/sorry/index"><div id="recaptcha"></div></form>'
+                 '</div></body></html>')
+_403_PAGE = ("<html><body><h1>We're sorry...</h1><p>... but your computer or network may be "
+             "sending automated queries.</p></body></html>")
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class _Corpus(object):
+    """A deterministic set of authors and publications"""
+
+    def __init__(self, authors: int, publications: int, max_citations: int, seed: int):
+        rng = random.Random(seed)
+        self.authors = []
+        self.authors_by_id = {}
+        self.pubs = []
+        self.pubs_by_id = {}
+        self.pubs_by_cid = {}
+        self.pubs_by_cites = {}
+        for i in range(authors):
+            scholar_id = "mock{0:04d}AAAJ".format(i)
+            author = {
+                "scholar_id": scholar_id,
+                "name": "{0} {1}".format(rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)),
+                "affiliation": "Professor of {0}, Mock University".format(rng.choice(_WORDS).title()),
+                "email_domain": "mock.edu",
+                "interests": rng.sample(_WORDS, 3),
+                "pubs": [],
+            }
+            self.authors.append(author)
+            self.authors_by_id[scholar_id] = author
+        for author in self.authors:
+            others = [a for a in self.authors if a is not author]
+            author["coauthors"] = rng.sample(others, min(5, len(others)))
+            for j in range(publications):
+                coauthors = [author] + rng.sample(author["coauthors"], min(2, len(author["coauthors"])))
+                year = rng.choice(_YEARS)
+                pub = {
+                    "author_pub_id": "{0}:{1}".format(author["scholar_id"], _digest(seed, author["scholar_id"], j)[:12]),
+                    "cid": _digest(seed, "cid", author["scholar_id"], j)[:12],
+                    "cites_id": str(10**8 + len(self.pubs)),
+                    "title": " ".join(rng.sample(_WORDS, 5)).capitalize(),
+                    "authors": coauthors,
+                    "year": year,
+                    "venue": rng.choice(_VENUES),
+                    "volume": rng.randint(1, 40),
+                    "issue": rng.randint(1, 12),
+                    "pages": "{0}-{1}".format(10*j + 1, 10*j + 9),
+                    "num_citations": rng.randint(0, max_citations),
+                    "abstract": " ".join(rng.choice(_WORDS) for _ in range(40)).capitalize() + ".",
+                    "public_access": (None, True, False, None)[j % 4],
+                }
+                author["pubs"].append(pub)
+                self.pubs.append(pub)
+                self.pubs_by_id[pub["author_pub_id"]] = pub
+                self.pubs_by_cid[pub["cid"]] = pub
+                self.pubs_by_cites[pub["cites_id"]] = pub
+            author["pubs"].sort(key=lambda p: -p["num_citations"])
+
+    @staticmethod
+    def cites_per_year(pub: dict) -> Dict[int, int]:
+        years = [y for y in _YEARS if y >= pub["year"]]
+        counts = Counter(years[k % len(years)] for k in range(pub["num_citations"]))
+        return {y: counts[y] for y in years}
+
+    def citing(self, pub: dict) -> List[dict]:
+        """The synthetic publications citing ``pub``"""
+        years = [y for y in _YEARS if y >= pub["year"]]
+        citing = []
+        for k in range(pub["num_citations"]):
+            rng = random.Random(_digest(pub["cid"], k))
+            citing.append({
+                "cid": _digest(pub["cid"], "citing", k)[:12],
+                "cites_id": None,
+                "title": " ".join(rng.sample(_WORDS, 6)).capitalize(),
+                "authors": rng.sample(self.authors, min(2, len(self.authors))),
+                "year": years[k % len(years)],
+                "venue": rng.choice(_VENUES),
+                "num_citations": 0,
+                "abstract": " ".join(rng.choice(_WORDS) for _ in range(30)).capitalize() + ".",
+            })
+        return citing
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which would otherwise stall
+    # every keep-alive response on a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        self.server.mock.logger.debug("Mock server: " + format, *args)
+
+    def handle(self):
+        # A stand-in for the TCP and TLS handshakes with a remote server
+        if self.server.mock.connect_latency:
+            time.sleep(self.server.mock.connect_latency)
+        try:
+            super(_Handler, self).handle()
+        except ConnectionError:
+            # The client gave up waiting, e.g., the loser of a hedged request
+            pass
+
+    def do_GET(self):
+        mock = self.server.mock
+        if mock.latency:
+            time.sleep(mock.latency)
+        status, body, kind, headers = mock._respond(self.path)
+        data = body.encode("utf-8")
+        # Counted before replying, so that clients see it once they get the page
+        mock._count(kind)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _H2Protocol(asyncio.Protocol):
+    """Serves the mock server over HTTP/2 with prior knowledge, with every
+    request of a connection answered concurrently on its own stream
+    """
+
+    def __init__(self, mock: 'MockScholarServer'):
+        self.mock = mock
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.transport = None
+        self.handshake = None
+        self.window_updated = asyncio.Event()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.transport.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # A stand-in for the TCP and TLS handshakes with a remote server
+        self.handshake = asyncio.ensure_future(asyncio.sleep(self.mock.connect_latency))
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data: bytes):
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.write(self.conn.data_to_send())
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                path = dict(event.headers)[":path"]
+                asyncio.ensure_future(self._respond(event.stream_id, path))
+            elif isinstance(event, h2.events.WindowUpdated):
+                self.window_updated.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    def connection_lost(self, exc):
+        self.window_updated.set()
+
+    async def _respond(self, stream_id: int, path: str):
+        await self.handshake
+        if self.mock.latency:
+            await asyncio.sleep(self.mock.latency)
+        status, body, kind, headers = self.mock._respond(path)
+        data = body.encode("utf-8")
+        try:
+            self.conn.send_headers(stream_id, [(":status", str(status)), ("content-length", str(len(data)))]
+                                   + [(key.lower(), value) for key, value in headers], end_stream=not data)
+            while data:
+                window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                if window <= 0:
+                    self.window_updated.clear()
+                    self.transport.write(self.conn.data_to_send())
+                    await self.window_updated.wait()
+                    if self.transport.is_closing():
+                        return
+                    continue
+                self.conn.send_data(stream_id, data[:window], end_stream=window >= len(data))
+                data = data[window:]
+            self.transport.write(self.conn.data_to_send())
+        except h2.exceptions.StreamClosedError:
+            return
+        self.mock._count(kind)
+
+
+class MockScholarServer(object):
+    """A local HTTP server that imitates Google Scholar.
+
+    :param host: address to listen on
+    :type host: str
+    :param port: port to listen on, 0 picks a free one
+    :type port: int
+    :param authors: number of authors in the corpus
+    :type authors: int
+    :param publications: number of publications per author
+    :type publications: int
+    :param max_citations: maximum number of citations of a publication
+    :type max_citations: int
+    :param schedule: responses served in turn, cycling, e.g. ``[200, 200, 403]``.
+                     Every entry is 200 (the requested page) or one of ``FAULTS``.
+    :type schedule: Sequence[Union[int, str]]
+    :param faults: probability of every fault on each request, e.g.
+                   ``{"captcha": 0.01, 403: 0.05}``. Ignored if a schedule is given.
+    :type faults: Dict[Union[int, str], float]
+    :param latency: seconds to wait before answering every request
+    :type latency: float
+    :param connect_latency: seconds to wait before answering the first request
+                            of every connection, a stand-in for the TCP and TLS
+                            handshakes with a remote server
+    :type connect_latency: float
+    :param http2: serve HTTP/2 with prior knowledge instead of HTTP/1.1
+    :type http2: bool
+    :param seed: seed of the generated corpus and of the random faults
+    :type seed: int
+
+    :Example::
+
+        >>> with MockScholarServer(authors=5, faults={403: 0.1}) as server:
+        ...     pg = ProxyGenerator()
+        ...     pg.MockServer(server.url)
+        ...     scholarly.use_proxy(pg, pg)
+        ...     author = scholarly.fill(next(scholarly.search_author("")))
+        ...     print(server.stats())
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, authors: int = 10,
+                 publications: int = 40, max_citations: int = 200,
+                 schedule: Sequence[Union[int, str]] = None,
+                 faults: Dict[Union[int, str], float] = None,
+                 latency: float = 0.0, connect_latency: float = 0.0, http2: bool = False,
+                 seed: int = 0):
+        self.logger = logging.getLogger('scholarly')
+        self.corpus = _Corpus(authors, publications, max_citations, seed)
+        self.schedule = [None if entry in (200, "ok") else entry for entry in (schedule or [])]
+        self.faults = dict(faults or {})
+        for fault in list(self.schedule) + list(self.faults):
+            if fault is not None and fault not in FAULTS:
+                raise ValueError("Unknown fault {0!r}, expected one of {1}".format(fault, FAULTS))
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.http2 = http2
+        self.counts = Counter()
+        self._scheduled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        if http2:
+            if h2 is None:
+                raise RuntimeError("The HTTP/2 mock server needs the h2 package. "
+                                   "Please install scholarly[http2] to use it.")
+            self._httpd = None
+            self._socket = socket.create_server((host, port))
+            self._loop = None
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), _Handler)
+            self._httpd.daemon_threads = True
+            self._httpd.mock = self
+            self._socket = self._httpd.socket
+
+    @property
+    def url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    def start(self) -> 'MockScholarServer':
+        """Serve requests in a background thread"""
+        target = self._httpd.serve_forever if self._httpd is not None else self._serve_http2
+        self._thread = threading.Thread(target=target, name="scholarly-mock-server", daemon=True)
+        self._thread.start()
+        self.logger.info("Mock Scholar server listening at %s", self.url)
+        return self
+
+    def _serve_http2(self):
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(
+            self._loop.create_server(lambda: _H2Protocol(self), sock=self._socket))
+        self._loop.run_forever()
+        server.close()
+        self._loop.run_until_complete(server.wait_closed())
+        self._loop.close()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of requests served, in total and per kind of response"""
+        with self._lock:
+            return dict(self.counts, requests=sum(self.counts.values()))
+
+    def reset_stats(self):
+        """Reset the counts and restart the schedule from its first entry"""
+        with self._lock:
+            self.counts.clear()
+            self._scheduled = 0
+
+    def _respond(self, path: str) -> Tuple[int, str, str, List[Tuple[str, str]]]:
+        """Return the status, body, kind and headers of the response to ``path``"""
+        parts = urlsplit(path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        headers = [("Content-Type", "text/html; charset=UTF-8")]
+        fault = None if "_redirected" in params else self._next_fault()
+        if fault == "captcha":
+            return 200, _CAPTCHA_PAGE, "captcha", headers
+        if fault == 403:
+            return 403, _403_PAGE, "403", headers
+        if fault == 404:
+            return 404, "<html><body>Not found</body></html>", "404", headers
+        if fault == 302:
+            location = path + ("&" if parts.query else "?") + "_redirected=1"
+            return 302, "", "302", headers + [("Location", location)]
+
+        try:
+            status, body, kind = self._route(parts.path, params)
+        except Exception as e:
+            self.logger.warning("Mock server could not serve %s: %r", path, e)
+            status, body, kind = 500, "<html><body>Server error</body></html>", "500"
+        if parts.path == "/scholar.bib":
+            headers = [("Content-Type", "text/plain; charset=UTF-8")]
+        return status, body, kind, headers
+
+    def _next_fault(self):
+        with self._lock:
+            self._scheduled += 1
+            if self.schedule:
+                return self.schedule[(self._scheduled - 1) % len(self.schedule)]
+            draw = self._rng.random()
+            for fault, probability in self.faults.items():
+                if draw < probability:
+                    return fault
+                draw -= probability
+        return None
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.counts[kind] += 1
+
+    def _route(self, path: str, params: Dict[str, str]) -> Tuple[int, str, str]:
+        """Return the status, body and kind of the page at ``path``"""
+        if path == "/citations":
+            view_op = params.get("view_op")
+            if view_op == "search_authors":
+                return 200, self._author_search(params), "author_search"
+            if view_op == "view_citation":
+                pub = self.corpus.pubs_by_id.get(params.get("citation_for_view"))
+                if pub is not None:
+                    return 200, self._publication(pub), "publication"
+            elif view_op == "list_mandates":
+                author = self.corpus.authors_by_id.get(params.get("user"))
+                if author is not None:
+                    return 200, self._mandates(author), "mandates"
+            elif view_op == "view_mandate":
+                pub = self.corpus.pubs_by_id.get(params.get("citation_for_view"))
+                if pub is not None:
+                    return 200, self._mandate(pub), "mandate"
+            elif "user" in params:
+                author = self.corpus.authors_by_id.get(params["user"])
+                if author is not None:
+                    return 200, self._profile(author, params), "author_profile"
+        elif path == "/scholar":
+            if params.get("output") == "cite":
+                cid = params.get("q", "").split(":")[1] if params.get("q", "").startswith("info:") else None
+                if cid in self.corpus.pubs_by_cid:
+                    return 200, self._cite(cid), "cite"
+            elif "cites" in params:
+                pubs = []
+                for cites_id in params["cites"].split(","):
+                    if cites_id in self.corpus.pubs_by_cites:
+                        pubs.extend(self.corpus.citing(self.corpus.pubs_by_cites[cites_id]))
+                year_low = int(params.get("as_ylo") or 0)
+                year_high = int(params.get("as_yhi") or 9999)
+                pubs = [p for p in pubs if year_low <= p["year"] <= year_high]
+                return 200, self._search(pubs, params), "citedby"
+            elif "q" in params:
+                # Every query matches the whole corpus, in a query dependent order.
+                pubs = sorted(self.corpus.pubs, key=lambda p: _digest(params["q"], p["cid"]))
+                return 200, self._search(pubs, params), "search"
+        elif path == "/scholar.bib":
+            cid = params.get("q", "").split(":")[1] if params.get("q", "").startswith("info:") else None
+            if cid in self.corpus.pubs_by_cid:
+                return 200, self._bibtex(self.corpus.pubs_by_cid[cid]), "bibtex"
+        return 404, "<html><body>Not found</body></html>", "404"
+
+    # Pages
+
+    @staticmethod
+    def _page(title: str, body: str, extra_head: str = "") -> str:
+        return ('<!doctype html><html><head><title>{0}</title>{1}</head>'
+                '<body>{2}</body></html>').format(escape(title), extra_head, body)
+
+    @staticmethod
+    def _onclick(url: str) -> str:
+        return "window.location='{0}'".format(url.replace("=", "\\x3d").replace("&", "\\x26"))
+
+    def _author_search(self, params: Dict[str, str]) -> str:
+        start = int(params.get("astart", 0))
+        authors = self.corpus.authors[start:start + _RESULTS_PER_PAGE]
+        rows = []
+        for author in authors:
+            rows.append(
+                '<div class="gsc_1usr"><div class="gs_ai gs_scl gs_ai_chpr">'
+                '<a href="/citations?hl=en&amp;user={id}" class="gs_ai_pho"><img src="/citations?view_op=medium_photo&amp;user={id}"></a>'
+                '<div class="gs_ai_t"><h3 class="gs_ai_name"><a href="/citations?hl=en&amp;user={id}">{name}</a></h3>'
+                '<div class="gs_ai_aff">{aff}</div><div class="gs_ai_eml">Verified email at {email}</div>'
+                '<div class="gs_ai_cby">Cited by {cby}</div><div class="gs_ai_int">{interests}</div></div></div></div>'.format(
+                    id=author["scholar_id"], name=escape(author["name"]), aff=escape(author["affiliation"]),
+                    email=author["email_domain"], cby=sum(p["num_citations"] for p in author["pubs"]),
+                    interests="".join('<a class="gs_ai_one_int" href="/citations?view_op=search_authors&amp;'
+                                      'hl=en&amp;mauthors=label:{0}">{0}</a>'.format(i) for i in author["interests"])))
+        next_url = "/citations?" + urlencode(dict(params, astart=start + _RESULTS_PER_PAGE))
+        disabled = "" if start + _RESULTS_PER_PAGE < len(self.corpus.authors) else ' disabled=""'
+        button = ('<button type="button" class="gs_btnPR gs_in_ib gs_btn_half gs_btn_lsb gs_btn_srt gsc_pgn_pnx"'
+                  ' onclick="{0}"{1}><span class="gs_ico"></span></button>').format(escape(self._onclick(next_url)), disabled)
+        return self._page("Author search", '<div id="gsc_sa_ccl">{0}</div>{1}'.format("".join(rows), button))
+
+    def _profile(self, author: dict, params: Dict[str, str]) -> str:
+        cstart = int(params.get("cstart", 0))
+        pagesize = int(params.get("pagesize", _PAGESIZE))
+        pubs = author["pubs"]
+        if params.get("sortby") == "pubdate":
+            pubs = sorted(pubs, key=lambda p: -p["year"])
+        citations = sum(p["num_citations"] for p in author["pubs"])
+        counts = Counter()
+        for pub in author["pubs"]:
+            counts.update(self.corpus.cites_per_year(pub))
+        rows = []
+        for pub in pubs[cstart:cstart + pagesize]:
+            cited_by = ('<a href="https://scholar.google.com/scholar?oi=bibs&amp;hl=en&amp;cites={0}" '
+                        'class="gsc_a_ac gs_ibl">{1}</a>').format(pub["cites_id"], pub["num_citations"]) \
+                if pub["num_citations"] else '<a href="javascript:void(0)" class="gsc_a_ac gs_ibl gsc_a_acm"></a>'
+            rows.append(
+                '<tr class="gsc_a_tr"><td class="gsc_a_t"><a href="/citations?view_op=view_citation&amp;hl=en&amp;'
+                'user={user}&amp;citation_for_view={pid}" class="gsc_a_at">{title}</a>'
+                '<div class="gs_gray">{authors}</div><div class="gs_gray">{venue} {volume} ({issue}), {pages}, {year}</div></td>'
+                '<td class="gsc_a_c">{cited_by}</td><td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">{year}</span></td></tr>'.format(
+                    user=author["scholar_id"], pid=pub["author_pub_id"], title=escape(pub["title"]),
+                    authors=escape(", ".join(a["name"] for a in pub["authors"])), venue=escape(pub["venue"]),
+                    volume=pub["volume"], issue=pub["issue"], pages=pub["pages"], year=pub["year"], cited_by=cited_by))
+        more = "" if cstart + pagesize < len(pubs) else ' disabled=""'
+        years = "".join('<span class="gsc_g_t" style="right:{0}px">{1}</span>'.format(32*(len(_YEARS) - i), y)
+                        for i, y in enumerate(_YEARS))
+        bars = "".join('<a href="javascript:void(0)" class="gsc_g_a" style="left:{0}px;height:9px;z-index:{1}">'
+                       '<span class="gsc_g_al">{2}</span></a>'.format(32*i, len(_YEARS) - i, counts[y])
+                       for i, y in enumerate(_YEARS) if counts[y])
+        coauthors = "".join(
+            '<li><div class="gsc_rsb_aa"><span class="gsc_rsb_a_desc"><a href="/citations?user={0}&amp;hl=en" '
+            'tabindex="-1">{1}</a><span class="gsc_rsb_a_ext">{2}</span></span></div></li>'.format(
+                c["scholar_id"], escape(c["name"]), escape(c["affiliation"])) for c in author["coauthors"])
+        available = sum(1 for p in author["pubs"] if p["public_access"] is True)
+        not_available = sum(1 for p in author["pubs"] if p["public_access"] is False)
+        body = (
+            '<div id="gsc_prf_w"><img id="gsc_prf_pup-img" src="/citations/images/avatar_scholar_128.png">'
+            '<div id="gsc_prf_in">{name}</div><div class="gsc_prf_il">{aff}</div>'
+            '<div class="gsc_prf_il" id="gsc_prf_ivh">Verified email at {email} - '
+            '<a href="https://{email}/~{user}" rel="nofollow" class="gsc_prf_ila">Homepage</a></div>'
+            '<div class="gsc_prf_il" id="gsc_prf_int">{interests}</div></div>'
+            '<table id="gsc_rsb_st"><tbody>'
+            '<tr><td class="gsc_rsb_sc1">Citations</td><td class="gsc_rsb_std">{cites}</td><td class="gsc_rsb_std">{cites5y}</td></tr>'
+            '<tr><td class="gsc_rsb_sc1">h-index</td><td class="gsc_rsb_std">{h}</td><td class="gsc_rsb_std">{h5y}</td></tr>'
+            '<tr><td class="gsc_rsb_sc1">i10-index</td><td class="gsc_rsb_std">{i10}</td><td class="gsc_rsb_std">{i10_5y}</td></tr>'
+            '</tbody></table><div class="gsc_md_hist_b">{years}{bars}</div>'
+            '<div class="gsc_rsb_m"><div class="gsc_rsb_m_a">{available} articles</div>'
+            '<div class="gsc_rsb_m_na">{not_available} articles</div></div>'
+            '<ul class="gsc_rsb_a">{coauthors}</ul>'
+            '<table id="gsc_a_t"><tbody id="gsc_a_b">{rows}</tbody></table>'
+            '<button type="button" id="gsc_bpf_more" class="gs_btn_smd"{more}><span class="gs_lbl">Show more</span></button>'
+        ).format(
+            name=escape(author["name"]), aff=escape(author["affiliation"]), email=author["email_domain"],
+            user=author["scholar_id"],
+            interests="".join('<a href="/citations?view_op=search_authors&amp;hl=en&amp;mauthors=label:{0}" '
+                              'class="gsc_prf_inta gs_ibl">{0}</a>'.format(i) for i in author["interests"]),
+            cites=citations, cites5y=sum(counts[y] for y in _YEARS[-5:]),
+            h=_h_index(author["pubs"], 1), h5y=_h_index(author["pubs"], 2),
+            i10=sum(1 for p in author["pubs"] if p["num_citations"] >= 10),
+            i10_5y=sum(1 for p in author["pubs"] if p["num_citations"] >= 20),
+            years=years, bars=bars, available=available, not_available=not_available,
+            coauthors=coauthors, rows="".join(rows), more=more)
+        canonical = '<link rel="canonical" href="https://scholar.google.com/citations?user={0}&amp;hl=en">'.format(
+            author["scholar_id"])
+        return self._page(author["name"], body, canonical)
+
+    def _publication(self, pub: dict) -> str:
+        cites_per_year = self.corpus.cites_per_year(pub)
+        fields = [
+            ("Authors", ", ".join(a["name"] for a in pub["authors"])),
+            ("Publication date", "{0}/{1}/{2}".format(pub["year"], pub["issue"], pub["volume"] % 28 + 1)),
+            ("Journal", pub["venue"]),
+            ("Volume", str(pub["volume"])),
+            ("Issue", str(pub["issue"])),
+            ("Pages", pub["pages"]),
+            ("Publisher", "Mock Press"),
+        ]
+        rows = ['<div class="gs_scl"><div class="gsc_oci_field">{0}</div><div class="gsc_oci_value">{1}</div></div>'.format(
+            key, escape(value)) for key, value in fields]
+        rows.append('<div class="gs_scl"><div class="gsc_oci_field">Description</div><div class="gsc_oci_value" '
+                    'id="gsc_oci_descr"><div class="gsh_small"><div class="gsh_csp">{0}</div></div></div></div>'.format(
+                        escape(pub["abstract"])))
+        years = "".join('<span class="gsc_oci_g_t" style="left:{0}px">{1}</span>'.format(32*i, y)
+                        for i, y in enumerate(cites_per_year))
+        bars = "".join('<a href="/scholar?hl=en&amp;cites={0}&amp;as_ylo={1}&amp;as_yhi={1}" class="gsc_oci_g_a">'
+                       '<span class="gsc_oci_g_al">{2}</span></a>'.format(pub["cites_id"], y, n)
+                       for y, n in cites_per_year.items() if n)
+        rows.append('<div class="gs_scl"><div class="gsc_oci_field">Total citations</div><div class="gsc_oci_value">'
+                    '<div style="margin-bottom:1em"><a href="https://scholar.google.com/scholar?oi=bibs&amp;hl=en&amp;'
+                    'cites={0}">Cited by {1}</a></div><div id="gsc_oci_graph_bars">{2}{3}</div></div></div>'.format(
+                        pub["cites_id"], pub["num_citations"], years, bars))
+        rows.append('<div class="gs_scl"><div class="gsc_oci_field">Scholar articles</div><div class="gsc_oci_value">'
+                    '<div class="gsc_oci_merged_snippet"><div><a href="https://scholar.google.com/scholar?oi=bibs&amp;'
+                    'cluster={0}&amp;btnI=1&amp;hl=en">{1}</a></div><div><a href="https://scholar.google.com/scholar?'
+                    'oi=bibs&amp;hl=en&amp;q=related:{0}:scholar.google.com/">Related articles</a></div></div></div></div>'.format(
+                        pub["cid"], escape(pub["title"])))
+        body = ('<div id="gsc_oci_title_wrapper"><div id="gsc_oci_title"><a class="gsc_oci_title_link" '
+                'href="https://example.org/{0}">{1}</a></div></div><div id="gsc_oci_table">{2}</div>').format(
+                    pub["cid"], escape(pub["title"]), "".join(rows))
+        return self._page(pub["title"], body)
+
+    def _mandates(self, author: dict) -> str:
+        def links(public_access):
+            return "".join('<a class="gsc_mnd_art_rvw gs_nph gsc_mnd_link_font" data-href="/citations?view_op='
+                           'view_mandate&amp;hl=en&amp;citation_for_view={0}">Review</a>'.format(p["author_pub_id"])
+                           for p in author["pubs"] if p["public_access"] is public_access)
+        body = '<div class="gsc_mnd_sec_na">{0}</div><div class="gsc_mnd_sec_avl">{1}</div>'.format(
+            links(False), links(True))
+        return self._page("Public access", body)
+
+    def _mandate(self, pub: dict) -> str:
+        body = ('<ul><li><div class="gsc_md_mndt_title"><a href="https://example.org/policy">Mock Foundation</a></div>'
+                '<span class="gsc_md_mndt_name">Mock Foundation</span>'
+                '<span class="gs_a"><a href="https://example.org/policy-cached">Cached</a></span>'
+                '<div class="gsc_md_mndt_desc">Effective date: {0}/1</div>'
+                '<div class="gsc_md_mndt_desc">Embargo: 12 months</div>'
+                '<div class="gsc_md_mndt_desc">Grant: MF-{1}</div></li></ul>').format(pub["year"], pub["cites_id"])
+        return self._page("Mandates", body)
+
+    def _search(self, pubs: List[dict], params: Dict[str, str]) -> str:
+        start = int(params.get("start", 0))
+        rows = []
+        for pos, pub in enumerate(pubs[start:start + _RESULTS_PER_PAGE], start):
+            authors = ", ".join('<a href="/citations?user={0}&amp;hl=en&amp;oi=sra">{1}</a>'.format(
+                a["scholar_id"], escape(a["name"])) for a in pub["authors"])
+            links = []
+            if pub["num_citations"]:
+                links.append('<a href="/scholar?cites={0}&amp;as_sdt=2005&amp;sciodt=0,5&amp;hl=en">Cited by {1}</a>'.format(
+                    pub["cites_id"], pub["num_citations"]))
+            links.append('<a href="/scholar?q=related:{0}:scholar.google.com/&amp;scioq=&amp;hl=en&amp;as_sdt=0,5">'
+                         'Related articles</a>'.format(pub["cid"]))
+            rows.append(
+                '<div class="gs_r gs_or gs_scl" data-cid="{cid}" data-did="{cid}" data-lid="" data-aid="{cid}" data-rp="{pos}">'
+                '<div class="gs_ggs gs_fl"><div class="gs_ggsd"><a href="https://example.org/{cid}.pdf">'
+                '<span class="gs_ctg2">[PDF]</span> example.org</a></div></div>'
+                '<div class="gs_ri"><h3 class="gs_rt"><span class="gs_ctc"><span class="gs_ct1">[PDF]</span></span> '
+                '<a id="{cid}" href="https://example.org/{cid}">{title}</a></h3>'
+                '<div class="gs_a">{authors} - {venue}, {year} - example.org</div>'
+                '<div class="gs_rs">{abstract}</div><div class="gs_fl gs_flb">{links}</div></div></div>'.format(
+                    cid=pub["cid"], pos=pos, title=escape(pub["title"]), authors=authors,
+                    venue=escape(pub["venue"]), year=pub["year"], abstract=escape(pub["abstract"]),
+                    links=" ".join(links)))
+        nav = ""
+        if start + _RESULTS_PER_PAGE < len(pubs):
+            nav = '<div id="gs_n"><a href="/scholar?{0}"><span class="gs_ico gs_ico_nav_next"></span><b>Next</b></a></div>'.format(
+                escape(urlencode(dict(params, start=start + _RESULTS_PER_PAGE))))
+        body = ('<div id="gs_res_glb" data-sva="/citations?hl=en&amp;update_op=library_add&amp;info={{id}}"></div>'
+                '<div id="gs_ab_md"><div class="gs_ab_mdw">About {0:,} results (0.01 sec)</div></div>'
+                '<div id="gs_res_ccl_mid">{1}</div>{2}').format(len(pubs), "".join(rows), nav)
+        return self._page("Search", body)
+
+    def _cite(self, cid: str) -> str:
+        bib = ("https://scholar.googleusercontent.com/scholar.bib?q=info:{0}:scholar.google.com/"
+               "&output=citation&scisdr=mock&scisig=mock&scisf=4&ct=citation&cd=-1&hl=en").format(cid)
+        body = ('<div id="gs_citt"><table><tr><th class="gs_cith">APA</th><td><div class="gs_citr">...</div></td></tr>'
+                '</table></div><div id="gs_citi"><a class="gs_citi" href="{0}">BibTeX</a>'
+                '<a class="gs_citi" href="{1}">EndNote</a></div>').format(
+                    escape(bib), escape(bib.replace("scholar.bib", "scholar.enw")))
+        return self._page("Cite", body)
+
+    def _bibtex(self, pub: dict) -> str:
+        first = pub["authors"][0]["name"].split()[-1].lower()
+        return ("@article{{{key},\n  title={{{title}}},\n  author={{{authors}}},\n  journal={{{venue}}},\n"
+                "  volume={{{volume}}},\n  number={{{issue}}},\n  pages={{{pages}}},\n  year={{{year}}},\n"
+                "  publisher={{Mock Press}}\n}}\n").format(
+                    key="{0}{1}{2}".format(first, pub["year"], pub["title"].split()[0].lower()),
+                    title=pub["title"], authors=" and ".join(a["name"] for a in pub["authors"]),
+                    venue=pub["venue"], volume=pub["volume"], issue=pub["issue"],
+                    pages=pub["pages"].replace("-", "--"), year=pub["year"])
+
+
+def _h_index(pubs: List[dict], divisor: int) -> int:
+    citations = sorted((p["num_citations"] // divisor for p in pubs), reverse=True)
+    return sum(1 for i, c in enumerate(citations) if c > i)
+
+
+def _rewrite(request: httpx.Request, url: httpx.URL):
+    request.url = request.url.copy_with(scheme=url.scheme, host=url.host, port=url.port)
+    request.headers["Host"] = url.netloc.decode("ascii")
+
+
+class MockServerTransport(httpx.HTTPTransport):
+    """Sends every request to the mock server at ``url``, whatever its host"""
+
+    def __init__(self, url: str, **kwargs):
+        super(MockServerTransport, self).__init__(**kwargs)
+        self.url = httpx.URL(url)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _rewrite(request, self.url)
+        return super(MockServerTransport, self).handle_request(request)
+
+
+class AsyncMockServerTransport(httpx.AsyncHTTPTransport):
+    """Sends every request to the mock server at ``url``, whatever its host"""
+
+    def __init__(self, url: str, **kwargs):
+        super(AsyncMockServerTransport, self).__init__(**kwargs)
+        self.url = httpx.URL(url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _rewrite(request, self.url)
+        return await super(AsyncMockServerTransport, self).handle_async_request(request)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--authors", type=int, default=10)
+    parser.add_argument("--publications", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = MockScholarServer(port=args.port, authors=args.authors,
+                               publications=args.publications, latency=args.latency)
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
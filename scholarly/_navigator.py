@@ -7,44 +7,108 @@ from ._proxy_generator import ProxyGenerator, MaxTriesExceededException, DOSExce
 from bs4 import BeautifulSoup
 
 import codecs
+import functools
 import logging
 import random
 import time
 from requests.exceptions import Timeout
-from httpx import TimeoutException
+from httpx import ConnectTimeout, TimeoutException
 from selenium.webdriver.common.by import By
 from .publication_parser import _SearchScholarIterator
 from .author_parser import AuthorParser
 from .publication_parser import PublicationParser
-from .data_types import Author, PublicationSource, ProxyMode
-
-
-class Singleton(type):
-    _instances = {}
+from .data_types import Author, PageClass, PublicationSource, ProxyMode
+from ._session_pool import SessionPool
+from ._cache import ResponseCache, SoupCache, normalize_url
+from ._single_flight import SingleFlight
+from ._cassette import Cassette, CassetteRecorder
+from ._metrics import Metrics
+from ._captcha_queue import CaptchaQueue
+from ._scheduler import ProxyScheduler
+from ._hedging import HedgePolicy
+from ._timeouts import LatencyTimeouts
+from ._parsers import check_parser, make_soup
+from concurrent.futures import CancelledError, Future, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+import threading
+
+
+_NO_PHASE = nullcontext()
+
+# What to do after an attempt of a request, see Navigator._on_response
+_DONE, _RETRY, _CAPTCHA, _NEW_IDENTITY, _NEXT_PROXY = "done", "retry", "captcha", "new identity", "next proxy"
+
+
+def _publib(soup: BeautifulSoup) -> Optional[str]:
+    """Return the template of the "add to library" links of a search page"""
+    try:
+        return soup.find('div', id='gs_res_glb').get('data-sva')
+    except Exception:
+        return None
+
+
+class _Request(object):
+    """The state of a request through ``pm`` across its attempts"""
+
+    def __init__(self, pm: ProxyGenerator, pagerequest: str, base_timeout: float):
+        self.pm = pm
+        self.pagerequest = pagerequest
+        self.base_timeout = base_timeout
+        self.timeout = base_timeout  # Escalated by the attempts that time out
+        self.tries = 0
+        self.attempts = 0
+        self.got_403 = False
+        self.wait = 0.0  # Seconds to wait before the next attempt
+        self.start = None  # When the current attempt was sent
 
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args,
-                                                                 **kwargs)
-        return cls._instances[cls]
 
+class Navigator(object):
+    """A class used to navigate pages on google scholar.
 
-class Navigator(object, metaclass=Singleton):
-    """A class used to navigate pages on google scholar."""
+    Every navigator has its own proxy generators, sessions, rate limits,
+    caches and metrics, so independent navigators can run side by side in
+    one process, e.g., one per tenant with its own proxy contract.
+    """
+    # Threads fetching hedged requests, i.e., half as many hedged requests at a time
+    _HEDGE_WORKERS = 16
 
     def __init__(self):
         super(Navigator, self).__init__()
         self.logger = logging.getLogger('scholarly')
         self._TIMEOUT = 5
         self._max_retries = 5
+        # The backend parsing the pages
+        self._parser = "html.parser"
         # A Navigator instance has two proxy managers, each with their session.
         # `pm1` manages the primary, premium proxy.
         # `pm2` manages the secondary, inexpensive proxy.
         self.pm1 = ProxyGenerator()
         self.pm2 = ProxyGenerator()
-        self._session1 = self.pm1.get_session()
-        self._session2 = self.pm2.get_session()
-        self.got_403 = False
+        # An optional pool of independent sessions used instead of pm1/pm2.
+        self._session_pool = None
+        # An optional persistent cache of fetched pages
+        self._cache = None
+        # Recently parsed pages, so that repeated accesses cost no request or parse
+        self._soup_cache = SoupCache()
+        # Requests for the same page in flight at the same time
+        self._inflight = SingleFlight()
+        # Counters and latency histograms of the requests
+        self._metrics = Metrics()
+        # Sessions waiting for their captcha to be solved in the background
+        self._captcha_queue = CaptchaQueue()
+        # Optional choice of the proxy of every request by cost and performance
+        self._scheduler = None
+        # Optional sending of slow requests again on another session
+        self._hedging = None
+        self._hedge_executor = None
+        # Optional timeouts per proxy and page class from their measured latency
+        self._timeouts = None
+        # Optional profiler of the time spent fetching, parsing and extracting
+        self._profiler = None
+        # Optional recording of the responses, and recorded responses to replay
+        self._recorder = None
+        self._cassette = None
 
 
     def set_logger(self, enable: bool):
@@ -71,15 +135,159 @@ class Navigator(object, metaclass=Singleton):
                                  "Using the primary proxy for all requests")
                 self.pm2 = pg1
 
-        self._session1 = self.pm1.get_session()
-        self._session2 = self.pm2.get_session()
+    def use_session_pool(self, proxy_generators: List[ProxyGenerator] = None,
+                         size: int = None, max_workers: int = None):
+        """Fetch pages through a pool of independent sessions.
+
+        Each member of the pool serves one request at a time, so concurrent
+        callers of ``_get_page`` (or requests submitted with ``_submit_page``,
+        e.g., the pages of the publications of an author, see ``_get_soups``)
+        are spread over all the members instead of queueing on ``pm1``/``pm2``.
+
+        :param proxy_generators: the members of the pool, each typically set up
+                                 with its own proxy. Pass None to disable the pool.
+        :type proxy_generators: List[ProxyGenerator]
+        :param size: number of members with a local connection to create when
+                     ``proxy_generators`` is not given, optional
+        :type size: int
+        :param max_workers: size of the worker pool, defaults to the number of members
+        :type max_workers: int
+        """
+        if self._session_pool is not None:
+            self._session_pool.shutdown(wait=False)
+            self._session_pool = None
+
+        if proxy_generators is None and size:
+            proxy_generators = [ProxyGenerator() for _ in range(size)]
+        if proxy_generators:
+            self._session_pool = SessionPool(proxy_generators, max_workers=max_workers)
+            if self._cassette is not None:
+                for pm in self._session_pool.proxy_generators:
+                    pm._replay(self._cassette)
+            self.logger.info("Using a pool of %d sessions with %d workers",
+                             len(self._session_pool), self._session_pool.max_workers)
+
+    def use_scheduler(self, scheduler: ProxyScheduler = None):
+        """Choose between the primary and the secondary proxy of every request
+        with ``scheduler``, by cost, success rate and latency.
+
+        :param scheduler: the scheduler, with the costs and the budget of the job.
+                          Pass None to go back to the fixed routing.
+        :type scheduler: ProxyScheduler
+        """
+        self._scheduler = scheduler
+
+    def set_hedging(self, percentile: Optional[float] = 90, min_samples: int = 20):
+        """Send a request again on another healthy session when it takes
+        longer than the ``percentile``-th percentile of the latency of its page
+        class, and keep the first response.
+
+        :param percentile: percentile (0-100) of the latency after which a
+                           request is hedged. Pass None to stop hedging.
+        :type percentile: float
+        :param min_samples: responses needed before hedging the requests of a page class
+        :type min_samples: int
+        """
+        self._hedging = HedgePolicy(percentile, min_samples) if percentile is not None else None
+        if self._hedging is not None and self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=self._HEDGE_WORKERS,
+                                                      thread_name_prefix="scholarly-hedge")
+        elif self._hedging is None and self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+
+    def set_adaptive_timeouts(self, k: Optional[float] = 4.0, min_samples: int = 5):
+        """Derive the timeouts of every proxy and page class from their latency.
+
+        :param k: number of standard deviations above the average latency.
+                  Pass None to use the fixed timeout of ``set_timeout`` only.
+        :type k: float
+        :param min_samples: durations needed before the fixed timeout is replaced
+        :type min_samples: int
+        """
+        self._timeouts = LatencyTimeouts(k, min_samples=min_samples) if k is not None else None
+
+    def set_parser(self, parser: str = "html.parser"):
+        """Parse the pages with the backend ``parser``, one of ``_parsers.PARSERS``"""
+        check_parser(parser)
+        self._parser = parser
+        if self._soup_cache is not None:
+            # Pages parsed by the previous backend are not reused
+            self._soup_cache = SoupCache(self._soup_cache.max_bytes, self._soup_cache.ttl)
+
+    def set_cache(self, path: str = None, ttl: Dict[PageClass, Optional[float]] = None):
+        """Cache the fetched pages in a SQLite database at ``path``.
+
+        :param path: location of the database. Pass None to stop caching.
+        :type path: str
+        :param ttl: time-to-live in seconds per page class, None meaning forever
+                    and 0 meaning never cached. See ``_cache.DEFAULT_TTL``.
+        :type ttl: Dict[PageClass, Optional[float]]
+        """
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if path is not None:
+            self._cache = ResponseCache(path, ttl=ttl)
+
+    def set_soup_cache(self, max_bytes: int, ttl: float = 300.0):
+        """Set the size of the in-memory cache of parsed pages.
+
+        :param max_bytes: maximum total length of the html of the cached pages.
+                          Pass 0 to disable the cache.
+        :type max_bytes: int
+        :param ttl: seconds after which a parsed page is fetched again
+        :type ttl: float
+        """
+        self._soup_cache = SoupCache(max_bytes, ttl) if max_bytes > 0 else None
+
+    def record(self, path: str = None):
+        """Record every response seen by ``_get_page`` into a gzipped file.
+
+        The url, status, headers, body and latency of the responses are
+        written in order, to be replayed with ``replay``.
+
+        :param path: location of the recording. Pass None to stop recording.
+        :type path: str
+        """
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+        if path is not None:
+            self._recorder = CassetteRecorder(path)
+            self.logger.info("Recording responses to %s", path)
+
+    def replay(self, path: str = None, timing: str = "fast"):
+        """Serve the requests from a recording instead of the network.
+
+        :param path: location of a recording made with ``record``. Pass None
+                     to go back to the network.
+        :type path: str
+        :param timing: "fast" to replay without any rate limiting or delay, or
+                       "original" to keep the rate limiting and wait for the
+                       recorded latency of every response.
+        :type timing: str
+        """
+        self._cassette = Cassette(path, timing=timing) if path is not None else None
+        pms = [self.pm1, self.pm2]
+        if self._session_pool is not None:
+            pms.extend(self._session_pool.proxy_generators)
+        for pm in pms:
+            pm._replay(self._cassette)
+        if self._cassette is not None:
+            self.logger.info("Replaying %d responses from %s", len(self._cassette), path)
+
+    def _phase(self, name: str):
+        """Return a context manager attributing its time to the profiler phase ``name``"""
+        if self._profiler is None:
+            return _NO_PHASE
+        return self._profiler.phase(name)
 
     def _new_session(self, premium=True, **kwargs):
-        self.got_403 = False
         if premium:
-            self._session1 = self.pm1._new_session(**kwargs)
+            return self.pm1._new_session(**kwargs)
         else:
-            self._session2 = self.pm2._new_session(**kwargs)
+            return self.pm2._new_session(**kwargs)
 
 
     def _get_page(self, pagerequest: str, premium: bool = False) -> str:
@@ -94,90 +302,217 @@ class Navigator(object, metaclass=Singleton):
         :raises: MaxTriesExceededException, DOSException
         """
         self.logger.info("Getting %s", pagerequest)
-        resp = None
-        tries = 0
+        # Identical requests that are in flight at the same time, e.g., for a
+        # popular coauthor, share a single fetch.
+        with self._phase("fetch"):
+            return self._inflight.do(normalize_url(pagerequest), self._get_page_once, pagerequest, premium)
+
+    def _get_page_once(self, pagerequest: str, premium: bool = False) -> str:
+        if self._cache is not None:
+            text = self._cache.get(pagerequest)
+            if text is not None:
+                self.logger.debug("Found %s in the cache", pagerequest)
+                return text
+        text = self._fetch_page(pagerequest, premium)
+        if self._cache is not None:
+            self._cache.set(pagerequest, text)
+        return text
+
+    def _fetch_page(self, pagerequest: str, premium: bool = False) -> str:
+        """Fetch a webpage from the session pool, or the secondary or primary proxy"""
+        pool = self._session_pool
+        if pool is not None:
+            pm, premium = pool.acquire(avoid=self._captcha_queue.parked), True
+        else:
+            pm, premium = self._route(pagerequest, premium)
+        delay = self._hedge_delay(pm, pagerequest)
+        if delay is None:
+            return self._fetch_from(pool, pm, pagerequest, premium)
+        return self._fetch_hedged(pool, pm, pagerequest, premium, delay)
+
+    def _fetch_from(self, pool: Optional[SessionPool], pm: ProxyGenerator, pagerequest: str,
+                    premium: bool, cancel: threading.Event = None) -> str:
+        """Fetch a webpage with ``pm``, then give it back to ``pool`` if it was borrowed"""
+        try:
+            return self._get_page_from(pm, pagerequest, premium, cancel, pool)
+        finally:
+            if pool is not None:
+                pool.release(pm)
+
+    def _fetch_hedged(self, pool: Optional[SessionPool], pm: ProxyGenerator, pagerequest: str,
+                      premium: bool, delay: float) -> str:
+        """Fetch a webpage with ``pm``, and also with another healthy session if
+        no response came after ``delay`` seconds. The first page fetched is
+        returned. The other request is not sent again and its response, once
+        it comes, is left out of the rate limits and the health of its proxy.
+        """
+        cancel = threading.Event()
+        executor = self._hedge_executor
+        first = executor.submit(self._fetch_from, pool, pm, pagerequest, premium, cancel)
+        futures = [first]
+        if not wait(futures, timeout=delay).done:
+            other = self._other_session(pool, pm)
+            if other is not None:
+                self.logger.info("No response after %.2f seconds, sending %s on another session too",
+                                 delay, pagerequest)
+                self._metrics.incr(pm.proxy_mode, pagerequest, "hedges")
+                # The hedge is the last resort, so that it never falls back to the primary proxy
+                futures.append(executor.submit(self._fetch_from, pool, other, pagerequest, True, cancel))
+        try:
+            while True:
+                done, pending = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                if not pending:
+                    return first.result()
+                futures = list(pending)
+        finally:
+            cancel.set()
+
+    def _hedge_delay(self, pm: ProxyGenerator, pagerequest: str) -> Optional[float]:
+        """Return the seconds after which a request through ``pm`` is hedged, or None"""
+        if self._hedging is None:
+            return None
+        return self._hedging.delay(self._metrics.latency(pm.proxy_mode, pagerequest))
+
+    def _other_session(self, pool: Optional[SessionPool], pm: ProxyGenerator) -> Optional[ProxyGenerator]:
+        """Return another healthy proxy generator than ``pm``, not waiting for a
+        captcha, to hedge or move a request to, if any
+
+        A member of ``pool`` is returned borrowed.
+        """
+        if pool is not None:
+            other = pool.acquire(blocking=False, avoid=self._captcha_queue.parked)
+            if other is not None and (self._captcha_queue.parked(other) or not other._proxy_is_healthy()):
+                pool.release(other)
+                return None
+            return other
+        other = self.pm1 if pm is self.pm2 else self.pm2
+        if (other is pm or self._captcha_queue.parked(other) or not other._proxy_is_healthy()
+                or (self._scheduler is not None and not self._scheduler.affordable(other))):
+            return None
+        return other
+
+    def _route(self, pagerequest: str, premium: bool = False):
+        """Return the proxy generator for ``pagerequest`` and whether it is the premium one
+
+        Author pages go to the secondary proxy first, unless ``premium`` is
+        True. While the session of one proxy waits for a captcha to be solved,
+        the requests go to the other one. With a scheduler, the proxy is
+        chosen by cost, success rate and latency instead, and the primary
+        proxy remains the last resort.
+        """
+        if self._scheduler is not None and not premium and self.pm1 is not self.pm2:
+            pms = [pm for pm in (self.pm2, self.pm1) if not self._captcha_queue.parked(pm)]
+            pm = self._scheduler.choose(pms or [self.pm2, self.pm1], pagerequest)
+            return pm, pm is self.pm1
         if ("citations?" in pagerequest) and (not premium):
-            pm = self.pm2
-            session = self._session2
-            premium = False
+            pm, other, premium = self.pm2, self.pm1, False
         else:
-            pm = self.pm1
-            session = self._session1
-            premium = True
-        if pm.proxy_mode is ProxyMode.SCRAPERAPI:
-            self.set_timeout(60)
-        timeout=self._TIMEOUT
-        while tries < self._max_retries:
-            try:
-                w = random.uniform(1,2)
-                time.sleep(w)
-                resp = session.get(pagerequest, timeout=timeout)
-                if premium is False:  # premium methods may contain sensitive information
-                    self.logger.debug("Session proxy config is {}".format(pm._proxies))
+            pm, other, premium = self.pm1, self.pm2, True
+        if other is not pm and self._captcha_queue.parked(pm) and not self._captcha_queue.parked(other):
+            self.logger.debug("Session waiting for a captcha, using the other proxy")
+            pm, premium = other, not premium
+        return pm, premium
+
+    def _submit_page(self, pagerequest: str, premium: bool = False) -> Future:
+        """Schedule ``_get_page`` on the worker pool of the session pool.
+
+        Without a session pool, the page is fetched right away and returned as
+        a completed future.
+
+        :returns: a future resolving to the text from the webpage
+        :rtype: {Future}
+        """
+        if self._session_pool is not None:
+            return self._session_pool.submit(self._get_page, pagerequest, premium)
+        future = Future()
+        try:
+            future.set_result(self._get_page(pagerequest, premium))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _get_pages(self, pagerequests: List[str], premium: bool = False) -> List[str]:
+        """Return the data from several webpages, fetched concurrently when a
+        session pool is in use.
+
+        :raises: MaxTriesExceededException, DOSException
+        """
+        futures = [self._submit_page(pagerequest, premium) for pagerequest in pagerequests]
+        return [future.result() for future in futures]
 
-                has_captcha = self._requests_has_captcha(resp.text)
+    def _get_page_from(self, pm: ProxyGenerator, pagerequest: str, premium: bool,
+                       cancel: threading.Event = None, pool: SessionPool = None) -> str:
+        """Return the data from a webpage using the session of ``pm``
 
-                if resp.status_code == 200 and not has_captcha:
+        When the session gets a captcha, the request moves to another healthy
+        session while the captcha is solved in the background, and only waits
+        for the solution if there is none.
+
+        :param pm: the proxy generator whose session is used
+        :type pm: ProxyGenerator
+        :param premium: whether ``pm`` is the premium proxy, i.e., the last resort
+        :type premium: bool
+        :param cancel: set to stop before the next attempt, and to ignore the
+                       outcome of the attempt in flight, e.g., when a hedged
+                       request got the page first
+        :type cancel: threading.Event
+        :param pool: the session pool ``pm`` was borrowed from, if any
+        :type pool: SessionPool
+        :raises: CancelledError once ``cancel`` is set
+        """
+        metrics = self._metrics
+        req = _Request(pm, pagerequest, self._base_timeout(pm))
+        session, proxy = pm.get_session(), pm._current_proxy()
+        while req.tries < self._max_retries:
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+            if self._scheduler is not None:
+                self._scheduler.charge(pm)
+            try:
+                self._start_attempt(req, pm._rate_limiter.acquire())
+                try:
+                    with pm._using(session) as session:
+                        resp = session.get(req.pagerequest, timeout=self._attempt_timeout(req),
+                                           extensions={"trace": self._tracer(pm, req.pagerequest)})
+                finally:
+                    if cancel is not None and cancel.is_set():
+                        # Another request got the page first, whatever happened to this one
+                        raise CancelledError()
+                action = self._on_response(req, resp, premium)
+                if action is _DONE:
                     return resp.text
-                elif resp.status_code == 404:
-                    # If the scholar_id was approximate, it first appears as
-                    # 404 (or 302), and then gets redirected to the correct profile.
-                    # In such cases, we need to try again with the same session.
-                    # See https://github.com/scholarly-python-package/scholarly/issues/469.
-                    self.logger.debug("Got a 404 error. Attempting with same proxy")
-                    tries += 1
-                    continue
-                elif has_captcha:
-                    self.logger.info("Got a captcha request.")
-                    session = pm._handle_captcha2(pagerequest)
+                elif action is _CAPTCHA:
+                    solved = self._captcha_queue.park(pm, req.pagerequest)
+                    other = self._redispatch(pool, req, solved)
+                    if other is not None:
+                        try:
+                            # The other session is the last resort, so that it never falls back to this one
+                            return self._fetch_from(pool, other, req.pagerequest, True, cancel)
+                        except MaxTriesExceededException:
+                            self.logger.info("The other session failed too, waiting for the captcha to be solved")
+                    session = solved.result()
                     continue  # Retry request within same session
-                elif resp.status_code == 403:
-                    self.logger.info("Got an access denied error (403).")
-                    if not pm.has_proxy():
-                        self.logger.info("No other connections possible.")
-                        if not self.got_403:
-                            self.logger.info("Retrying immediately with another session.")
-                        else:
-                            if pm.proxy_mode not in (ProxyMode.LUMINATI, ProxyMode.SCRAPERAPI):
-                                w = random.uniform(60, 2*60)
-                                self.logger.info("Will retry after %.2f seconds (with another session).", w)
-                                time.sleep(w)
-                        self._new_session(premium=premium)
-                        self.got_403 = True
-
-                        continue # Retry request within same session
-                    else:
-                        self.logger.info("We can use another connection... let's try that.")
-                elif resp.status_code == 302 and resp.has_redirect_location:
-                    self.logger.debug("Got a redirect.")
-                    pagerequest = resp.headers["location"]
-                else:
-                    self.logger.info("""Response code %d.
-                                    Retrying...""", resp.status_code)
-
-            except DOSException:
-                if not pm.has_proxy():
-                    self.logger.info("No other connections possible.")
-                    w = random.uniform(60, 2*60)
-                    self.logger.info("Will retry after %.2f seconds (with the same session).", w)
-                    time.sleep(w)
-                    continue
-            except (Timeout, TimeoutException) as e:
-                err = "Timeout Exception %s while fetching page: %s" % (type(e).__name__, e.args)
-                self.logger.info(err)
-                if timeout < 3*self._TIMEOUT:
-                    self.logger.info("Increasing timeout and retrying within same session.")
-                    timeout = timeout + self._TIMEOUT
+                elif action is _NEW_IDENTITY:
+                    time.sleep(self._pop_wait(req))
+                    session = pm._new_session(old_session=session)
+                    metrics.incr(pm.proxy_mode, req.pagerequest, "proxy_switches")
+                    continue  # Retry request within same session
+                elif action is _RETRY:
                     continue
-                self.logger.info("Giving up this session.")
+            except CancelledError:
+                raise
             except Exception as e:
-                err = "Exception %s while fetching page: %s" % (type(e).__name__, e.args)
-                self.logger.info(err)
-                self.logger.info("Retrying with a new session.")
+                if self._on_error(req, e) is _RETRY:
+                    time.sleep(self._pop_wait(req))
+                    continue
 
-            tries += 1
+            self._switching_proxy(req)
             try:
-                session, timeout = pm.get_next_proxy(num_tries = tries, old_timeout = timeout, old_proxy=pm._proxies.get('http', None))
+                session, req.timeout = pm.get_next_proxy(num_tries=req.tries, old_timeout=req.timeout, old_proxy=proxy)
+                proxy = pm._current_proxy()
             except Exception:
                 self.logger.info("No other secondary connections possible. "
                                  "Using the primary proxy for all requests.")
@@ -185,10 +520,196 @@ class Navigator(object, metaclass=Singleton):
 
         # If secondary proxy does not work, try again primary proxy.
         if not premium:
-            return self._get_page(pagerequest, True)
+            return self._get_page_from(self.pm1, req.pagerequest, True, cancel, pool)
+        raise self._failure(req)
+
+    def _start_attempt(self, req: _Request, slept: float):
+        """Count an attempt of ``req``, after ``slept`` seconds waiting for the rate limiter"""
+        metrics = self._metrics
+        metrics.incr(req.pm.proxy_mode, req.pagerequest, "sleep_seconds", slept)
+        req.attempts += 1
+        metrics.incr(req.pm.proxy_mode, req.pagerequest, "retries", req.attempts > 1)
+        req.start = time.monotonic()
+
+    def _attempt_timeout(self, req: _Request):
+        """Return the timeouts of the current attempt of ``req``"""
+        return self._timeout(req.pm, req.pagerequest, req.timeout, req.base_timeout)
+
+    def _on_response(self, req: _Request, resp, premium: bool) -> str:
+        """Record the response to an attempt of ``req`` and decide what to do
+        next, shared by the synchronous and the asynchronous navigators
+
+        :returns: ``_DONE`` with the page, ``_CAPTCHA`` to solve a captcha,
+                  ``_NEW_IDENTITY`` to retry with a fresh session after
+                  ``req.wait`` seconds, ``_RETRY`` to retry with the same
+                  session, or ``_NEXT_PROXY`` to switch to another proxy
+        :rtype: {str}
+        :raises: DOSException
+        """
+        pm, pagerequest, metrics = req.pm, req.pagerequest, self._metrics
+        elapsed = time.monotonic() - req.start
+        metrics.observe(pm.proxy_mode, pagerequest, resp.status_code, len(resp.content), elapsed)
+        if self._recorder is not None:
+            self._recorder.record(pagerequest, resp, elapsed)
+        if premium is False:  # premium methods may contain sensitive information
+            self.logger.debug("Session proxy config is {}".format(pm._proxies))
+
+        has_captcha = self._requests_has_captcha(resp.text)
+
+        if resp.status_code == 200 and not has_captcha:
+            pm._rate_limiter.reward()
+            self._report(pm, pagerequest, "success", elapsed)
+            return _DONE
+        elif resp.status_code == 404:
+            # If the scholar_id was approximate, it first appears as
+            # 404 (or 302), and then gets redirected to the correct profile.
+            # In such cases, we need to try again with the same session.
+            # See https://github.com/scholarly-python-package/scholarly/issues/469.
+            self.logger.debug("Got a 404 error. Attempting with same proxy")
+            req.tries += 1
+            return _RETRY
+        elif has_captcha:
+            self.logger.info("Got a captcha request.")
+            metrics.incr(pm.proxy_mode, pagerequest, "captchas")
+            self._report(pm, pagerequest, "captcha")
+            pm._rate_limiter.penalize()
+            return _CAPTCHA
+        elif resp.status_code == 403:
+            self.logger.info("Got an access denied error (403).")
+            self._report(pm, pagerequest, "forbidden")
+            pm._rate_limiter.penalize()
+            if not pm.has_proxy():
+                self.logger.info("No other connections possible.")
+                if not req.got_403:
+                    self.logger.info("Retrying immediately with another session.")
+                else:
+                    if pm.proxy_mode not in (ProxyMode.LUMINATI, ProxyMode.SCRAPERAPI, ProxyMode.MOCK_SERVER):
+                        req.wait = random.uniform(60, 2*60)
+                        self.logger.info("Will retry after %.2f seconds (with another session).", req.wait)
+                req.got_403 = True
+                return _NEW_IDENTITY
+            else:
+                self.logger.info("We can use another connection... let's try that.")
+        elif resp.status_code == 302 and resp.has_redirect_location:
+            self.logger.debug("Got a redirect.")
+            req.pagerequest = resp.headers["location"]
         else:
-            raise MaxTriesExceededException("Cannot Fetch from Google Scholar.")
+            self.logger.info("""Response code %d.
+                            Retrying...""", resp.status_code)
+            self._report(pm, pagerequest, "error")
+        return _NEXT_PROXY
 
+    def _on_error(self, req: _Request, e: Exception) -> str:
+        """Record the exception raised by an attempt of ``req`` and decide
+        what to do next, see ``_on_response``
+
+        :returns: ``_RETRY`` to retry with the same session after
+                  ``req.wait`` seconds, or ``_NEXT_PROXY``
+        :rtype: {str}
+        """
+        pm, pagerequest, metrics = req.pm, req.pagerequest, self._metrics
+        if isinstance(e, DOSException):
+            metrics.incr(pm.proxy_mode, pagerequest, "dos")
+            self._report(pm, pagerequest, "captcha")
+            pm._rate_limiter.penalize()
+            if not pm.has_proxy():
+                self.logger.info("No other connections possible.")
+                req.wait = random.uniform(60, 2*60)
+                self.logger.info("Will retry after %.2f seconds (with the same session).", req.wait)
+                return _RETRY
+        elif isinstance(e, (Timeout, TimeoutException)):
+            err = "Timeout Exception %s while fetching page: %s" % (type(e).__name__, e.args)
+            self.logger.info(err)
+            metrics.incr(pm.proxy_mode, pagerequest, "timeouts")
+            self._report(pm, pagerequest, "timeout")
+            self._observe_timeout(pm, pagerequest, e, time.monotonic() - req.start)
+            if req.timeout < 3*req.base_timeout and pm._proxy_is_healthy():
+                self.logger.info("Increasing timeout and retrying within same session.")
+                req.timeout = req.timeout + req.base_timeout
+                return _RETRY
+            self.logger.info("Giving up this session.")
+        else:
+            err = "Exception %s while fetching page: %s" % (type(e).__name__, e.args)
+            self.logger.info(err)
+            metrics.incr(pm.proxy_mode, pagerequest, "errors")
+            self._report(pm, pagerequest, "error")
+            self.logger.info("Retrying with a new session.")
+        return _NEXT_PROXY
+
+    def _pop_wait(self, req: _Request) -> float:
+        """Return the seconds to wait before the next attempt of ``req``, and count them"""
+        wait, req.wait = req.wait, 0.0
+        if wait:
+            self._metrics.incr(req.pm.proxy_mode, req.pagerequest, "sleep_seconds", wait)
+        return wait
+
+    def _redispatch(self, pool: Optional[SessionPool], req: _Request, solved: Future) -> Optional[ProxyGenerator]:
+        """Return the session to move ``req`` to while the captcha it got is solved, if any"""
+        other = None if solved.done() else self._other_session(pool, req.pm)
+        if other is not None:
+            self.logger.info("Fetching %s on another session while the captcha is solved", req.pagerequest)
+            self._metrics.incr(req.pm.proxy_mode, req.pagerequest, "redispatches")
+        return other
+
+    def _switching_proxy(self, req: _Request):
+        """Count the end of a try of ``req``, before the proxy is switched"""
+        req.tries += 1
+        self._metrics.incr(req.pm.proxy_mode, req.pagerequest, "proxy_switches")
+
+    def _failure(self, req: _Request) -> MaxTriesExceededException:
+        """Return the exception raised when ``req`` failed on every proxy"""
+        self._metrics.incr(req.pm.proxy_mode, req.pagerequest, "failures")
+        return MaxTriesExceededException("Cannot Fetch from Google Scholar.")
+
+    def _report(self, pm: ProxyGenerator, pagerequest: str, outcome: str, latency: float = None):
+        """Record the outcome of a request through ``pm`` for the health of its
+        proxy and for the scheduler, if any
+        """
+        pm._report(outcome, latency)
+        if self._scheduler is not None:
+            self._scheduler.observe(pm, pagerequest, outcome == "success", latency)
+        if self._timeouts is not None and outcome == "success" and latency is not None:
+            self._timeouts.observe(self._latency_key(pm), pagerequest, latency)
+
+    def _latency_key(self, pm: ProxyGenerator):
+        """The identity that latencies are measured for, i.e., the proxy mode and proxy of ``pm``"""
+        return pm.proxy_mode, pm._current_proxy()
+
+    def _timeout(self, pm: ProxyGenerator, pagerequest: str, timeout: float, base_timeout: float):
+        """Return the timeouts of the next attempt of a request through ``pm``
+
+        Once the latency of the proxy and page class is known, the timeouts
+        come from it, escalated as much as ``timeout`` is from ``base_timeout``
+        by the previous attempts, up to the longest fixed timeout. Until then,
+        they are ``timeout``.
+        """
+        if self._timeouts is None:
+            return timeout
+        return self._timeouts.timeout(self._latency_key(pm), pagerequest, timeout, 3*base_timeout,
+                                      scale=timeout / base_timeout if base_timeout else 1.0)
+
+    def _tracer(self, pm: ProxyGenerator, pagerequest: str, asynchronous: bool = False):
+        """Return the ``trace`` extension of a request through ``pm``, see ``Metrics.tracer``"""
+        on_connect = None
+        if self._timeouts is not None:
+            on_connect = functools.partial(self._timeouts.observe_connect, self._latency_key(pm))
+        return self._metrics.tracer(pm.proxy_mode, pagerequest, asynchronous, on_connect)
+
+    def _observe_timeout(self, pm: ProxyGenerator, pagerequest: str, e: Exception, elapsed: float):
+        """Count a request through ``pm`` that timed out as having taken ``elapsed`` seconds"""
+        if self._timeouts is None:
+            return
+        if isinstance(e, ConnectTimeout):
+            self._timeouts.observe_connect(self._latency_key(pm), elapsed)
+        else:
+            self._timeouts.observe(self._latency_key(pm), pagerequest, elapsed)
+
+    def _base_timeout(self, pm: ProxyGenerator) -> float:
+        """Return the timeout of the first attempt of a request through ``pm``"""
+        if pm.proxy_mode is ProxyMode.SCRAPERAPI:
+            # ScraperAPI retries on its side before answering
+            return max(self._TIMEOUT, 60)
+        return self._TIMEOUT
 
     def _set_retries(self, num_retries: int) -> None:
         if (num_retries < 0):
@@ -235,14 +756,51 @@ class Navigator(object, metaclass=Singleton):
         return any([got_id(i) for i in _CAPTCHA_IDS])
 
     def _get_soup(self, url: str) -> BeautifulSoup:
-        """Return the BeautifulSoup for a page on scholar.google.com"""
-        html = self._get_page('https://scholar.google.com{0}'.format(url))
+        """Return the BeautifulSoup for a page on scholar.google.com
+
+        Recently parsed pages are served from memory, without a request or a parse.
+        """
+        res = self._cached_soup(url)
+        if res is None:
+            html = self._get_page('https://scholar.google.com{0}'.format(url))
+            with self._phase("parse"):
+                res = self._make_soup(url, html)
+        return res
+
+    def _get_soups(self, urls: List[str]) -> List[BeautifulSoup]:
+        """Return the BeautifulSoups for several pages on scholar.google.com,
+        fetched concurrently when a session pool is in use
+        """
+        soups = [self._cached_soup(url) for url in urls]
+        missing = [i for i, soup in enumerate(soups) if soup is None]
+        htmls = self._get_pages(['https://scholar.google.com{0}'.format(urls[i]) for i in missing])
+        with self._phase("parse"):
+            for i, html in zip(missing, htmls):
+                soups[i] = self._make_soup(urls[i], html)
+        return soups
+
+    def _concurrent_pages(self) -> int:
+        """Return how many pages ``_get_pages`` fetches at the same time"""
+        return len(self._session_pool) if self._session_pool is not None else 1
+
+    def _get_search_soup(self, url: str) -> Tuple[BeautifulSoup, Optional[str]]:
+        """Return the BeautifulSoup for a page of search results and the
+        template of its "add to library" links, if any
+        """
+        soup = self._get_soup(url)
+        return soup, _publib(soup)
+
+    def _cached_soup(self, url: str) -> Optional[BeautifulSoup]:
+        if self._soup_cache is None:
+            return None
+        return self._soup_cache.get(url)
+
+    def _make_soup(self, url: str, html: str) -> BeautifulSoup:
+        """Parse the html of a page on scholar.google.com and keep it in memory"""
         html = html.replace(u'\xa0', u' ')
-        res = BeautifulSoup(html, 'html.parser')
-        try:
-            self.publib = res.find('div', id='gs_res_glb').get('data-sva')
-        except Exception:
-            pass
+        res = make_soup(html, self._parser)
+        if self._soup_cache is not None:
+            self._soup_cache.set(url, res, len(html))
         return res
 
     def search_authors(self, url: str)->Author:
@@ -278,9 +836,10 @@ class Navigator(object, metaclass=Singleton):
         :returns: a publication object
         :rtype: {Publication}
         """
-        soup = self._get_soup(url)
+        soup, publib = self._get_search_soup(url)
         publication_parser = PublicationParser(self)
-        pub = publication_parser.get_publication(soup.find_all('div', 'gs_or')[0], PublicationSource.PUBLICATION_SEARCH_SNIPPET)
+        pub = publication_parser.get_publication(soup.find_all('div', 'gs_or')[0], PublicationSource.PUBLICATION_SEARCH_SNIPPET,
+                                                 publib=publib)
         if filled:
             pub = publication_parser.fill(pub)
         return pub
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Tuple
+import functools
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    LXML = True
+except ImportError:
+    LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# The parser backends, from the slowest to the fastest
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+# Attributes holding a list of tokens, as returned by BeautifulSoup
+_MULTI_VALUED = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+
+def check_parser(parser: str):
+    """Raise an exception if the backend ``parser`` is unknown or not installed"""
+    if parser not in PARSERS:
+        raise ValueError("parser must be one of {0}".format(", ".join(PARSERS)))
+    if parser == "lxml" and not LXML:
+        raise RuntimeError("The lxml parser is not supported with basic version of the package. "
+                           "Please install scholarly[lxml] to use it.")
+    if parser == "selectolax" and LexborHTMLParser is None:
+        raise RuntimeError("The selectolax parser is not supported with basic version of the package. "
+                           "Please install scholarly[selectolax] to use it.")
+
+
+def make_soup(html: str, parser: str = "html.parser"):
+    """Parse ``html`` with the backend ``parser``
+
+    :returns: a BeautifulSoup, or a SelectolaxTag with the same interface for
+              the uses of the parsers of scholarly
+    """
+    if parser == "selectolax":
+        return SelectolaxTag(LexborHTMLParser(html).root)
+    return BeautifulSoup(html, parser)
+
+
+def _value(key: str, value: Optional[str]):
+    """Return an attribute value as BeautifulSoup does"""
+    value = value or ""
+    return value.split() if key in _MULTI_VALUED else value
+
+
+def _quote(value: str) -> str:
+    return '"{0}"'.format(str(value).replace("\\", "\\\\").replace('"', '\\"'))
+
+
+@functools.lru_cache(maxsize=256)
+def _selector(name: str = None, class_: str = None, attrs: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """Return the CSS selector of the BeautifulSoup filter ``name``, ``class_`` and ``attrs``
+
+    As with BeautifulSoup, a single class matches any element having it, and
+    several classes match the exact value of the class attribute.
+    """
+    selector = name or "*"
+    if class_:
+        selector += "[class{0}={1}]".format("" if " " in class_ else "~", _quote(class_))
+    for key, value in attrs:
+        selector += "[{0}]".format(key) if value is True else "[{0}={1}]".format(key, _quote(value))
+    return selector
+
+
+class SelectolaxTag(object):
+    """A node parsed by selectolax, seen through the interface of a
+    BeautifulSoup tag that the parsers of scholarly use: ``find`` and
+    ``find_all`` (also by calling the tag) by name, class and attributes,
+    ``text``, ``string``, ``attrs``, ``get``, item access, ``parent``,
+    ``name``, ``decode_contents`` and the first descendant with a name, as
+    in ``tag.a``.
+    """
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def __repr__(self):
+        return self._node.html
+
+    def __bool__(self):
+        return True
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.find(name)
+
+    def __getitem__(self, key: str):
+        return _value(key, self._node.attributes[key])
+
+    def __call__(self, name: str = None, class_: str = None, **attrs) -> List['SelectolaxTag']:
+        return self.find_all(name, class_, **attrs)
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    @property
+    def attrs(self) -> Dict[str, object]:
+        return {key: _value(key, value) for key, value in self._node.attributes.items()}
+
+    def get(self, key: str, default=None):
+        attributes = self._node.attributes
+        return _value(key, attributes[key]) if key in attributes else default
+
+    @property
+    def text(self) -> str:
+        return self._node.text(deep=True)
+
+    def get_text(self) -> str:
+        return self.text
+
+    def decode_contents(self) -> str:
+        """The html inside the tag, escaped like BeautifulSoup does"""
+        return self._node.inner_html.replace("&nbsp;", u"\xa0")
+
+    @property
+    def string(self) -> Optional[str]:
+        """The text of the tag if it has a single child, like BeautifulSoup"""
+        children = list(self._node.iter(include_text=True))
+        if len(children) != 1:
+            return None
+        if children[0].is_text_node:
+            return children[0].text_content
+        return SelectolaxTag(children[0]).string
+
+    @property
+    def parent(self) -> Optional['SelectolaxTag']:
+        parent = self._node.parent
+        if parent is None or not parent.is_element_node:
+            return None
+        return SelectolaxTag(parent)
+
+    def find(self, name: str = None, class_: str = None, **attrs) -> Optional['SelectolaxTag']:
+        """Return the first descendant with ``name``, ``class_`` and ``attrs``, or None"""
+        selector = _selector(name, class_, tuple(attrs.items()))
+        node = self._node.css_first(selector)
+        if node is not None and node.mem_id == self._node.mem_id:
+            # Unlike BeautifulSoup, selectolax matches the node itself first
+            node = next(iter(self._node.css(selector)[1:]), None)
+        return SelectolaxTag(node) if node is not None else None
+
+    def find_all(self, name: str = None, class_: str = None, **attrs) -> List['SelectolaxTag']:
+        """Return the descendants with ``name``, ``class_`` and ``attrs``"""
+        return [SelectolaxTag(node) for node in self._node.css(_selector(name, class_, tuple(attrs.items())))
+                if node.mem_id != self._node.mem_id]
@@ -0,0 +1,94 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+import threading
+import time
+
+# The phases entered by the current thread or asyncio task, innermost last.
+# Every frame is [name, time spent in nested phases].
+_STACK = ContextVar("scholarly_profiler_stack", default=())
+
+
+class Profiler(object):
+    """Records the time spent in the phases of scholarly's operations.
+
+    Phases nest, e.g., ``fill_author`` > ``publications`` > ``fetch``. The
+    time of a phase is split into its self time and the time of the phases
+    nested in it, so that network (``fetch``), html parsing (``parse``) and
+    field extraction (``extract`` and the ``fill_*`` sections) add up to the
+    wall-clock time of every operation.
+
+    Concurrent phases, e.g., requests sent from a session pool, are all
+    counted, so their sum may exceed the wall-clock time.
+    """
+
+    def __init__(self):
+        self.self_time = Counter()
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Attribute the time spent in the block to the phase ``name``"""
+        frame = [name, 0.0]
+        token = _STACK.set(_STACK.get() + (frame,))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack = _STACK.get()
+            try:
+                _STACK.reset(token)
+            except ValueError:  # Left from another context, e.g., a generator
+                _STACK.set(stack[:-1])
+            path = tuple(f[0] for f in stack)
+            with self._lock:
+                self.self_time[path] += max(0.0, elapsed - frame[1])
+                self.calls[path] += 1
+                if len(stack) > 1:
+                    stack[-2][1] += elapsed
+
+    def report(self) -> Dict[str, dict]:
+        """Return the time spent per operation and phase.
+
+        :returns: ``{operation: {"calls": n, "total": seconds, "phases": {phase: {"calls": n, "self": seconds}}}}``,
+                  where an operation is an outermost phase.
+        :rtype: {dict}
+        """
+        res = {}
+        with self._lock:
+            for path, seconds in self.self_time.items():
+                operation = res.setdefault(path[0], {"calls": 0, "total": 0.0, "phases": {}})
+                operation["total"] += seconds
+                if len(path) == 1:
+                    operation["calls"] += self.calls[path]
+                phase = operation["phases"].setdefault(path[-1], {"calls": 0, "self": 0.0})
+                phase["calls"] += self.calls[path]
+                phase["self"] += seconds
+        return res
+
+    def format_report(self) -> str:
+        """Return the report as a table, with the most expensive phases first"""
+        lines = []
+        for name, operation in sorted(self.report().items(), key=lambda item: -item[1]["total"]):
+            lines.append("{0}: {1} call(s), {2:.3f} s".format(name, operation["calls"], operation["total"]))
+            for phase, stats in sorted(operation["phases"].items(), key=lambda item: -item[1]["self"]):
+                share = stats["self"] / operation["total"] if operation["total"] else 0.0
+                lines.append("    {0:<24} {1:>8} calls {2:10.3f} s {3:7.1%}".format(
+                    phase, stats["calls"], stats["self"], share))
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """Return the self time of every stack of phases in the collapsed
+        format of flame graph tools (``a;b;c microseconds`` per line)
+        """
+        with self._lock:
+            return "".join("{0} {1}\n".format(";".join(path), int(round(seconds * 1e6)))
+                           for path, seconds in sorted(self.self_time.items()))
+
+    def write_collapsed(self, path: str):
+        """Write ``collapsed()`` to ``path``, e.g., for ``flamegraph.pl`` or speedscope"""
+        with open(path, "w") as f:
+            f.write(self.collapsed())
@@ -1,4 +1,6 @@
-from typing import Callable
+from typing import Callable, List
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from fp.fp import FreeProxy
 import random
 import logging
@@ -6,13 +8,12 @@ import time
 import requests
 import httpx
 import tempfile
+import threading
 import urllib3
 
-from selenium import webdriver
 from selenium.webdriver.support.wait import WebDriverWait, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import WebDriverException, UnexpectedAlertPresentException
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from urllib.parse import urlparse
 from contextlib import contextmanager
 from deprecated import deprecated
@@ -30,7 +31,21 @@ except Exception:
     FAKE_USERAGENT = False
     DEFAULT_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.149 Safari/537.36'
 
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
 from .data_types import ProxyMode
+from ._rate_limiter import RateLimiter
+from ._proxy_health import DEFAULT_TRACKER, ProxyHealthTracker
+from ._proxy_store import ProxyStore
+from ._cookie_store import CookieStore
+from ._webdriver_pool import DEFAULT_POOL, WebDriverPool
+from ._tor_pool import TorPool
+from ._cassette import AsyncReplayTransport, Cassette, ReplayTransport
+from ._mock_server import AsyncMockServerTransport, MockServerTransport
 
 
 class DOSException(Exception):
@@ -42,6 +57,16 @@ class MaxTriesExceededException(Exception):
 
 
 class ProxyGenerator(object):
+    # Number of user agents, i.e., fingerprints, a generator rotates through
+    _FINGERPRINTS = 3
+    # Number of random user agents drawn for a fingerprint before settling for fewer fingerprints
+    _USER_AGENT_DRAWS = 10
+    # Number of clients kept with their connection pools, per generator
+    _MAX_CLIENTS = 8
+    # Keeping fewer idle connections than the maximum would close connections
+    # while requests are queued for one, and reopen them right away.
+    _LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60)
+
     def __init__(self):
         # setting up logger
         self.logger = logging.getLogger('scholarly')
@@ -49,6 +74,18 @@ class ProxyGenerator(object):
         self._proxy_gen = None
         # If we use a proxy or Tor, we set this to True
         self._proxy_works = False
+        # User overrides of the default rate limits of the proxy mode
+        self._rate_limits = {}
+        # Recorded responses served instead of the network, if any
+        self._cassette = None
+        # Url of a local mock Scholar server receiving all requests, if any
+        self._mock_server_url = None
+        # Health scores and circuit breakers of the proxies, shared by default
+        self._health = DEFAULT_TRACKER
+        # Known-good and dirty free proxies persisted across runs, if any
+        self._proxy_store = None
+        # Cookies of solved captchas persisted per proxy, if any
+        self._cookie_store = None
         self.proxy_mode = None
         self._proxies = {}
         # If we have a Tor server that we can refresh, we set this to True
@@ -56,12 +93,31 @@ class ProxyGenerator(object):
         self._can_refresh_tor = False
         self._tor_control_port = None
         self._tor_password = None
+        # The pool of Tor instances we lease one instance from, if any
+        self._tor_pool = None
+        self._tor_instance = None
         self._session = None
+        # Clients with warm connections, keyed by (proxy, fingerprint)
+        self._clients = OrderedDict()
+        self._client_key = None
+        # Requests in flight per client, and the evicted clients closed after their last one
+        self._in_use = Counter()
+        self._retired = set()
+        self._user_agents = []
+        self._fingerprint = -1
+        # Whether requests are multiplexed over HTTP/2 connections
+        self._http2 = False
+        # The browser leased from the pool to solve a captcha, if any
+        self._webdriver_pool = DEFAULT_POOL
         self._webdriver = None
         self._TIMEOUT = 5
+        # Guards the session and the proxy against concurrent switches
+        self._lock = threading.RLock()
         self._new_session()
 
     def __del__(self):
+        if self._tor_instance is not None:
+            self._tor_pool.release(self._tor_instance)
         if self._tor_process:
             self._tor_process.kill()
             self._tor_process.wait()
@@ -70,6 +126,213 @@ class ProxyGenerator(object):
     def get_session(self):
         return self._session
 
+    @property
+    def proxy_mode(self):
+        return self._proxy_mode
+
+    @proxy_mode.setter
+    def proxy_mode(self, proxy_mode):
+        self._proxy_mode = proxy_mode
+        self._reset_rate_limiter()
+
+    def set_rate_limit(self, rate: float = None, burst: int = None, jitter: float = None,
+                       adaptive: bool = None):
+        """Override the default rate limit of the proxy mode.
+
+        Requests through this proxy are paced by a token bucket. By default,
+        direct connections, free proxies and Tor send about one request every
+        1-2 seconds, while ScraperAPI and Luminati, which rate-limit on their
+        side, are allowed several requests per second. The rate adapts
+        automatically: it drops when 403s or captchas show up and recovers
+        while responses stay clean.
+
+        :param rate: requests per second
+        :type rate: float, optional
+        :param burst: number of requests that can be sent without waiting
+        :type burst: int, optional
+        :param jitter: maximum random delay (in seconds) added to every request
+        :type jitter: float, optional
+        :param adaptive: whether the rate adapts to blocks, defaults to True
+        :type adaptive: bool, optional
+
+        :Example::
+            >>> pg = ProxyGenerator()
+            >>> pg.ScraperAPI(API_KEY)
+            >>> pg.set_rate_limit(rate=20, burst=20)
+        """
+        overrides = {"rate": rate, "burst": burst, "jitter": jitter, "adaptive": adaptive}
+        for key, value in overrides.items():
+            if value is not None:
+                self._rate_limits[key] = value
+        if rate is not None:
+            # Let the adaptive rate move around the requested one.
+            self._rate_limits.setdefault("min_rate", rate / 60)
+            self._rate_limits["max_rate"] = max(rate, self._rate_limits.get("max_rate", rate))
+        self._reset_rate_limiter()
+
+    def _reset_rate_limiter(self):
+        if self._cassette is not None and self._cassette.timing == "fast":
+            # Replayed responses are served as fast as possible
+            self._rate_limiter = RateLimiter()
+            return
+        self._rate_limiter = RateLimiter.for_mode(self._proxy_mode, **self._rate_limits)
+
+    def set_http2(self, enabled: bool = True):
+        """Send the requests over HTTP/2, so that concurrent requests, e.g.,
+        from ``scholarly.aio``, share a single multiplexed connection per
+        proxy endpoint instead of opening one connection each.
+
+        Requires the h2 package (``pip install scholarly[http2]``). Servers
+        and proxies that do not support HTTP/2 are still reached over HTTP/1.1,
+        except for the mock server, which must be started with ``http2=True``.
+
+        :param enabled: whether to use HTTP/2
+        :type enabled: bool
+
+        :Example::
+            >>> pg = ProxyGenerator()
+            >>> success = pg.ScraperAPI(API_KEY)
+            >>> pg.set_http2()
+            >>> aio.use_proxy(pg)
+        """
+        if enabled and not HTTP2:
+            raise RuntimeError("HTTP/2 is not supported with basic version of the package. "
+                               "Please install scholarly[http2] to use this method.")
+        self._http2 = enabled
+        self._new_session()
+
+    def set_health_tracker(self, tracker: ProxyHealthTracker):
+        """Track the health of the proxies of this generator with ``tracker``
+        instead of the tracker shared by all proxy generators.
+
+        :param tracker: the health tracker, e.g., with other quarantine times
+        :type tracker: ProxyHealthTracker
+
+        :Example::
+            >>> pg = ProxyGenerator()
+            >>> pg.set_health_tracker(ProxyHealthTracker(failure_threshold=2, base_quarantine=300))
+        """
+        self._health = tracker
+
+    def set_webdriver_pool(self, pool: WebDriverPool):
+        """Solve the captchas of this generator in the browsers of ``pool``
+        instead of the pool shared by all proxy generators.
+
+        :param pool: the pool of browsers, e.g., with more browsers or a custom factory
+        :type pool: WebDriverPool
+
+        :Example::
+            >>> pool = WebDriverPool(size=4, max_uses=50)
+            >>> pool.warm(n=2)
+            >>> pg = ProxyGenerator()
+            >>> pg.set_webdriver_pool(pool)
+        """
+        self._release_webdriver()
+        self._webdriver_pool = pool
+
+    def set_proxy_store(self, path: str = None, good_ttl: float = 24*60*60, dirty_ttl: float = 6*60*60):
+        """Persist the free proxies known to work, and those known not to,
+        in a SQLite database at ``path``, so that ``FreeProxies`` tries the
+        fastest recent good proxies first and skips the recent dirty ones in
+        the next runs.
+
+        :param path: location of the database. Pass None to stop persisting proxies.
+        :type path: str
+        :param good_ttl: seconds after which a good proxy is not trusted anymore
+        :type good_ttl: float
+        :param dirty_ttl: seconds after which a dirty proxy may be tried again
+        :type dirty_ttl: float
+
+        :Example::
+            >>> pg = ProxyGenerator()
+            >>> pg.set_proxy_store("proxies.db")
+            >>> success = pg.FreeProxies()
+        """
+        if self._proxy_store is not None:
+            self._proxy_store.close()
+            self._proxy_store = None
+        if path is not None:
+            self._proxy_store = ProxyStore(path, good_ttl=good_ttl, dirty_ttl=dirty_ttl)
+
+    def set_cookie_store(self, path: str = None, ttl: float = 24*60*60):
+        """Persist the cookies of solved captchas per proxy in a SQLite
+        database at ``path``, so that new sessions through the same proxy,
+        also in the next runs, start with them instead of hitting the captcha
+        again. Cookies are dropped once a captcha shows up despite them.
+
+        :param path: location of the database. Pass None to stop persisting cookies.
+        :type path: str
+        :param ttl: seconds after which cookies without an expiry date are not used anymore
+        :type ttl: float
+
+        :Example::
+            >>> pg = ProxyGenerator()
+            >>> pg.set_cookie_store("cookies.db")
+            >>> success = pg.Tor_Internal(tor_cmd = "tor")
+        """
+        if self._cookie_store is not None:
+            self._cookie_store.close()
+            self._cookie_store = None
+        if path is not None:
+            self._cookie_store = CookieStore(path, ttl=ttl)
+        self._restore_cookies(self._session.cookies)
+
+    def proxy_health(self) -> dict:
+        """Return the health of the proxies seen by this generator
+
+        :returns: ``{proxy: {"score", "success_rate", "latency", "captcha_rate",
+                  "forbidden_rate", "samples", "trips", "quarantined_for"}}``,
+                  with the proxies as ``scheme://host:port``, without credentials
+        :rtype: {dict}
+        """
+        return self._health.snapshot()
+
+    def _current_proxy(self):
+        """Return the proxy of the session, or None for direct connections"""
+        if not self._proxy_works or self._cassette is not None or self._mock_server_url is not None:
+            return None
+        return self._proxies.get('http://')
+
+    def _report(self, outcome: str, latency: float = None):
+        """Update the health of the current proxy with the outcome of a request"""
+        if self._cookie_store is not None and outcome == "captcha":
+            self._cookie_store.forget(self._cookie_key())
+        proxy = self._current_proxy()
+        if proxy is not None:
+            self._health.record(proxy, outcome, latency)
+            if self._proxy_store is not None and outcome == "success":
+                self._proxy_store.mark_good(proxy, latency)
+
+    def _cookie_key(self) -> str:
+        """The identity that cookies are bound to, i.e., the proxy or direct connections"""
+        return self._current_proxy() or ""
+
+    def _restore_cookies(self, cookies: httpx.Cookies):
+        """Set the persisted cookies of the current proxy, if any, in ``cookies``"""
+        if self._cookie_store is None:
+            return
+        for cookie in self._cookie_store.load(self._cookie_key()):
+            cookies.set(**cookie)
+
+    def _proxy_is_healthy(self) -> bool:
+        """Whether a timeout is worth retrying with the current proxy, i.e.,
+        its circuit breaker is closed and it has served requests before.
+        """
+        proxy = self._current_proxy()
+        return proxy is None or (self._health.is_available(proxy) and self._health.has_succeeded(proxy))
+
+    def _health_score(self) -> float:
+        proxy = self._current_proxy()
+        return 1.0 if proxy is None else self._health.score(proxy)
+
+    def _replay(self, cassette: Cassette = None):
+        """Serve the requests of this proxy generator from ``cassette``
+        instead of the network. Pass None to go back to the network.
+        """
+        self._cassette = cassette
+        self._reset_rate_limiter()
+        self._new_session()
+
     def Luminati(self, usr, passwd, proxy_port):
         """ Setups a luminati proxy without refreshing capabilities.
 
@@ -128,6 +391,32 @@ class ProxyGenerator(object):
             self.logger.warning("Unable to setup the proxy: http=%s https=%s. Reason unknown." , http, https)
         return proxy_works
 
+    def MockServer(self, url: str):
+        """
+        Send all requests to a local mock Scholar server instead of Google Scholar
+
+        The mock server (see ``scholarly._mock_server.MockScholarServer``)
+        imitates the pages of Google Scholar, including captchas and access
+        denied errors, to benchmark scholarly without the network. Requests
+        are not rate limited unless ``set_rate_limit`` is called.
+
+        :param url: address of the mock server, e.g. ``http://127.0.0.1:8000``
+        :type url: string
+        :returns: whether or not the mock server was set up successfully
+        :rtype: {bool}
+
+        :Example::
+
+            >>> server = MockScholarServer().start()
+            >>> pg = ProxyGenerator()
+            >>> success = pg.MockServer(server.url)
+        """
+        self._mock_server_url = url
+        self.proxy_mode = ProxyMode.MOCK_SERVER
+        self._new_session()
+        self.logger.info("Sending all requests to the mock server at %s", url)
+        return True
+
     def _check_proxy(self, proxies) -> bool:
         """Checks if a proxy is working.
         :param proxies: A dictionary {'http': url1, 'https': url1}
@@ -178,7 +467,7 @@ class ProxyGenerator(object):
             self.logger.info(err)
             return (False, None)
 
-    def _use_proxy(self, http: str, https: str = None) -> bool:
+    def _use_proxy(self, http: str, https: str = None, validated: bool = False) -> bool:
         """Allows user to set their own proxy for the connection session.
         Sets the proxy if it works.
 
@@ -186,14 +475,17 @@ class ProxyGenerator(object):
         :type http: str
         :param https: the https proxy (default to the same as http)
         :type https: str
+        :param validated: whether the proxy was just checked, e.g., by the free proxy coroutine
+        :type validated: bool
         :returns: whether or not the proxy was set up successfully
         :rtype: {bool}
         """
-        if http[:4] != "http":
+        # Keep the scheme of e.g. socks5:// proxies
+        if http[:4] != "http" and "://" not in http:
             http = "http://" + http
         if https is None:
             https = http
-        elif https[:5] != "https":
+        elif https[:5] != "https" and "://" not in https:
             https = "https://" + https
 
         proxies = {'http://': http, 'https://': https}
@@ -206,11 +498,14 @@ class ProxyGenerator(object):
                 self._proxy_works = r["requestCount"] < int(r["requestLimit"])
                 self.logger.info("Successful ScraperAPI requests %d / %d",
                                  r["requestCount"], r["requestLimit"])
+        elif validated:
+            self._proxy_works = True
         else:
             self._proxy_works = self._check_proxy(proxies)
 
         if self._proxy_works:
             self._proxies = proxies
+            self._reset_rate_limiter()
             self._new_session(proxies=proxies)
 
         return self._proxy_works
@@ -320,6 +615,45 @@ class ProxyGenerator(object):
         self.proxy_mode = ProxyMode.TOR_INTERNAL
         return self.Tor_External(tor_sock_port, tor_control_port, tor_password=None)
 
+    def TorPool(self, pool: TorPool):
+        """
+        Use the Tor instances of ``pool``, one at a time. When a new identity
+        is needed, the session switches right away to another idle instance
+        whose circuits are ready, while the previous instance is given a new
+        identity in the background.
+
+        Several proxy generators can share the pool, e.g., the members of a
+        session pool, so that concurrent requests go through different circuits.
+
+        :param pool: the pool of Tor instances
+        :type pool: TorPool
+        :returns: whether or not the proxy was set up successfully
+        :rtype: {bool}
+
+        :Example::
+            >>> pool = TorPool.launch(4, tor_cmd="tor")
+            >>> scholarly.use_session_pool(pool.proxy_generators())
+        """
+        if stem is None:
+            raise RuntimeError("Tor methods are not supported with basic version of the package. "
+                               "Please install scholarly[tor] to use this method.")
+        # Setting requests timeout to be reasonably long
+        # to accommodate slowness of the Tor network
+        self._TIMEOUT = 10
+        self._tor_pool = pool
+        self.proxy_mode = ProxyMode.TOR_POOL
+        return self._next_tor_instance()
+
+    def _next_tor_instance(self, refresh: bool = False) -> bool:
+        """Switch to another instance of the Tor pool, giving back the current
+        one with a new identity if ``refresh`` is True
+        """
+        if self._tor_instance is not None:
+            self._tor_pool.release(self._tor_instance, refresh=refresh)
+        self._tor_instance = self._tor_pool.acquire()
+        # The instances of the pool are running, there is no need to check them
+        return self._use_proxy(self._tor_instance.proxy, validated=True)
+
     def _has_captcha(self, got_id, got_class) -> bool:
         _CAPTCHA_IDS = [
             "gs_captcha_ccl", # the normal captcha div
@@ -345,66 +679,27 @@ class ProxyGenerator(object):
         )
 
     def _get_webdriver(self):
-        if self._webdriver:
-            try:
-                _ = self._webdriver.current_url
-                return self._webdriver
-            except Exception as e:
-                self.logger.debug(e)
-
-        try:
-            return self._get_firefox_webdriver()
-        except Exception as err:
-            self.logger.debug("Cannot open Firefox/Geckodriver: %s", err)
+        if self._webdriver is None:
             try:
-                return self._get_chrome_webdriver()
+                self._webdriver = self._webdriver_pool.acquire(self._current_proxy())
             except Exception as err:
-                self.logger.debug("Cannot open Chrome: %s", err)
-                self.logger.info("Neither Chrome nor Firefox/Geckodriver found in PATH")
-
-    def _get_chrome_webdriver(self):
-        if self._proxy_works:
-            webdriver.DesiredCapabilities.CHROME['proxy'] = {
-                "httpProxy": self._proxies['http'],
-                "sslProxy": self._proxies['https'],
-                "proxyType": "MANUAL"
-            }
-
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        self._webdriver = webdriver.Chrome('chromedriver', options=options)
-        self._webdriver.get("https://scholar.google.com")  # Need to pre-load to set cookies later
-
-        return self._webdriver
-
-    def _get_firefox_webdriver(self):
-        if self._proxy_works:
-            # Redirect webdriver through proxy
-            webdriver.DesiredCapabilities.FIREFOX['proxy'] = {
-                "httpProxy": self._proxies['http'],
-                "sslProxy": self._proxies['https'],
-                "proxyType": "MANUAL",
-            }
-
-        options = FirefoxOptions()
-        options.add_argument('--headless')
-        self._webdriver = webdriver.Firefox(options=options)
-        self._webdriver.get("https://scholar.google.com")  # Need to pre-load to set cookies later
-
-        # It might make sense to (pre)set cookies as well, e.g., to set a GSP ID.
-        # However, a limitation of webdriver makes it impossible to set cookies for
-        # domains other than the current active one, cf. https://github.com/w3c/webdriver/issues/1238
-        # Therefore setting cookies in the session instance for other domains than the on set above
-        # (e.g., via self._session.cookies.set) will create problems when transferring them to the
-        # webdriver when handling captchas.
-
+                self.logger.info(err)
         return self._webdriver
 
     def _handle_captcha2(self, url):
+        try:
+            return self._solve_captcha(url)
+        except WebDriverException:
+            self._release_webdriver(broken=True)
+            raise
+        finally:
+            self._release_webdriver()
+
+    def _solve_captcha(self, url):
         cur_host = urlparse(self._get_webdriver().current_url).hostname
         for cookie in self._session.cookies:
             # Only set cookies matching the current domain, cf. https://github.com/w3c/webdriver/issues/1238
-            if cur_host is cookie.domain.lstrip('.'):
+            if cur_host == cookie.domain.lstrip('.'):
                 self._get_webdriver().add_cookie({
                     'name': cookie.name,
                     'value': cookie.value,
@@ -442,7 +737,10 @@ class ProxyGenerator(object):
             raise TimeoutException(f"Could not solve captcha in time (within {timeout} s).")
         self.logger.info(f"Solved captcha in less than {cur} seconds.")
 
-        for cookie in self._get_webdriver().get_cookies():
+        cookies = self._get_webdriver().get_cookies()
+        if self._cookie_store is not None:
+            self._cookie_store.save(self._cookie_key(), cookies)
+        for cookie in cookies:
             cookie.pop("httpOnly", None)
             cookie.pop("expiry", None)
             cookie.pop("sameSite", None)
@@ -450,84 +748,262 @@ class ProxyGenerator(object):
 
         return self._session
 
-    def _new_session(self, **kwargs):
-        init_kwargs = {"follow_redirects": True}
-        init_kwargs.update(kwargs)
-        proxies = {}
-        if self._session:
-            proxies = self._proxies
-            self._close_session()
-        # self._session = httpx.Client()
-        self.got_403 = False
+    def _new_session(self, asynchronous: bool = False, old_session: httpx.Client = None, **kwargs):
+        """Switch to a session with a fresh identity, i.e., another user agent
+        and no cookies, except those persisted for the proxy with
+        ``set_cookie_store``.
+
+        The clients of the synchronous sessions are cached per proxy and user
+        agent, with their pools of keep-alive connections, so that going back
+        to a proxy or a user agent used before does not cost new TCP and TLS
+        handshakes.
+
+        :param asynchronous: return an ``httpx.AsyncClient`` instead of
+                             replacing the synchronous session. The caller owns
+                             the returned client and must ``aclose`` it.
+        :type asynchronous: bool
+        :param old_session: the session that a request wants to leave. If
+                            another thread switched away from it already, the
+                            current session is returned as is.
+        :type old_session: httpx.Client
+        """
+        with self._lock:
+            if old_session is not None and old_session is not self._session:
+                return self._session
+            init_kwargs = {"follow_redirects": True, "limits": self._LIMITS, "http2": self._http2}
+            init_kwargs.update(kwargs)
+            proxies = {}
+            if asynchronous or self._session:
+                proxies = self._proxies
+            # The webdriver is not released here: a captcha may be solved with
+            # it on another thread, which gives it back once the captcha is solved.
+            self.got_403 = False
+
+            if self._cassette is not None:
+                transport = AsyncReplayTransport if asynchronous else ReplayTransport
+                init_kwargs["transport"] = transport(self._cassette)
+            elif self._mock_server_url is not None:
+                transport = AsyncMockServerTransport if asynchronous else MockServerTransport
+                # The mock server speaks HTTP/2 over cleartext, with prior knowledge only
+                versions = {"http1": False, "http2": True} if self._http2 else {}
+                init_kwargs["transport"] = transport(self._mock_server_url, limits=self._LIMITS, **versions)
+            elif self._proxy_works:
+                init_kwargs["proxies"] = proxies #.get("http", None)
+                self._proxies = proxies
+                if self.proxy_mode is ProxyMode.SCRAPERAPI:
+                    # SSL Certificate verification must be disabled for
+                    # ScraperAPI requests to work.
+                    # https://www.scraperapi.com/documentation/
+                    init_kwargs["verify"] = False
+
+            # The client is determined by where requests go and by the fingerprint
+            route = (id(self._cassette), self._mock_server_url, self._http2,
+                     tuple(sorted(init_kwargs.get("proxies", {}).items())), init_kwargs.get("verify", True))
+            user_agent = None
+            if not asynchronous and (self._client_key is None or route != self._client_key[0]):
+                # Going to another proxy, reuse its most recent client if any
+                user_agent = next((key[1] for key in reversed(self._clients) if key[0] == route), None)
+            if user_agent is None:
+                user_agent = self._next_user_agent()
+
+            _HEADERS = {
+                'accept-language': 'en-US,en',
+                'accept': 'text/html,application/xhtml+xml,application/xml',
+                'User-Agent': user_agent,
+            }
+            init_kwargs.update(headers=_HEADERS)
+            if asynchronous:
+                client = httpx.AsyncClient(**init_kwargs)
+                if "cookies" not in kwargs:
+                    self._restore_cookies(client.cookies)
+                return client
+
+            key = (route, user_agent)
+            if key in self._clients:
+                self._clients.move_to_end(key)
+                self._session = self._clients[key]
+                self._session.cookies.clear()
+                self._restore_cookies(self._session.cookies)
+            else:
+                self._session = self._clients[key] = httpx.Client(**init_kwargs)
+                self._restore_cookies(self._session.cookies)
+                while len(self._clients) > self._MAX_CLIENTS:
+                    _, client = self._clients.popitem(last=False)
+                    if self._in_use[client]:
+                        # Closed once the requests in flight with it are done
+                        self._retired.add(client)
+                    else:
+                        client.close()
+            self._client_key = key
+
+            return self._session
 
+    @contextmanager
+    def _using(self, client: httpx.Client):
+        """Keep ``client`` open while a request is sent with it, even if it is
+        evicted from the cached clients by another thread meanwhile.
+
+        :returns: ``client``, or the current session if ``client`` is closed
+        :rtype: {httpx.Client}
+        """
+        with self._lock:
+            if client.is_closed:
+                client = self._session
+            self._in_use[client] += 1
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._in_use[client] -= 1
+                if not self._in_use[client]:
+                    del self._in_use[client]
+                    if client in self._retired:
+                        self._retired.discard(client)
+                        client.close()
+
+    def _random_user_agent(self) -> str:
         if FAKE_USERAGENT:
             # Suppress the misleading traceback from UserAgent()
             with self._suppress_logger('fake_useragent'):
-                user_agent = UserAgent().random
-        else:
-            user_agent = DEFAULT_USER_AGENT
-
-        _HEADERS = {
-            'accept-language': 'en-US,en',
-            'accept': 'text/html,application/xhtml+xml,application/xml',
-            'User-Agent': user_agent,
-        }
-        # self._session.headers.update(_HEADERS)
-        init_kwargs.update(headers=_HEADERS)
+                return UserAgent().random
+        return DEFAULT_USER_AGENT
 
-        if self._proxy_works:
-            init_kwargs["proxies"] = proxies #.get("http", None)
-            self._proxies = proxies
-            if self.proxy_mode is ProxyMode.SCRAPERAPI:
-                # SSL Certificate verification must be disabled for
-                # ScraperAPI requests to work.
-                # https://www.scraperapi.com/documentation/
-                init_kwargs["verify"] = False
-        self._session = httpx.Client(**init_kwargs)
-        self._webdriver = None
-
-        return self._session
+    def _next_user_agent(self) -> str:
+        """Rotate through the distinct user agents of this generator, creating
+        them as needed. A user agent drawn twice is not a new fingerprint, it
+        would get the client and the connections of the first one.
+        """
+        if len(self._user_agents) < self._FINGERPRINTS:
+            for _ in range(self._USER_AGENT_DRAWS if FAKE_USERAGENT else 1):
+                user_agent = self._random_user_agent()
+                if user_agent not in self._user_agents:
+                    self._user_agents.append(user_agent)
+                    self._fingerprint = len(self._user_agents) - 1
+                    return user_agent
+        self._fingerprint = (self._fingerprint + 1) % len(self._user_agents)
+        return self._user_agents[self._fingerprint]
+
+    def _release_webdriver(self, broken: bool = False):
+        """Give the webdriver back to the pool, where it stays open for the next captcha"""
+        if self._webdriver is not None:
+            self._webdriver_pool.release(self._webdriver, broken=broken)
+            self._webdriver = None
 
     def _close_session(self):
-        if self._session:
-            self._session.close()
-        if self._webdriver:
-            try:
-                self._webdriver.quit()
-            except Exception as e:
-                self.logger.warning("Could not close webdriver cleanly: %s", e)
+        for client in list(self._clients.values()) + list(self._retired):
+            client.close()
+        self._clients.clear()
+        self._retired.clear()
+        self._client_key = None
+        self._release_webdriver()
 
-    def _fp_coroutine(self, timeout=1, wait_time=120):
+    @staticmethod
+    def _free_proxy_list(freeproxy) -> List[str]:
+        """Fetch the list of free proxies, whichever the version of free-proxy"""
+        try:
+            return freeproxy.get_proxy_list(repeat=False)  # free-proxy >= 1.1.0
+        except TypeError:
+            return freeproxy.get_proxy_list()  # free-proxy < 1.1.0
+
+    def _fp_coroutine(self, timeout=1, wait_time=120, fan_out=8, prefetch=2, max_age=300):
         """A coroutine to continuosly yield free proxies
 
-        It takes back the proxies that stopped working and marks it as dirty.
+        Up to ``fan_out`` candidates, the good proxies of the proxy store
+        first and then picked at random weighted by their health, are
+        validated concurrently and the first ones that work are yielded. Validation goes on in the background while a proxy is in use,
+        to keep ``prefetch`` working proxies, validated less than ``max_age``
+        seconds ago, ready for the next switch.
+
+        It takes back the proxies that stopped working and quarantines them,
+        so that they are tried again once their quarantine is over. Proxies
+        that fail the validation are marked as dirty.
         """
         freeproxy = FreeProxy(rand=False, timeout=timeout)
+        store = self._proxy_store
         if not hasattr(self, '_dirty_freeproxies'):
             self._dirty_freeproxies = set()
+        preferred = deque()
+        if store is not None:
+            self._dirty_freeproxies |= store.dirty()
+            preferred.extend(store.best())
+        all_proxies = list(preferred)
+        # The list of free proxies is only fetched once the stored ones are used up
+        fetched = False
+        if not all_proxies:
+            all_proxies = self._free_proxy_list(freeproxy)
+            fetched = True
+
+        executor = ThreadPoolExecutor(max_workers=fan_out, thread_name_prefix="scholarly-fp")
+        checking = {}  # validations in flight, future -> proxy
+        ready = deque()  # validated proxies, (proxy, time of the validation)
+        in_use = None
+
+        def check(proxy):
+            start = time.monotonic()
+            return self._check_proxy({'http://': proxy, 'https://': proxy}), time.monotonic() - start
+
+        def top_up():
+            busy = set(checking.values()) | {proxy for proxy, _ in ready} | {in_use}
+            while len(checking) < fan_out and len(ready) < prefetch:
+                proxy = None
+                while preferred and proxy is None:
+                    proxy = preferred.popleft()
+                    if proxy in self._dirty_freeproxies or proxy in busy or not self._health.is_available(proxy):
+                        proxy = None
+                if proxy is None:
+                    # At random rather than in the order of the list: the members of
+                    # a session pool get the same list, and would otherwise all
+                    # validate, and then share, the same few proxies.
+                    candidates = [p for p in all_proxies if p not in self._dirty_freeproxies and p not in busy]
+                    proxy = self._health.choose(candidates)
+                if proxy is None:
+                    return
+                busy.add(proxy)
+                checking[executor.submit(check, proxy)] = proxy
+
         try:
-            all_proxies = freeproxy.get_proxy_list(repeat=False)  # free-proxy >= 1.1.0
-        except TypeError:
-            all_proxies = freeproxy.get_proxy_list()  # free-proxy < 1.1.0
-        all_proxies.reverse()  # Try the older proxies first
-
-        t1 = time.time()
-        while (time.time()-t1 < wait_time):
-            proxy = all_proxies.pop()
-            if not all_proxies:
-                all_proxies = freeproxy.get_proxy_list()
-            if proxy in self._dirty_freeproxies:
-                continue
-            proxies = {'http://': proxy, 'https://': proxy}
-            proxy_works = self._check_proxy(proxies)
-            if proxy_works:
-                dirty_proxy = (yield proxy)
-                t1 = time.time()
-            else:
-                dirty_proxy = proxy
-            self._dirty_freeproxies.add(dirty_proxy)
+            t1 = time.time()
+            while (time.time()-t1 < wait_time):
+                for future in [f for f in checking if f.done()]:
+                    proxy = checking.pop(future)
+                    works, latency = future.result()
+                    if works:
+                        ready.append((proxy, time.time()))
+                        if store is not None:
+                            store.mark_good(proxy, latency)
+                    else:
+                        self._dirty_freeproxies.add(proxy)
+                        if store is not None:
+                            store.mark_dirty(proxy)
+                ready = deque((proxy, t) for proxy, t in ready
+                              if time.time() - t < max_age and self._health.is_available(proxy))
+                top_up()
+                if ready:
+                    in_use, _ = ready.popleft()
+                    top_up()  # Validate the next proxies while this one is used
+                    dirty_proxy = (yield in_use)
+                    t1 = time.time()
+                    if dirty_proxy is not None:
+                        self._health.trip(dirty_proxy)
+                        if store is not None:
+                            store.mark_dirty(dirty_proxy)
+                elif not fetched and len(checking) < fan_out:
+                    # The stored proxies are used up
+                    all_proxies = list(dict.fromkeys(all_proxies + self._free_proxy_list(freeproxy)))
+                    fetched = True
+                elif checking:
+                    wait(list(checking), timeout=max(0, wait_time - (time.time()-t1)),
+                         return_when=FIRST_COMPLETED)
+                else:
+                    # Every proxy is dirty or quarantined, wait for newer ones
+                    time.sleep(1)
+                    all_proxies = self._free_proxy_list(freeproxy)
+        finally:
+            for future in checking:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-    def FreeProxies(self, timeout=1, wait_time=120):
+    def FreeProxies(self, timeout=1, wait_time=120, fan_out=8, prefetch=2):
         """
         Sets up continuously rotating proxies from the free-proxy library
 
@@ -535,6 +1011,10 @@ class ProxyGenerator(object):
         :type timeout: float
         :param wait_time: Maximum time (in seconds) to wait until newer set of proxies become available at https://sslproxies.org/
         :type wait_time: float
+        :param fan_out: Number of proxies validated concurrently, optional
+        :type fan_out: int
+        :param prefetch: Number of validated proxies kept ready for the next proxy switch, optional
+        :type prefetch: int
         :returns: whether or not the proxy was set up successfully
         :rtype: {bool}
 
@@ -545,17 +1025,17 @@ class ProxyGenerator(object):
         self.proxy_mode = ProxyMode.FREE_PROXIES
         # FreeProxies is the only mode that is assigned regardless of setup successfully or not.
 
-        self._fp_gen = self._fp_coroutine(timeout=timeout, wait_time=wait_time)
+        self._fp_gen = self._fp_coroutine(timeout=timeout, wait_time=wait_time, fan_out=fan_out, prefetch=prefetch)
         self._proxy_gen = self._fp_gen.send
         proxy = self._proxy_gen(None)  # prime the generator
         self.logger.debug("Trying with proxy %s", proxy)
-        proxy_works = self._use_proxy(proxy)
+        proxy_works = self._use_proxy(proxy, validated=True)
         n_retries = 200
         n_tries = 0
 
         while (not proxy_works) and (n_tries < n_retries):
             self.logger.debug("Trying with proxy %s", proxy)
-            proxy_works = self._use_proxy(proxy)
+            proxy_works = self._use_proxy(proxy, validated=True)
             n_tries += 1
             if not proxy_works:
                 proxy = self._proxy_gen(proxy)
@@ -637,33 +1117,43 @@ class ProxyGenerator(object):
         return False
 
     def has_proxy(self) -> bool:
-        return self._proxy_gen or self._can_refresh_tor
+        return self._proxy_gen or self._can_refresh_tor or self._tor_pool is not None
 
     def _set_proxy_generator(self, gen: Callable[..., str]) -> bool:
         self._proxy_gen = gen
         return True
 
     def get_next_proxy(self, num_tries = None, old_timeout = 3, old_proxy=None):
-        new_timeout = old_timeout
-        if self._can_refresh_tor:
-            # Check if Tor is running and refresh it
-            self.logger.info("Refreshing Tor ID...")
-            self._refresh_tor_id(self._tor_control_port, self._tor_password)
-            time.sleep(5) # wait for the refresh to happen
-            new_timeout = self._TIMEOUT # Reset timeout to default
-        elif self._proxy_gen:
-            if (num_tries):
-                self.logger.info("Try #%d failed. Switching proxy.", num_tries)
-            # Try to get another proxy
-            new_proxy = self._proxy_gen(old_proxy)
-            while (not self._use_proxy(new_proxy)):
-                new_proxy = self._proxy_gen(new_proxy)
-            new_timeout = self._TIMEOUT # Reset timeout to default
-            self._new_session()
-        else:
-            self._new_session()
+        with self._lock:
+            new_timeout = old_timeout
+            if old_proxy is not None and old_proxy != self._current_proxy():
+                # Another request switched the proxy in the meantime
+                return self._session, self._TIMEOUT
+            if self._tor_pool is not None:
+                self.logger.info("Switching to another Tor instance...")
+                self._next_tor_instance(refresh=True)
+                new_timeout = self._TIMEOUT # Reset timeout to default
+            elif self._can_refresh_tor:
+                # Check if Tor is running and refresh it
+                self.logger.info("Refreshing Tor ID...")
+                self._refresh_tor_id(self._tor_control_port, self._tor_password)
+                time.sleep(5) # wait for the refresh to happen
+                new_timeout = self._TIMEOUT # Reset timeout to default
+            elif self._proxy_gen:
+                if (num_tries):
+                    self.logger.info("Try #%d failed. Switching proxy.", num_tries)
+                # Try to get another proxy
+                new_proxy = self._proxy_gen(old_proxy)
+                # The free proxies are validated before they are yielded
+                validated = self.proxy_mode is ProxyMode.FREE_PROXIES
+                while (not self._use_proxy(new_proxy, validated=validated)):
+                    new_proxy = self._proxy_gen(new_proxy)
+                new_timeout = self._TIMEOUT # Reset timeout to default
+                self._new_session()
+            else:
+                self._new_session()
 
-        return self._session, new_timeout
+            return self._session, new_timeout
 
     # A context manager to suppress the misleading traceback from UserAgent()
     # Based on https://thesmithfam.org/blog/2012/10/25/temporarily-suppress-console-output-in-python/
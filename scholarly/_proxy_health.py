@@ -0,0 +1,217 @@
+from typing import Callable, Dict, List, Optional
+from collections import Counter
+from urllib.parse import urlparse
+import functools
+import hashlib
+import random
+import threading
+import time
+
+# Outcomes of a request sent through a proxy
+OUTCOMES = ("success", "timeout", "error", "captcha", "forbidden")
+
+
+@functools.lru_cache(maxsize=1024)
+def redact_proxy(proxy: str) -> str:
+    """Return the identity of ``proxy`` without its credentials, i.e.,
+    ``scheme://host:port``, since the proxy urls of ScraperAPI and Luminati
+    contain an API key or a password.
+    """
+    parsed = urlparse(proxy if "//" in proxy else "//" + proxy)
+    address = parsed.netloc.rsplit("@", 1)[-1]
+    return "{0}://{1}".format(parsed.scheme, address) if parsed.scheme else address
+
+
+@functools.lru_cache(maxsize=1024)
+def _key(proxy: str) -> str:
+    """Return the key of ``proxy`` in a tracker, a hash of its whole url:
+    the users of ScraperAPI or Luminati share an address, not their health.
+    """
+    return hashlib.sha256(proxy.encode("utf-8")).hexdigest()
+
+
+class _Health(object):
+    """Rolling statistics of a single proxy"""
+
+    def __init__(self, prior: float, name: str):
+        self.name = name          # The proxy without its credentials
+        self.success = prior      # EWMA of successful requests
+        self.latency = None       # EWMA of the latency of successful requests
+        self.captcha = 0.0        # EWMA of captchas
+        self.forbidden = 0.0      # EWMA of 403s
+        self.samples = 0
+        self.succeeded = False
+        self.consecutive_failures = 0
+        self.trips = 0.0
+        self.last_trip = None
+        self.open_until = 0.0
+        self.probation = False
+
+
+class ProxyHealthTracker(object):
+    """Health scores and circuit breakers of proxies.
+
+    Every proxy has a score in [0, 1] built from exponentially weighted
+    moving averages of its success rate, latency, captcha rate and 403 rate.
+    After ``failure_threshold`` consecutive failures, or when its score drops
+    below ``min_score``, the circuit breaker of the proxy trips and the proxy
+    is quarantined. The quarantine doubles with every trip, from
+    ``base_quarantine`` up to ``max_quarantine`` seconds, while past trips are
+    forgotten with a half-life of ``half_life`` seconds. Once the quarantine
+    is over, a single failure trips the breaker again. Proxies are known by a
+    hash of their url, and shown by their address, their credentials are
+    never kept.
+
+    :param alpha: weight of the latest request in the moving averages
+    :type alpha: float
+    :param prior: score of a proxy that has not been used yet
+    :type prior: float
+    :param reference_latency: latency in seconds that halves the score
+    :type reference_latency: float
+    """
+
+    def __init__(self, alpha: float = 0.2, failure_threshold: int = 3, min_score: float = 0.1,
+                 min_samples: int = 5, base_quarantine: float = 30.0, max_quarantine: float = 3600.0,
+                 half_life: float = 900.0, reference_latency: float = 2.0, prior: float = 0.75,
+                 clock: Callable[[], float] = time.monotonic):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.min_score = min_score
+        self.min_samples = min_samples
+        self.base_quarantine = base_quarantine
+        self.max_quarantine = max_quarantine
+        self.half_life = half_life
+        self.reference_latency = reference_latency
+        self.prior = prior
+        self._clock = clock
+        self._proxies = {}
+        self._lock = threading.Lock()
+
+    def _get(self, proxy: str) -> _Health:
+        key = _key(proxy)
+        if key not in self._proxies:
+            self._proxies[key] = _Health(self.prior, redact_proxy(proxy))
+        return self._proxies[key]
+
+    def _ewma(self, average: float, value: float) -> float:
+        return (1 - self.alpha) * average + self.alpha * value
+
+    def _score(self, h: _Health) -> float:
+        score = h.success * (1 - h.captcha) * (1 - h.forbidden)
+        if h.latency is not None:
+            score *= self.reference_latency / (self.reference_latency + h.latency)
+        return score
+
+    def _trips(self, h: _Health, now: float) -> float:
+        if h.last_trip is None:
+            return 0.0
+        return h.trips * 0.5 ** ((now - h.last_trip) / self.half_life)
+
+    def _trip(self, h: _Health, now: float) -> float:
+        h.trips = self._trips(h, now) + 1
+        h.last_trip = now
+        quarantine = min(self.max_quarantine, self.base_quarantine * 2 ** (h.trips - 1))
+        h.open_until = now + quarantine
+        h.consecutive_failures = 0
+        h.probation = True
+        return quarantine
+
+    def record(self, proxy: str, outcome: str, latency: float = None):
+        """Update the health of ``proxy`` with the outcome of a request
+
+        :param outcome: one of ``OUTCOMES``
+        :type outcome: str
+        :param latency: the latency in seconds of a successful request
+        :type latency: float
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError("Unknown outcome {0!r}".format(outcome))
+        with self._lock:
+            h = self._get(proxy)
+            now = self._clock()
+            ok = outcome == "success"
+            h.samples += 1
+            h.success = self._ewma(h.success, ok)
+            h.captcha = self._ewma(h.captcha, outcome == "captcha")
+            h.forbidden = self._ewma(h.forbidden, outcome == "forbidden")
+            if ok:
+                if latency is not None:
+                    h.latency = latency if h.latency is None else self._ewma(h.latency, latency)
+                h.succeeded = True
+                h.consecutive_failures = 0
+                h.probation = False
+                return
+            h.consecutive_failures += 1
+            if (h.probation or h.consecutive_failures >= self.failure_threshold
+                    or (h.samples >= self.min_samples and self._score(h) < self.min_score)):
+                self._trip(h, now)
+
+    def trip(self, proxy: str) -> float:
+        """Quarantine ``proxy`` right away
+
+        :returns: the duration of the quarantine in seconds
+        :rtype: {float}
+        """
+        with self._lock:
+            return self._trip(self._get(proxy), self._clock())
+
+    def is_available(self, proxy: str) -> bool:
+        """Whether ``proxy`` is not quarantined"""
+        key = _key(proxy)
+        with self._lock:
+            return key not in self._proxies or self._clock() >= self._proxies[key].open_until
+
+    def has_succeeded(self, proxy: str) -> bool:
+        """Whether ``proxy`` ever served a request successfully"""
+        key = _key(proxy)
+        with self._lock:
+            return key in self._proxies and self._proxies[key].succeeded
+
+    def score(self, proxy: str) -> float:
+        """Return the health score of ``proxy``, 0 while it is quarantined"""
+        key = _key(proxy)
+        with self._lock:
+            if key not in self._proxies:
+                return self.prior
+            h = self._proxies[key]
+            return 0.0 if self._clock() < h.open_until else self._score(h)
+
+    def choose(self, proxies: List[str], rng: random.Random = random) -> Optional[str]:
+        """Pick one of the available ``proxies`` at random, weighted by health
+
+        :returns: the chosen proxy, or None if all of them are quarantined
+        :rtype: {str}
+        """
+        available = [p for p in proxies if self.is_available(p)]
+        if not available:
+            return None
+        weights = [max(self.score(p), 0.01) for p in available]
+        return rng.choices(available, weights=weights)[0]
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return the health of every proxy seen so far, by ``scheme://host:port``,
+        followed by the start of the hash of the url of the proxy when several
+        proxies share the address with other credentials
+        """
+        res = {}
+        with self._lock:
+            now = self._clock()
+            names = Counter(h.name for h in self._proxies.values())
+            for key, h in self._proxies.items():
+                name = h.name if names[h.name] == 1 else "{0}#{1}".format(h.name, key[:8])
+                res[name] = {
+                    "score": 0.0 if now < h.open_until else self._score(h),
+                    "success_rate": h.success,
+                    "latency": h.latency,
+                    "captcha_rate": h.captcha,
+                    "forbidden_rate": h.forbidden,
+                    "samples": h.samples,
+                    "trips": self._trips(h, now),
+                    "quarantined_for": max(0.0, h.open_until - now),
+                }
+        return res
+
+
+# Proxies are shared by all the proxy generators, e.g., the free proxies of
+# the members of a session pool, and so is their health.
+DEFAULT_TRACKER = ProxyHealthTracker()
@@ -0,0 +1,92 @@
+from typing import List, Set
+import sqlite3
+import threading
+import time
+
+_HOUR = 60*60
+
+
+class ProxyStore(object):
+    """Known-good and dirty proxies, persisted in a SQLite database so that
+    they carry over between runs.
+
+    Good proxies are remembered with the time they were last seen working and
+    their measured latency, dirty proxies with the time they last failed.
+    Either expires after its time-to-live.
+
+    :param path: location of the SQLite database
+    :type path: str
+    :param good_ttl: seconds after which a good proxy is not trusted anymore
+    :type good_ttl: float
+    :param dirty_ttl: seconds after which a dirty proxy may be tried again
+    :type dirty_ttl: float
+    :param min_interval: minimum seconds between two updates of the same good proxy
+    :type min_interval: float
+    """
+
+    def __init__(self, path: str, good_ttl: float = 24*_HOUR, dirty_ttl: float = 6*_HOUR,
+                 min_interval: float = 60):
+        self.path = path
+        self.good_ttl = good_ttl
+        self.dirty_ttl = dirty_ttl
+        self.min_interval = min_interval
+        self._written = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS proxies ("
+                               "proxy TEXT PRIMARY KEY, dirty INTEGER, last_seen REAL, latency REAL)")
+
+    def mark_good(self, proxy: str, latency: float = None):
+        """Remember that ``proxy`` works, with a latency of ``latency`` seconds
+
+        Updates of the same proxy less than ``min_interval`` seconds apart are
+        skipped, so that this can be called after every request.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._written.get(proxy, 0.0) < self.min_interval:
+                return
+            self._written[proxy] = now
+            with self._conn:
+                # Average the latency with the previous measurement, if any
+                self._conn.execute(
+                    "INSERT INTO proxies VALUES (?, 0, ?, ?) ON CONFLICT(proxy) DO UPDATE SET "
+                    "dirty = 0, last_seen = excluded.last_seen, "
+                    "latency = COALESCE((latency + excluded.latency) / 2, excluded.latency, latency)",
+                    (proxy, now, latency))
+
+    def mark_dirty(self, proxy: str):
+        """Remember that ``proxy`` does not work"""
+        with self._lock, self._conn:
+            self._written.pop(proxy, None)
+            self._conn.execute(
+                "INSERT INTO proxies VALUES (?, 1, ?, NULL) ON CONFLICT(proxy) DO UPDATE SET "
+                "dirty = 1, last_seen = excluded.last_seen", (proxy, time.time()))
+
+    def best(self, limit: int = None) -> List[str]:
+        """Return the good proxies that did not expire, fastest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT proxy FROM proxies WHERE dirty = 0 AND last_seen >= ? "
+                "ORDER BY latency IS NULL, latency, last_seen DESC LIMIT ?",
+                (time.time() - self.good_ttl, -1 if limit is None else limit)).fetchall()
+        return [proxy for proxy, in rows]
+
+    def dirty(self) -> Set[str]:
+        """Return the dirty proxies that did not expire"""
+        with self._lock:
+            rows = self._conn.execute("SELECT proxy FROM proxies WHERE dirty = 1 AND last_seen >= ?",
+                                      (time.time() - self.dirty_ttl,)).fetchall()
+        return {proxy for proxy, in rows}
+
+    def purge(self):
+        """Delete the expired proxies from the database"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM proxies WHERE (dirty = 0 AND last_seen < ?) "
+                               "OR (dirty = 1 AND last_seen < ?)", (now - self.good_ttl, now - self.dirty_ttl))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
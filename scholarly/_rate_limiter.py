@@ -0,0 +1,107 @@
+import asyncio
+import random
+import threading
+import time
+
+from .data_types import ProxyMode
+
+# Default limits per proxy mode, as keyword arguments of RateLimiter.
+# Connections that Google Scholar sees directly are paced to roughly one
+# request every 1-2 seconds. Premium services rate-limit on their side,
+# so they start fast and only slow down if blocks show up.
+_DIRECT = {"rate": 2/3, "burst": 1, "jitter": 0.5, "min_rate": 1/60, "max_rate": 1.0}
+_PREMIUM = {"rate": 5.0, "burst": 5, "jitter": 0.0, "min_rate": 0.2, "max_rate": 10.0}
+# A local mock server is benchmarked at full speed.
+_UNLIMITED = {"rate": None}
+RATE_LIMITS = {
+    None: _DIRECT,
+    ProxyMode.FREE_PROXIES: _DIRECT,
+    ProxyMode.SINGLEPROXY: _DIRECT,
+    ProxyMode.TOR_EXTERNAL: _DIRECT,
+    ProxyMode.TOR_INTERNAL: _DIRECT,
+    ProxyMode.TOR_POOL: _DIRECT,
+    ProxyMode.SCRAPERAPI: _PREMIUM,
+    ProxyMode.LUMINATI: _PREMIUM,
+    ProxyMode.MOCK_SERVER: _UNLIMITED,
+}
+
+
+class RateLimiter(object):
+    """A token bucket with jitter that adapts to how Google Scholar responds.
+
+    Tokens are refilled at ``rate`` per second up to ``burst``, and every
+    request takes one. When ``adaptive`` is set, the rate is halved on every
+    block (403, captcha) and raised by a tenth of ``max_rate`` after every
+    clean response (AIMD), always staying within ``[min_rate, max_rate]``.
+
+    :param rate: requests per second, or None for no limit
+    :type rate: float
+    :param burst: maximum number of requests sent without waiting
+    :type burst: int
+    :param jitter: maximum random delay in seconds added to every request
+    :type jitter: float
+    """
+
+    def __init__(self, rate: float = None, burst: int = 1, jitter: float = 0.0,
+                 min_rate: float = None, max_rate: float = None, adaptive: bool = True):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.min_rate = min_rate if min_rate is not None else rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.adaptive = adaptive and rate is not None
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_mode(cls, proxy_mode: ProxyMode, **overrides) -> 'RateLimiter':
+        """Create a limiter with the default limits of ``proxy_mode``"""
+        kwargs = dict(RATE_LIMITS.get(proxy_mode, _DIRECT))
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait before using it"""
+        delay = 0.0
+        with self._lock:
+            if self.rate is not None:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = -self._tokens / self.rate
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+    def acquire(self) -> float:
+        """Block until the next request may be sent.
+
+        :returns: the number of seconds spent waiting
+        :rtype: {float}
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until the next request may be sent."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def penalize(self):
+        """Slow down after Google Scholar blocked a request"""
+        if self.adaptive:
+            with self._lock:
+                self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        """Speed up again after a clean response"""
+        if self.adaptive:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
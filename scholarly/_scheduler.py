@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+import random
+import threading
+
+from .data_types import PageClass, ProxyMode
+
+# Default cost in dollars of one request per proxy mode. ScraperAPI bills
+# every request, about $49 per 100,000 on its entry plan, and Luminati bills
+# the traffic, about $15 per GB of roughly 100 kB pages. The others are free.
+COSTS = {
+    None: 0.0,
+    ProxyMode.FREE_PROXIES: 0.0,
+    ProxyMode.SINGLEPROXY: 0.0,
+    ProxyMode.TOR_EXTERNAL: 0.0,
+    ProxyMode.TOR_INTERNAL: 0.0,
+    ProxyMode.TOR_POOL: 0.0,
+    ProxyMode.SCRAPERAPI: 0.00049,
+    ProxyMode.LUMINATI: 0.0015,
+    ProxyMode.MOCK_SERVER: 0.0,
+}
+
+
+class BudgetExceededException(Exception):
+    """The budget of the job does not cover another paid request"""
+
+
+class _Estimate(object):
+    """Moving averages of the outcomes of one proxy on one page class"""
+
+    def __init__(self, success: float, latency: float):
+        self.success = success
+        self.latency = latency
+        self.samples = 0
+
+
+class ProxyScheduler(object):
+    """Chooses the proxy of every request from the measured success rate and
+    latency of each proxy, per page class, and from its cost per request.
+
+    The proxy with the lowest expected cost per page fetched, i.e., its cost
+    per request divided by its success rate, is chosen among those whose
+    expected time per page, i.e., latency divided by success rate, meets
+    ``latency_target``. If none does, the fastest one is chosen. Every
+    request sent is charged to the budget of the job, and proxies whose next
+    request the budget does not cover are not chosen anymore. A proxy that
+    is not chosen is still tried once in a while, with probability
+    ``explore``, so that its estimates follow it when it recovers.
+
+    :param costs: cost in dollars of one request per proxy mode, see ``COSTS``
+    :type costs: Dict[ProxyMode, float], optional
+    :param budget: dollars the job may spend, None for no limit
+    :type budget: float, optional
+    :param latency_target: seconds a page should take at most, None for no target
+    :type latency_target: float, optional
+    :param alpha: weight of the latest outcome in the moving averages
+    :type alpha: float
+    :param explore: probability of trying another proxy than the best one
+    :type explore: float
+    :param prior_success: success rate assumed for proxies not measured yet
+    :type prior_success: float
+    :param prior_latency: latency in seconds assumed for proxies not measured yet
+    :type prior_latency: float
+    :param rng: source of the random exploration, optional
+    :type rng: random.Random
+    """
+
+    def __init__(self, costs: Dict[ProxyMode, float] = None, budget: float = None,
+                 latency_target: float = None, alpha: float = 0.1, explore: float = 0.05,
+                 prior_success: float = 0.8, prior_latency: float = 2.0, rng: random.Random = None):
+        self.costs = dict(COSTS)
+        self.costs.update(costs or {})
+        self.budget = budget
+        self.latency_target = latency_target
+        self.alpha = alpha
+        self.explore = explore
+        self.prior_success = prior_success
+        self.prior_latency = prior_latency
+        self.spent = 0.0
+        self._rng = rng or random.Random()
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def cost(self, pm) -> float:
+        return self.costs.get(pm.proxy_mode, 0.0)
+
+    def affordable(self, pm) -> bool:
+        """Whether the budget covers another request through ``pm``"""
+        with self._lock:
+            return self.budget is None or self.spent + self.cost(pm) <= self.budget + 1e-12
+
+    def choose(self, pms: List, url: str):
+        """Return the proxy generator of ``pms`` to fetch ``url`` with
+
+        :raises: BudgetExceededException if the budget covers none of them
+        """
+        page_class = PageClass.from_url(url)
+        candidates = [pm for pm in pms if self.affordable(pm)]
+        if not candidates:
+            raise BudgetExceededException(f"The budget of ${self.budget} is spent")
+        with self._lock:
+            scores = {pm: self._score(pm, page_class) for pm in candidates}
+        fast = [pm for pm in candidates
+                if self.latency_target is None or scores[pm][1] <= self.latency_target]
+        if fast:
+            best = min(fast, key=lambda pm: scores[pm])
+        else:
+            best = min(candidates, key=lambda pm: scores[pm][1])
+        others = [pm for pm in candidates if pm is not best]
+        if others and self._rng.random() < self.explore:
+            return self._rng.choice(others)
+        return best
+
+    def _score(self, pm, page_class: PageClass):
+        """Return the expected cost and time per page fetched through ``pm``"""
+        estimate = self._estimate(pm, page_class)
+        success = max(estimate.success, 0.01)
+        return self.cost(pm) / success, estimate.latency / success
+
+    def _estimate(self, pm, page_class: PageClass) -> _Estimate:
+        key = (pm, page_class)
+        if key not in self._estimates:
+            self._estimates[key] = _Estimate(self.prior_success, self.prior_latency)
+        return self._estimates[key]
+
+    def charge(self, pm):
+        """Charge a request sent through ``pm`` to the budget
+
+        :raises: BudgetExceededException if the budget does not cover it
+        """
+        cost = self.cost(pm)
+        with self._lock:
+            if self.budget is not None and self.spent + cost > self.budget + 1e-12:
+                raise BudgetExceededException(f"The budget of ${self.budget} is spent")
+            self.spent += cost
+
+    def observe(self, pm, url: str, success: bool, latency: Optional[float] = None):
+        """Update the estimates of ``pm`` with the outcome of a request for ``url``"""
+        with self._lock:
+            estimate = self._estimate(pm, PageClass.from_url(url))
+            estimate.samples += 1
+            estimate.success += self.alpha * (float(success) - estimate.success)
+            if latency is not None:
+                estimate.latency += self.alpha * (latency - estimate.latency)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return the spending and the estimates per proxy mode and page class"""
+        with self._lock:
+            estimates = {}
+            for (pm, page_class), estimate in self._estimates.items():
+                mode = pm.proxy_mode.value if pm.proxy_mode is not None else "DIRECT"
+                estimates.setdefault(mode, {})[page_class.value] = {
+                    "success_rate": estimate.success, "latency": estimate.latency,
+                    "samples": estimate.samples, "cost": self.cost(pm)}
+            return {"spent": self.spent, "budget": self.budget, "estimates": estimates}
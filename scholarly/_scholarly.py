@@ -6,14 +6,18 @@ import copy
 import csv
 import pprint
 import datetime
+import logging
 import re
-from typing import Dict, List, Union
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
 from ._navigator import Navigator
 from ._proxy_generator import ProxyGenerator
+from ._profiler import Profiler
+from ._scheduler import ProxyScheduler
 from dotenv import find_dotenv, load_dotenv
 from .author_parser import AuthorParser
 from .publication_parser import PublicationParser, _SearchScholarIterator
-from .data_types import Author, AuthorSource, CitesPerYear, Journal, Publication, PublicationSource
+from .data_types import Author, AuthorSource, CitesPerYear, Journal, PageClass, Publication, PublicationSource
 
 _AUTHSEARCH = '/citations?hl=en&view_op=search_authors&mauthors={0}'
 _KEYWORDSEARCH = '/citations?hl=en&view_op=search_authors&mauthors=label:{0}'
@@ -26,7 +30,13 @@ _MANDATES_URL = "https://scholar.google.com/citations?view_op=mandates_leaderboa
 
 
 class _Scholarly:
-    """Class that manages the API for scholarly"""
+    """Class that manages the API for scholarly
+
+    ``scholarly.scholarly`` is the default instance. Other instances, created
+    with ``scholarly.Scholarly()``, are independent of it: they have their
+    own proxies, sessions, rate limits, caches and metrics, and can be used
+    from parallel threads.
+    """
 
     def __init__(self):
         load_dotenv(find_dotenv())
@@ -77,6 +87,266 @@ class _Scholarly:
         """
         self.__nav.use_proxy(proxy_generator, secondary_proxy_generator)
 
+    def use_session_pool(self, proxy_generators: List[ProxyGenerator] = None,
+                         size: int = None, max_workers: int = None) -> None:
+        """Spread requests over a pool of independent sessions.
+
+        Each session has its own proxy, user agent and cookie jar and serves
+        one request at a time. Requests issued concurrently, e.g., by filling
+        publications from several threads, run in parallel on different
+        sessions, so throughput scales with the number of healthy proxies.
+        The pages of the publications of an author are also fetched as many at
+        a time as there are sessions. While a pool is in use, it replaces the
+        primary and secondary proxies.
+
+        :param proxy_generators: the proxy generators to pool. Pass None (and no
+                                 ``size``) to stop using a pool.
+        :type proxy_generators: List[ProxyGenerator]
+        :param size: number of sessions with a local connection to pool when
+                     ``proxy_generators`` is not given, optional
+        :type size: int
+        :param max_workers: size of the worker pool, defaults to the number of sessions
+        :type max_workers: int
+
+        :Example::
+
+        .. testcode::
+
+            pgs = []
+            for _ in range(4):
+                pg = ProxyGenerator()
+                pg.FreeProxies()
+                pgs.append(pg)
+            scholarly.use_session_pool(pgs)
+
+        """
+        self.__nav.use_session_pool(proxy_generators, size=size, max_workers=max_workers)
+
+    def use_scheduler(self, scheduler: ProxyScheduler = None) -> None:
+        """Choose between the primary and the secondary proxy of every request
+        by cost, success rate and latency, within the budget of the job.
+
+        The scheduler sends every request through the proxy with the lowest
+        expected cost per page among those meeting its latency target, based
+        on the success rate and latency measured for every proxy and page
+        class. Requests that the budget does not cover raise a
+        ``BudgetExceededException``.
+
+        :param scheduler: the scheduler, with the cost per request of every
+                          proxy mode and the budget. Pass None to go back to
+                          the fixed routing.
+        :type scheduler: ProxyScheduler
+
+        :Example::
+
+        .. testcode::
+
+            scheduler = ProxyScheduler(costs={ProxyMode.SCRAPERAPI: 0.0005}, budget=10.0,
+                                       latency_target=5.0)
+            scholarly.use_scheduler(scheduler)
+
+        """
+        self.__nav.use_scheduler(scheduler)
+
+    def set_hedging(self, percentile: Optional[float] = 90, min_samples: int = 20) -> None:
+        """Send slow requests again on another session and keep the first response.
+
+        A request that got no response after the ``percentile``-th percentile
+        of the latency measured for its proxy mode and page class is sent again
+        on another healthy session: the other one of the primary and secondary
+        proxies, or another member of the session pool. The first page fetched
+        is returned, which cuts the tail latency caused by slow proxies at the
+        price of a few more requests. With the asynchronous API, the other
+        request is cancelled. Otherwise, it is not retried, and its response is
+        left out of the rate limits and health of its proxy.
+
+        :param percentile: percentile (0-100) of the latency after which a
+                           request is hedged. Pass None to stop hedging.
+        :type percentile: float
+        :param min_samples: responses needed before the requests of a page
+                            class are hedged, defaults to 20
+        :type min_samples: int
+
+        :Example::
+
+        .. testcode::
+
+            scholarly.set_hedging(percentile=90)
+
+        """
+        self.__nav.set_hedging(percentile, min_samples)
+
+
+    def set_cache(self, path: str = None, ttl: Dict[PageClass, Optional[float]] = None) -> None:
+        """Keep the fetched pages in a persistent cache on disk.
+
+        Re-running a crawl then reads the author profiles, searches and bibtex
+        entries that it fetched before from the cache instead of Google Scholar.
+        Every page class has its own time-to-live, e.g., bibtex entries never
+        expire while author profiles are refetched after a day.
+
+        :param path: location of the SQLite database holding the cache. Pass None to stop caching.
+        :type path: str
+        :param ttl: time-to-live in seconds per page class, where None means forever
+                    and 0 disables caching for that class.
+        :type ttl: Dict[PageClass, Optional[float]], optional
+
+        :Example::
+
+        .. testcode::
+
+            scholarly.set_cache("scholarly_cache.sqlite", ttl={PageClass.SEARCH: 3600})
+
+        """
+        self.__nav.set_cache(path, ttl)
+
+    def set_soup_cache(self, max_bytes: int, ttl: float = 300.0) -> None:
+        """Set the size of the in-memory cache of recently parsed pages.
+
+        Pages that are accessed repeatedly within a session, e.g., an author
+        profile looked up with ``search_author_id`` and then filled, are
+        fetched and parsed only once. The cache is enabled by default, holds
+        up to 8 MiB of html and keeps a page for 5 minutes, so that a process
+        polling the same pages still gets them fresh.
+
+        :param max_bytes: maximum total length of the html of the cached pages.
+                          Pass 0 to disable the cache.
+        :type max_bytes: int
+        :param ttl: seconds after which a parsed page is fetched again
+        :type ttl: float
+        """
+        self.__nav.set_soup_cache(max_bytes, ttl)
+
+    def set_parser(self, parser: str = "html.parser") -> None:
+        """Select the backend parsing the pages from Google Scholar.
+
+        ``"html.parser"``, the default, is the pure Python parser of
+        BeautifulSoup. ``"lxml"`` builds the same BeautifulSoup with the lxml
+        parser, which saves little since building the BeautifulSoup itself
+        takes most of the time. ``"selectolax"`` parses the pages with the
+        lexbor engine of selectolax, behind an adapter for the parts of the
+        BeautifulSoup interface that scholarly uses, and handles about ten
+        times more pages per second, extraction included. Run
+        ``benchmarks/bench_parsers.py`` to compare them on your own pages.
+
+        :param parser: one of "html.parser", "lxml" and "selectolax"
+        :type parser: str
+        :raises: RuntimeError if the backend is not installed, see the
+                 ``lxml`` and ``selectolax`` extras of the package
+
+        :Example::
+
+        .. testcode::
+
+            scholarly.set_parser("lxml")
+
+        """
+        self.__nav.set_parser(parser)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of cache hits and misses per page class"""
+        if self.__nav._cache is None:
+            return {"hits": {}, "misses": {}}
+        return self.__nav._cache.stats()
+
+    def stats(self, reset: bool = False) -> Dict[str, Dict[str, dict]]:
+        """Return the metrics of the requests sent to Google Scholar.
+
+        The metrics are broken down by proxy mode (``DIRECT`` without a
+        proxy) and page class, e.g. ``AUTHOR_PROFILE`` or ``SEARCH``. Each
+        holds the number of responses (``requests``) and their ``bytes``,
+        the counts of ``retries``, ``captchas``, ``dos`` captchas,
+        ``timeouts``, ``errors``, ``proxy_switches`` and ``failures``, the
+        ``sleep_seconds`` spent waiting, the responses per HTTP ``status``,
+        and a ``latency`` summary in seconds (count, sum, mean, p50, p90, p99, max).
+
+        :param reset: whether to reset the metrics after reading them, defaults to False
+        :type reset: bool
+        :returns: the metrics as ``{proxy mode: {page class: metrics}}``
+        :rtype: {dict}
+
+        :Example::
+
+        .. testcode::
+
+            pubs = [next(scholarly.search_pubs('naive physics')) for _ in range(3)]
+            print(scholarly.stats()['DIRECT']['SEARCH']['latency']['p90'])
+
+        """
+        res = self.__nav._metrics.snapshot()
+        if reset:
+            self.__nav._metrics.reset()
+        return res
+
+    @contextmanager
+    def profile(self):
+        """Profile the operations run in the ``with`` block.
+
+        The time of every operation, e.g., ``fill_author`` or ``search``, is
+        broken down into the time spent fetching pages (``fetch``), building
+        their BeautifulSoup (``parse``) and extracting fields (``extract``
+        and the sections of an author). Profiling is off otherwise.
+
+        :returns: the profiler, whose ``format_report()`` and ``report()``
+                  summarize the timings and whose ``write_collapsed(path)``
+                  exports them for flame graph tools
+        :rtype: {Profiler}
+
+        :Example::
+
+        .. testcode::
+
+            with scholarly.profile() as profiler:
+                author = scholarly.fill(scholarly.search_author_id('4bahYMkAAAAJ'))
+            print(profiler.format_report())
+            profiler.write_collapsed("fill.folded")
+
+        """
+        profiler = Profiler()
+        self.__nav._profiler = profiler
+        try:
+            yield profiler
+        finally:
+            self.__nav._profiler = None
+
+    def record(self, path: str = None) -> None:
+        """Record the responses from Google Scholar into a gzipped file.
+
+        The recording can later be replayed with ``replay``, e.g., to
+        benchmark the parsers offline or to reproduce a slow session.
+
+        :param path: location of the recording. Pass None to stop recording.
+        :type path: str
+
+        :Example::
+
+        .. testcode::
+
+            scholarly.record("session.jsonl.gz")
+            author = scholarly.fill(next(scholarly.search_author("Steven A Cholewiak")))
+            scholarly.record(None)
+
+        """
+        self.__nav.record(path)
+
+    def replay(self, path: str = None, timing: str = "fast") -> None:
+        """Answer the requests from a recording made with ``record`` instead of
+        the network.
+
+        :param path: location of the recording. Pass None to go back to the network.
+        :type path: str
+        :param timing: "fast" to replay as fast as possible, or "original" to
+                       keep the rate limiting and the recorded latency of every
+                       response, defaults to "fast"
+        :type timing: str
+
+        .. note::
+
+            Call ``replay`` after ``use_proxy``, which replaces the sessions.
+            Disable the caches (``set_cache(None)``, ``set_soup_cache(0)``) to
+            measure the parsers on every access.
+        """
+        self.__nav.replay(path, timing)
 
     def set_logger(self, enable: bool):
         """Enable or disable the logger for google scholar.
@@ -88,6 +358,37 @@ class _Scholarly:
         """Set timeout period in seconds for scholarly"""
         self.__nav.set_timeout(timeout)
 
+    def set_adaptive_timeouts(self, k: Optional[float] = 4.0, min_samples: int = 5) -> None:
+        """Derive the timeouts of every proxy and page class from their latency.
+
+        Once ``min_samples`` requests through a proxy are measured, the read
+        timeout of its requests for a page class is the moving average of
+        their latency plus ``k`` moving standard deviations, and the connect
+        timeout is derived the same way from the connections it opened. Proxies
+        that stall then fail fast, while slow but healthy ones, e.g., premium
+        proxies retrying on their side, are not cut off early. A request that
+        times out is retried with a timeout growing like the fixed one, i.e.,
+        twice then three times the adaptive timeout. The timeouts stay within
+        one second and three times the fixed timeout set with ``set_timeout``,
+        which is used until the latency is known. Adaptive timeouts are
+        disabled by default.
+
+        :param k: number of standard deviations above the average latency,
+                  defaults to 4. Pass None to use the fixed timeout only.
+        :type k: float
+        :param min_samples: requests measured before the fixed timeout is
+                            replaced, defaults to 5
+        :type min_samples: int
+
+        :Example::
+
+        .. testcode::
+
+            scholarly.set_adaptive_timeouts(k=3.0)
+
+        """
+        self.__nav.set_adaptive_timeouts(k, min_samples)
+
     def search_pubs(self,
                     query: str, patents: bool = True,
                     citations: bool = True, year_low: int = None,
@@ -568,12 +869,14 @@ class _Scholarly:
             return text
 
     # TODO: Make it a public method in v1.6
-    def _construct_url(self, baseurl: str, patents: bool = True,
+    @staticmethod
+    def _construct_url(baseurl: str, patents: bool = True,
                        citations: bool = True, year_low: int = None,
                        year_high: int = None, sort_by: str = "relevance",
                        include_last_year: str = "abstracts",
                        start_index: int = 0)-> str:
         """Construct URL from requested parameters."""
+        logger = logging.getLogger('scholarly')
         url = baseurl
 
         yr_lo = '&as_ylo={0}'.format(year_low) if year_low is not None else ''
@@ -589,10 +892,10 @@ class _Scholarly:
             elif include_last_year == "everything":
                 sortby = '&scisbd=2'
             else:
-                self.logger.debug("Invalid option for 'include_last_year', available options: 'everything', 'abstracts'")
+                logger.debug("Invalid option for 'include_last_year', available options: 'everything', 'abstracts'")
                 return
         elif sort_by != "relevance":
-            self.logger.debug("Invalid option for 'sort_by', available options: 'relevance', 'date'")
+            logger.debug("Invalid option for 'sort_by', available options: 'relevance', 'date'")
             return
 
         # improve str below
@@ -0,0 +1,91 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+import contextvars
+import random
+import threading
+
+from ._proxy_generator import ProxyGenerator
+
+
+class SessionPool(object):
+    """A pool of independent sessions with a bounded worker pool.
+
+    Every member is a ProxyGenerator, i.e., its own proxy, user agent and
+    cookie jar. A member is lent to exactly one request at a time, so
+    concurrent requests are spread over the members and throughput grows
+    with the number of healthy proxies. Idle members are picked at random,
+    weighted by the health of their proxy.
+    """
+
+    def __init__(self, proxy_generators: List[ProxyGenerator], max_workers: int = None):
+        if not proxy_generators:
+            raise ValueError("A session pool needs at least one proxy generator")
+        self.proxy_generators = list(proxy_generators)
+        self._idle = list(self.proxy_generators)
+        self._available = threading.Condition()
+        self.max_workers = max_workers or len(self.proxy_generators)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="scholarly")
+
+    def __len__(self):
+        return len(self.proxy_generators)
+
+    @contextmanager
+    def session(self):
+        """Borrow an idle member of the pool, waiting for one if necessary.
+
+        :returns: the borrowed proxy generator, whose session is not used by
+                  any other request until it is returned.
+        :rtype: {ProxyGenerator}
+        """
+        pg = self.acquire()
+        try:
+            yield pg
+        finally:
+            self.release(pg)
+
+    def acquire(self, blocking: bool = True,
+                avoid: Callable[[ProxyGenerator], bool] = None) -> Optional[ProxyGenerator]:
+        """Borrow an idle member of the pool, to be given back with ``release``.
+
+        :param blocking: whether to wait for a member when none is idle
+        :type blocking: bool
+        :param avoid: members not to borrow while another one is idle, e.g.,
+                      those waiting for a captcha to be solved
+        :type avoid: Callable[[ProxyGenerator], bool]
+        :returns: the borrowed proxy generator, or None if none is idle and
+                  ``blocking`` is False
+        :rtype: {ProxyGenerator}
+        """
+        with self._available:
+            while not self._idle:
+                if not blocking:
+                    return None
+                self._available.wait()
+            pg = self._pick(avoid)
+            self._idle.remove(pg)
+            return pg
+
+    def release(self, pg: ProxyGenerator):
+        """Give back a member borrowed with ``acquire``"""
+        with self._available:
+            self._idle.append(pg)
+            self._available.notify()
+
+    def _pick(self, avoid: Callable[[ProxyGenerator], bool] = None) -> ProxyGenerator:
+        candidates = self._idle
+        if avoid is not None:
+            candidates = [pg for pg in self._idle if not avoid(pg)] or self._idle
+        weights = [max(pg._health_score(), 0.01) for pg in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` on the worker pool, in a copy of
+        the context of the caller, e.g., its profiler phases
+        """
+        return self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool. Pending requests are completed if ``wait`` is True."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,49 @@
+from concurrent.futures import Future
+from typing import Callable, Hashable
+import asyncio
+import threading
+
+
+class SingleFlight(object):
+    """Coalesces identical calls that are in flight at the same time.
+
+    The first caller for a key runs the call. Callers arriving with the same
+    key before it finishes wait for it and receive the same result (or
+    exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            call.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            call.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return call.result()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Await ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight.
+
+        The call runs in its own task, so that a waiter being cancelled does
+        not cancel it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,94 @@
+from typing import Hashable, Optional
+import math
+import threading
+
+import httpx
+
+from .data_types import PageClass
+
+
+class _Estimate(object):
+    """Exponentially weighted moving average and variance of durations"""
+
+    def __init__(self, value: float):
+        self.mean = value
+        self.var = 0.0
+        self.samples = 1
+
+    def update(self, value: float, alpha: float):
+        diff = value - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        self.samples += 1
+
+
+class LatencyTimeouts(object):
+    """Timeouts of the requests through every proxy, per page class, from
+    running estimates of their latency.
+
+    The read timeout of a request is the moving average of the latency of the
+    requests for the same page class through the same proxy, plus ``k`` times
+    its moving standard deviation. The connect timeout is estimated the same
+    way from the time taken to open connections through the proxy. Slow but
+    steady proxies thus get the time they need, while proxies that stall fail
+    fast. A request that times out counts as having taken its timeout, so
+    that the timeouts of a proxy grow as it slows down. Until ``min_samples``
+    durations are known, the default timeout is used.
+
+    :param k: number of standard deviations above the average latency
+    :type k: float
+    :param alpha: weight of the latest duration in the moving averages
+    :type alpha: float
+    :param min_samples: durations needed before the default timeout is replaced
+    :type min_samples: int
+    :param min_timeout: seconds below which a timeout never goes
+    :type min_timeout: float
+    """
+
+    def __init__(self, k: float = 4.0, alpha: float = 0.2, min_samples: int = 5, min_timeout: float = 1.0):
+        self.k = k
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self._read = {}
+        self._connect = {}
+        self._lock = threading.Lock()
+
+    def _update(self, estimates: dict, key, value: float):
+        with self._lock:
+            if key in estimates:
+                estimates[key].update(value, self.alpha)
+            else:
+                estimates[key] = _Estimate(value)
+
+    def observe(self, proxy: Hashable, url: str, latency: float):
+        """Record that a request for ``url`` through ``proxy`` took ``latency`` seconds"""
+        self._update(self._read, (proxy, PageClass.from_url(url)), latency)
+
+    def observe_connect(self, proxy: Hashable, seconds: float):
+        """Record that opening a connection through ``proxy`` took ``seconds``"""
+        self._update(self._connect, proxy, seconds)
+
+    def _bound(self, estimate: Optional[_Estimate], default: float, scale: float = 1.0) -> float:
+        if estimate is None or estimate.samples < self.min_samples:
+            return default
+        return scale * max(self.min_timeout, estimate.mean + self.k * math.sqrt(estimate.var))
+
+    def timeout(self, proxy: Hashable, url: str, default: float, maximum: float = None,
+                scale: float = 1.0) -> httpx.Timeout:
+        """Return the connect and read timeouts of a request for ``url`` through ``proxy``
+
+        :param default: timeout in seconds while the latency is not known
+        :type default: float
+        :param maximum: seconds above which a timeout never goes, optional
+        :type maximum: float
+        :param scale: factor of the estimated timeouts, e.g., growing with
+                      every attempt that timed out
+        :type scale: float
+        """
+        with self._lock:
+            read = self._bound(self._read.get((proxy, PageClass.from_url(url))), default, scale)
+            connect = self._bound(self._connect.get(proxy), default, scale)
+        if maximum is not None:
+            read, connect = min(read, maximum), min(connect, maximum)
+        return httpx.Timeout(read, connect=connect)
@@ -0,0 +1,213 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import logging
+import random
+import tempfile
+import threading
+import time
+
+try:
+    import stem.process
+    from stem import Signal
+    from stem.control import Controller
+except ImportError:
+    stem = None
+
+
+class TorInstance(object):
+    """A Tor client, with its own SOCKS port, control port and circuits"""
+
+    def __init__(self, sock_port: int, control_port: int, password: str = None, process=None):
+        self.sock_port = sock_port
+        self.control_port = control_port
+        self.password = password
+        self.process = process
+        self.leased = False
+        # When the last identity was requested and when its circuits are usable
+        self.rotated_at = time.monotonic()
+        self.ready_at = 0.0
+
+    @property
+    def proxy(self) -> str:
+        return f"socks5://127.0.0.1:{self.sock_port}"
+
+    def __repr__(self):
+        return f"TorInstance(sock_port={self.sock_port}, control_port={self.control_port})"
+
+
+class TorPool(object):
+    """A pool of Tor instances whose identities are rotated in the background.
+
+    Every instance is leased to one session at a time, so concurrent requests
+    go through different circuits. A session that needs a new identity gets
+    another idle instance right away, while the instance it gives back is sent
+    the NEWNYM signal and rests for ``settle`` seconds in a background thread.
+    Idle instances are also given a new identity every ``rotate_interval``
+    seconds, if set.
+
+    :param instances: the Tor instances of the pool
+    :type instances: List[TorInstance]
+    :param settle: seconds to wait after NEWNYM before an instance is used again
+    :type settle: float
+    :param rotate_interval: seconds after which idle instances get a new identity, optional
+    :type rotate_interval: float
+    """
+
+    def __init__(self, instances: List[TorInstance], settle: float = 5.0, rotate_interval: float = None):
+        if not instances:
+            raise ValueError("A Tor pool needs at least one Tor instance")
+        self.logger = logging.getLogger('scholarly')
+        self.instances = list(instances)
+        self.settle = settle
+        self.rotate_interval = rotate_interval
+        self._available = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.instances), thread_name_prefix="scholarly-tor")
+        self._closed = threading.Event()
+        if rotate_interval is not None:
+            threading.Thread(target=self._rotate_idle, name="scholarly-tor-rotate", daemon=True).start()
+
+    @classmethod
+    def attach(cls, ports: List[Tuple[int, int]], password: str = None, **kwargs) -> 'TorPool':
+        """Use Tor instances that are already running
+
+        :param ports: the SOCKS port and the control port of every instance
+        :type ports: List[Tuple[int, int]]
+        :param password: the password of the control ports
+        :type password: str
+
+        :Example::
+            >>> pool = TorPool.attach([(9050, 9051), (9052, 9053)], password="scholarly_password")
+        """
+        return cls([TorInstance(sock_port, control_port, password) for sock_port, control_port in ports], **kwargs)
+
+    @classmethod
+    def launch(cls, n: int, tor_cmd: str = "tor", **kwargs) -> 'TorPool':
+        """Start ``n`` Tor instances owned by the pool, in parallel.
+        Their ports are picked at random in the range (9000, 9999).
+
+        :param n: number of Tor instances
+        :type n: int
+        :param tor_cmd: tor executable location (absolute path if its not exported in PATH)
+        :type tor_cmd: str
+
+        :Example::
+            >>> pool = TorPool.launch(4, tor_cmd="tor")
+        """
+        if stem is None:
+            raise RuntimeError("Tor methods are not supported with basic version of the package. "
+                               "Please install scholarly[tor] to use this method.")
+        # Picking random ports to avoid conflicts with simultaneous runs of scholarly
+        base = random.randrange(9000, 9999 - 2*n, 2)
+        ports = [(base + 2*i, base + 2*i + 1) for i in range(n)]
+
+        def start(sock_port, control_port):
+            process = stem.process.launch_tor_with_config(
+                tor_cmd=tor_cmd,
+                config={
+                    'ControlPort': str(control_port),
+                    'SocksPort': str(sock_port),
+                    'DataDirectory': tempfile.mkdtemp(),
+                },
+            )
+            return TorInstance(sock_port, control_port, process=process)
+
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            futures = [executor.submit(start, *p) for p in ports]
+        instances = []
+        for future in futures:
+            try:
+                instances.append(future.result())
+            except OSError as e:
+                logging.getLogger('scholarly').warning("Could not start a Tor instance: %s", e)
+        return cls(instances, **kwargs)
+
+    def __len__(self):
+        return len(self.instances)
+
+    def acquire(self) -> TorInstance:
+        """Lease an idle instance, preferring those whose new circuits are
+        ready, and waiting for one if necessary
+        """
+        with self._available:
+            while True:
+                idle = [i for i in self.instances if not i.leased]
+                if idle:
+                    instance = min(idle, key=lambda i: i.ready_at)
+                    delay = instance.ready_at - time.monotonic()
+                    if delay <= 0:
+                        instance.leased = True
+                        return instance
+                    # Wait until the circuits settle, or until NEWNYM is sent
+                    self._available.wait(delay if delay != float("inf") else None)
+                else:
+                    self._available.wait()
+
+    def release(self, instance: TorInstance, refresh: bool = False):
+        """Give ``instance`` back, with a new identity if ``refresh`` is True"""
+        with self._available:
+            instance.leased = False
+            if refresh:
+                # Not usable until NEWNYM is sent and the circuits settle
+                instance.ready_at = float("inf")
+                self._executor.submit(self._rotate, instance)
+            self._available.notify_all()
+
+    def proxy_generators(self, n: int = None) -> list:
+        """Return ``n`` proxy generators using the pool, e.g., for
+        ``scholarly.use_session_pool``. By default, one instance is left
+        spare so that a new identity is always ready.
+        """
+        from ._proxy_generator import ProxyGenerator
+        if n is None:
+            n = max(1, len(self) - 1)
+        pgs = []
+        for _ in range(n):
+            pg = ProxyGenerator()
+            pg.TorPool(self)
+            pgs.append(pg)
+        return pgs
+
+    def _newnym(self, instance: TorInstance) -> float:
+        """Request a new identity and return how long to wait before using it"""
+        with Controller.from_port(port=instance.control_port) as controller:
+            if instance.password:
+                controller.authenticate(password=instance.password)
+            else:
+                controller.authenticate()
+            # Tor ignores NEWNYM signals sent too often
+            wait = controller.get_newnym_wait()
+            if wait > 0:
+                time.sleep(wait)
+            controller.signal(Signal.NEWNYM)
+        return self.settle
+
+    def _rotate(self, instance: TorInstance):
+        try:
+            delay = self._newnym(instance)
+        except Exception as e:
+            self.logger.info("Exception %s while refreshing Tor instance %s", e, instance)
+            delay = self.settle
+        with self._available:
+            instance.rotated_at = time.monotonic()
+            instance.ready_at = instance.rotated_at + delay
+            self._available.notify_all()
+
+    def _rotate_idle(self):
+        while not self._closed.wait(min(1.0, self.rotate_interval)):
+            now = time.monotonic()
+            with self._available:
+                stale = [i for i in self.instances if not i.leased and i.ready_at <= now
+                         and now - i.rotated_at >= self.rotate_interval]
+                for instance in stale:
+                    instance.ready_at = float("inf")
+            for instance in stale:
+                self._executor.submit(self._rotate, instance)
+
+    def close(self):
+        """Stop the rotations and the Tor instances owned by the pool"""
+        self._closed.set()
+        self._executor.shutdown(wait=False)
+        for instance in self.instances:
+            if instance.process is not None:
+                instance.process.kill()
+                instance.process.wait()
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from typing import Callable
+from urllib.parse import urlparse
+import logging
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.common.proxy import Proxy, ProxyType
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+
+def _selenium_proxy(proxy: str) -> Proxy:
+    parsed = urlparse(proxy)
+    # Webdrivers cannot authenticate to proxies, so credentials are dropped
+    address = parsed.netloc.rpartition("@")[2]
+    if parsed.scheme.startswith("socks"):
+        return Proxy({"proxyType": ProxyType.MANUAL, "socksProxy": address, "socksVersion": 5})
+    return Proxy({"proxyType": ProxyType.MANUAL, "httpProxy": address, "sslProxy": address})
+
+
+def _launch(browser, options, proxy: str = None):
+    options.add_argument('--headless')
+    if proxy is not None:
+        options.proxy = _selenium_proxy(proxy)
+    driver = browser(options=options)
+    driver.get("https://scholar.google.com")  # Need to pre-load to set cookies later
+
+    # It might make sense to (pre)set cookies as well, e.g., to set a GSP ID.
+    # However, a limitation of webdriver makes it impossible to set cookies for
+    # domains other than the current active one, cf. https://github.com/w3c/webdriver/issues/1238
+    # Therefore setting cookies in the session instance for other domains than the on set above
+    # (e.g., via self._session.cookies.set) will create problems when transferring them to the
+    # webdriver when handling captchas.
+
+    return driver
+
+
+def launch_webdriver(proxy: str = None):
+    """Start a headless Firefox, or Chrome if Firefox is not available,
+    going through ``proxy`` if given
+    """
+    logger = logging.getLogger('scholarly')
+    try:
+        return _launch(webdriver.Firefox, FirefoxOptions(), proxy)
+    except Exception as err:
+        logger.debug("Cannot open Firefox/Geckodriver: %s", err)
+    try:
+        return _launch(webdriver.Chrome, webdriver.ChromeOptions(), proxy)
+    except Exception as err:
+        logger.debug("Cannot open Chrome: %s", err)
+        raise RuntimeError("Neither Chrome nor Firefox/Geckodriver found in PATH") from err
+
+
+class _Browser(object):
+    def __init__(self, driver, proxy: str = None):
+        self.driver = driver
+        self.proxy = proxy
+        self.uses = 0
+
+
+class WebDriverPool(object):
+    """A pool of headless browsers that stay open between captchas.
+
+    Launching a browser takes seconds, so browsers are not closed with the
+    session that needed them but given back to the pool, without cookies, and
+    leased again to the next session that hits a captcha. The proxy of a
+    browser is fixed when it is launched, therefore a session gets an idle
+    browser that goes through the same proxy. When the pool is full, the least
+    recently used idle browser of another proxy makes room. Browsers are
+    closed and replaced after ``max_uses`` leases, before they grow slow.
+
+    :param size: maximum number of browsers open at the same time
+    :type size: int
+    :param max_uses: number of leases after which a browser is replaced
+    :type max_uses: int
+    :param factory: starts a browser going through the given proxy, or directly
+                    for None. By default, a headless Firefox or Chrome.
+    :type factory: Callable[[str], WebDriver], optional
+    """
+
+    def __init__(self, size: int = 2, max_uses: int = 20, factory: Callable = None):
+        if size < 1:
+            raise ValueError("A webdriver pool needs room for at least one browser")
+        self.logger = logging.getLogger('scholarly')
+        self.size = size
+        self.max_uses = max_uses
+        self._factory = factory or launch_webdriver
+        # Idle browsers, least recently used first
+        self._idle = OrderedDict()
+        self._leased = {}
+        self._pending = 0
+        self._available = threading.Condition()
+
+    def __len__(self):
+        with self._available:
+            return len(self._idle) + len(self._leased) + self._pending
+
+    def acquire(self, proxy: str = None):
+        """Lease a browser going through ``proxy``, launching one if no idle
+        browser does, and waiting if all the browsers of the pool are leased
+        """
+        browser = None
+        while browser is None:
+            with self._available:
+                browser = self._take(proxy)
+        try:
+            if browser.driver is None or not self._alive(browser.driver):
+                browser = _Browser(self._factory(proxy), proxy)
+        except Exception:
+            with self._available:
+                self._pending -= 1
+                self._available.notify_all()
+            raise
+        with self._available:
+            self._pending -= 1
+            browser.uses += 1
+            self._leased[id(browser.driver)] = browser
+        return browser.driver
+
+    def _take(self, proxy: str = None):
+        """Reserve an idle browser for ``proxy``, or room for a new one.
+        Must be called holding the lock. Returns None after waiting.
+        """
+        for key, browser in self._idle.items():
+            if browser.proxy == proxy:
+                del self._idle[key]
+                self._pending += 1
+                return browser
+        if len(self._idle) + len(self._leased) + self._pending >= self.size:
+            if not self._idle:
+                self._available.wait()
+                return None
+            _, stale = self._idle.popitem(last=False)
+            self._quit(stale.driver)
+        self._pending += 1
+        return _Browser(None, proxy)
+
+    def release(self, driver, broken: bool = False):
+        """Give ``driver`` back, or close it if it is ``broken`` or was used ``max_uses`` times"""
+        with self._available:
+            browser = self._leased.pop(id(driver), None)
+            self._available.notify_all()
+        if browser is None:
+            return
+        if not broken and browser.uses < self.max_uses:
+            try:
+                # The next session must not inherit the cookies of this one
+                driver.delete_all_cookies()
+                with self._available:
+                    self._idle[id(driver)] = browser
+                return
+            except Exception as e:
+                self.logger.debug("Webdriver cannot be reused: %s", e)
+        self._quit(driver)
+
+    def warm(self, proxy: str = None, n: int = 1):
+        """Launch ``n`` browsers going through ``proxy`` in the background,
+        so that the next captchas do not wait for a browser to start
+
+        :Example::
+            >>> pool = WebDriverPool(size=2)
+            >>> pool.warm(n=2)
+        """
+        def launch():
+            with self._available:
+                if len(self) >= self.size:
+                    return
+                self._pending += 1
+            try:
+                driver = self._factory(proxy)
+            except Exception as e:
+                self.logger.info("Could not launch a webdriver: %s", e)
+                driver = None
+            with self._available:
+                self._pending -= 1
+                if driver is not None:
+                    self._idle[id(driver)] = _Browser(driver, proxy)
+                self._available.notify_all()
+
+        for _ in range(n):
+            threading.Thread(target=launch, name="scholarly-webdriver", daemon=True).start()
+
+    def close(self):
+        """Close the idle browsers. Leased browsers are closed when given back."""
+        self.max_uses = 0
+        with self._available:
+            idle = list(self._idle.values())
+            self._idle.clear()
+        for browser in idle:
+            self._quit(browser.driver)
+
+    def _alive(self, driver) -> bool:
+        try:
+            _ = driver.current_url
+            return True
+        except Exception as e:
+            self.logger.debug("Discarding a dead webdriver: %s", e)
+            self._quit(driver)
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning("Could not close webdriver cleanly: %s", e)
+
+
+# Browsers are shared by all the proxy generators, so that those going through
+# the same proxy, or directly, use the same warm browsers.
+DEFAULT_POOL = WebDriverPool()
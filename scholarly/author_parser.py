@@ -181,7 +181,15 @@ class AuthorParser:
 
         pub_parser = PublicationParser(self.nav)
         flag = False
-        while True:
+        # The next pages are fetched several at a time when the navigator has
+        # several sessions. A batch starts with a single page and doubles, up
+        # to the number of sessions, only when all the pages of the previous
+        # one were full, so that the pages past the last one that may be
+        # requested are fewer than the pages of the author already fetched.
+        batch = 1
+        soups = [soup]
+        while soups:
+            soup = soups.pop(0)
             for row in soup.find_all('tr', class_='gsc_a_tr'):
                 new_pub = pub_parser.get_publication(row, PublicationSource.AUTHOR_PUBLICATION_ENTRY)
                 author['publications'].append(new_pub)
@@ -189,10 +197,16 @@ class AuthorParser:
                     flag = True
                     break
             if 'disabled' not in soup.find('button', id='gsc_bpf_more').attrs and not flag:
-                pubstart += _PAGESIZE
-                url = '{0}&cstart={1}&pagesize={2}'.format(
-                    url_citations, pubstart, _PAGESIZE)
-                soup = self.nav._get_soup(url)
+                if not soups:
+                    pages = min(batch, self.nav._concurrent_pages())
+                    batch = 2 * pages
+                    if publication_limit:
+                        missing = publication_limit - len(author['publications'])
+                        pages = min(pages, -(-missing // _PAGESIZE))
+                    urls = ['{0}&cstart={1}&pagesize={2}'.format(url_citations, pubstart + i * _PAGESIZE, _PAGESIZE)
+                            for i in range(1, pages + 1)]
+                    pubstart += pages * _PAGESIZE
+                    soups = self.nav._get_soups(urls)
             else:
                 break
 
@@ -427,6 +441,10 @@ class AuthorParser:
              'source': 'SEARCH_AUTHOR_SNIPPETS',
              'url_picture': 'https://scholar.google.com/citations?view_op=medium_photo&user=4bahYMkAAAAJ'}
         """
+        with self.nav._phase("fill_author"):
+            return self._fill(author, sections, sortby, publication_limit)
+
+    def _fill(self, author, sections: list, sortby: str, publication_limit: int):
         try:
             sections = [section.lower() for section in sections]
             sections.sort(reverse=True)  # Ensure 'publications' comes before 'public_access'
@@ -451,12 +469,14 @@ class AuthorParser:
             if sections == []:
                 for i in self._sections:
                     if i not in author['filled']:
-                        (getattr(self, f'_fill_{i}')(soup, author) if i != 'publications' else getattr(self, f'_fill_{i}')(soup, author, publication_limit, sortby_str))
+                        with self.nav._phase(i):
+                            (getattr(self, f'_fill_{i}')(soup, author) if i != 'publications' else getattr(self, f'_fill_{i}')(soup, author, publication_limit, sortby_str))
                         author['filled'].append(i)
             else:
                 for i in sections:
                     if i in self._sections and i not in author['filled']:
-                        (getattr(self, f'_fill_{i}')(soup, author) if i != 'publications' else getattr(self, f'_fill_{i}')(soup, author, publication_limit, sortby_str))
+                        with self.nav._phase(i):
+                            (getattr(self, f'_fill_{i}')(soup, author) if i != 'publications' else getattr(self, f'_fill_{i}')(soup, author, publication_limit, sortby_str))
                         author['filled'].append(i)
         except Exception as e:
             raise(e)
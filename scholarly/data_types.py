@@ -87,11 +87,46 @@ class ProxyMode(str, Enum):
     SCRAPERAPI = "SCRAPERAPI"
     LUMINATI = "LUMINATI"
     SINGLEPROXY = "SINGLEPROXY"
+    MOCK_SERVER = "MOCK_SERVER"
+    TOR_POOL = "TOR_POOL"
     # Deprecated:
     TOR_EXTERNAL = "TOR_EXTERNAL"
     TOR_INTERNAL = "TOR_INTERNAL"
 
 
+class PageClass(str, Enum):
+    """
+    Defines the kinds of Google Scholar pages that scholarly fetches.
+    """
+    AUTHOR_PROFILE = "AUTHOR_PROFILE"
+    AUTHOR_SEARCH = "AUTHOR_SEARCH"
+    PUBLICATION = "PUBLICATION"
+    SEARCH = "SEARCH"
+    BIBTEX = "BIBTEX"
+    MANDATES = "MANDATES"
+    TOP_VENUES = "TOP_VENUES"
+    OTHER = "OTHER"
+
+    @classmethod
+    def from_url(cls, url: str) -> 'PageClass':
+        """Classify a Google Scholar url"""
+        if "output=cite" in url or "scholar.bib" in url:
+            return cls.BIBTEX
+        if "mandate" in url:
+            return cls.MANDATES
+        if "view_op=top_venues" in url:
+            return cls.TOP_VENUES
+        if "view_op=view_citation" in url:
+            return cls.PUBLICATION
+        if "view_op=search_authors" in url or "view_op=view_org" in url:
+            return cls.AUTHOR_SEARCH
+        if "citations?" in url and "user=" in url:
+            return cls.AUTHOR_PROFILE
+        if "/scholar?" in url:
+            return cls.SEARCH
+        return cls.OTHER
+
+
 ''' Lightweight Data Structure to keep distribution of citations of the years '''
 CitesPerYear = Dict[int, int]
 
@@ -50,13 +50,18 @@ class _SearchScholarIterator(object):
         self._url = url
         self._pubtype = PublicationSource.PUBLICATION_SEARCH_SNIPPET if "/scholar?" in url else PublicationSource.JOURNAL_CITATION_LIST
         self._nav = nav
-        self._load_url(url)
+        with self._nav._phase("search"):
+            self._load_url(url)
         self.total_results = self._get_total_results()
         self.pub_parser = PublicationParser(self._nav)
 
     def _load_url(self, url: str):
         # this is temporary until setup json file
-        self._soup = self._nav._get_soup(url)
+        self._set_soup(*self._nav._get_search_soup(url))
+
+    def _set_soup(self, soup, publib: str = None):
+        self._soup = soup
+        self._publib = publib
         self._pos = 0
         self._rows = self._soup.find_all('div', class_='gs_r gs_or gs_scl') + self._soup.find_all('div', class_='gsc_mpat_ttl')
 
@@ -78,17 +83,21 @@ class _SearchScholarIterator(object):
         return self
 
     def __next__(self):
+        with self._nav._phase("search"):
+            return self._next()
+
+    def _next(self):
         if self._pos < len(self._rows):
             row = self._rows[self._pos]
             self._pos += 1
-            res = self.pub_parser.get_publication(row, self._pubtype)
+            res = self.pub_parser.get_publication(row, self._pubtype, publib=self._publib)
             return res
         elif self._soup.find(class_='gs_ico gs_ico_nav_next'):
             url = self._soup.find(
                 class_='gs_ico gs_ico_nav_next').parent['href']
             self._url = url
             self._load_url(url)
-            return self.__next__()
+            return self._next()
         else:
             raise StopIteration
 
@@ -136,8 +145,12 @@ class PublicationParser(object):
 
         return publication
 
-    def get_publication(self, __data, pubtype: PublicationSource)->Publication:
+    def get_publication(self, __data, pubtype: PublicationSource, publib: str = None)->Publication:
         """Returns a publication that has either 'citation' or 'scholar' source
+
+        :param publib: the template of the "add to library" links of the
+                       search page ``__data`` comes from, if any
+        :type publib: str
         """
 
         publication: Publication = {'container_type': 'Publication'}
@@ -146,9 +159,11 @@ class PublicationParser(object):
         publication['filled'] = False
 
         if publication['source'] == PublicationSource.AUTHOR_PUBLICATION_ENTRY:
-            return self._citation_pub(__data, publication)
+            with self.nav._phase("extract"):
+                return self._citation_pub(__data, publication)
         elif publication['source'] == PublicationSource.PUBLICATION_SEARCH_SNIPPET:
-            return self._scholar_pub(__data, publication)
+            with self.nav._phase("extract"):
+                return self._scholar_pub(__data, publication, publib)
         elif publication['source'] == PublicationSource.JOURNAL_CITATION_LIST:
             return publication
             # TODO: self._journal_pub(__data, publication)
@@ -183,7 +198,7 @@ class PublicationParser(object):
                 author_id_list.append("")
         return author_id_list
 
-    def _scholar_pub(self, __data, publication: Publication):
+    def _scholar_pub(self, __data, publication: Publication, publib: str = None):
         databox = __data.find('div', class_='gs_ri')
         title = databox.find('h3', class_='gs_rt')
 
@@ -192,12 +207,15 @@ class PublicationParser(object):
 
         publication['gsrank'] = int(pos) + 1
 
+        # Drop the leading [CITATION], [BOOK] or [PDF] marker from the title
+        # without modifying the soup, which the navigator may cache.
+        title_text = title.text
         if title.find('span', class_='gs_ctu'):  # A citation
-            title.span.extract()
+            title_text = title_text.replace(title.span.text, '', 1)
         elif title.find('span', class_='gs_ctc'):  # A book or PDF
-            title.span.extract()
+            title_text = title_text.replace(title.span.text, '', 1)
 
-        publication['bib']['title'] = title.text.strip()
+        publication['bib']['title'] = title_text.strip()
 
         if title.find('a'):
             publication['pub_url'] = title.find('a')['href']
@@ -246,8 +264,8 @@ class PublicationParser(object):
                 publication['bib']['abstract'] = publication['bib']['abstract'][9:].strip()
 
         publication['url_scholarbib'] = _BIBCITE.format(cid, pos)
-        sclib = self.nav.publib.format(id=cid)
-        publication['url_add_sclib'] = sclib
+        if publib is not None:
+            publication['url_add_sclib'] = publib.format(id=cid)
 
         lowerlinks = databox.find('div', class_='gs_fl').find_all('a')
 
@@ -273,6 +291,10 @@ class PublicationParser(object):
         :param publication: Scholar or Citation publication container object that is not filled
         :type publication: PublicationCitation or PublicationScholar
         """
+        with self.nav._phase("fill_publication"):
+            return self._fill(publication)
+
+    def _fill(self, publication: Publication) -> Publication:
         if publication['source'] == PublicationSource.AUTHOR_PUBLICATION_ENTRY:
             url = _CITATIONPUB.format(publication['author_pub_id'])
             soup = self.nav._get_soup(url)
@@ -38,7 +38,10 @@ setuptools.setup(
                       'typing_extensions'
                       ],
     extras_require={
-        'tor': ['stem'],
+        'tor': ['stem', 'httpx[socks]'],
+        'http2': ['httpx[http2]'],
+        'lxml': ['lxml'],
+        'selectolax': ['selectolax'],
     },
     test_suite="test_module.py"
 )